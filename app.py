@@ -31,11 +31,16 @@ db.init_app(app)
 
 # Import routes after app creation to avoid circular imports
 with app.app_context():
+    # Enable WAL and the other SQLite pragmas before the first connection is opened
+    from services.sqlite_profile import configure_engine
+    configure_engine(db.engine)
+    
     # Import models to ensure they're registered with SQLAlchemy
     from models import Dork, Result, ScanSession, ProxyServer, GithubToken
     
-    # Create database tables
-    db.create_all()
+    # Create tables, columns and indexes missing from the database, one process at a time
+    from migrations import migrate
+    migrate()
     
     # Import routes
     from routes import *
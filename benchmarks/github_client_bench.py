@@ -0,0 +1,69 @@
+"""
+Benchmark for GitHub code search throughput across a token pool
+
+Runs a burst of searches through GithubSearchClient against the local mock
+GitHub server and reports throughput next to the ceiling the per-token
+limits allow, along with how many requests the server rejected for going
+over a limit (this must be zero).
+
+Usage:
+    python -m benchmarks.github_client_bench [--tokens 4] [--queries 200] [--limit 10] [--window 1] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.mock_github import MockGithubServer
+
+async def search_all(server, pool, queries):
+    """Run every query concurrently on one client"""
+    from services.github_client import GithubSearchClient
+
+    async with GithubSearchClient(pool, base_url=server.url) as client:
+        return await asyncio.gather(*(client.search_code(query) for query in queries))
+
+def run(tokens, queries, limit, window, latency):
+    """
+    Search `queries` distinct dorks spread over `tokens` tokens
+
+    Returns:
+        dict: Throughput, ceiling and limit violations
+    """
+    from app import app
+    from services.github_client import TokenBudget, TokenPool
+
+    names = [f"token-{i}" for i in range(tokens)]
+    pool = TokenPool([TokenBudget(name, limit=limit, window=window) for name in names])
+    with app.app_context(), MockGithubServer(names, limit=limit, window=window, latency=latency) as server:
+        started = time.perf_counter()
+        results = asyncio.run(search_all(server, pool, [f'org:bench filename:.env secret{i}' for i in range(queries)]))
+        elapsed = time.perf_counter() - started
+        requests = dict(server.requests)
+        violations = sum(server.violations.values())
+
+    return {
+        'queries': queries,
+        'results': sum(len(result) for result in results),
+        'elapsed': elapsed,
+        'queries_per_second': queries / elapsed,
+        'ceiling_per_second': tokens * limit / window,
+        'requests_per_token': requests,
+        'violations': violations
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=4)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10, help='requests per window per token')
+    parser.add_argument('--window', type=float, default=1.0, help='limit window in seconds (GitHub uses 60)')
+    parser.add_argument('--latency', type=float, default=0.05, help='server response time in seconds')
+    args = parser.parse_args()
+
+    stats = run(args.tokens, args.queries, args.limit, args.window, args.latency)
+    print(f"{stats['queries']} searches, {stats['results']} results in {stats['elapsed']:.2f}s: "
+          f"{stats['queries_per_second']:.1f}/s of a {stats['ceiling_per_second']:.1f}/s ceiling")
+    print(f"requests per token: {stats['requests_per_token']}")
+    print(f"limit violations: {stats['violations']}")
+
+if __name__ == '__main__':
+    main()
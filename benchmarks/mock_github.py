@@ -0,0 +1,100 @@
+"""
+Local mock of the GitHub code search API
+
+Serves GET /search/code with the X-RateLimit headers GitHub sends and
+enforces a fixed-window limit per token. Requests over the limit get the
+403 GitHub would return and are counted as violations, so clients can be
+checked for limit compliance without network access. Responses are
+derived from the query, so repeated runs see the same results.
+
+Usage:
+    with MockGithubServer(tokens=['t1', 't2'], limit=10, window=1) as server:
+        client = GithubSearchClient(pool, base_url=server.url)
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from collections import Counter
+from aiohttp import web
+
+class MockGithubServer:
+    """Code search endpoint on 127.0.0.1, run on its own event loop thread"""
+
+    def __init__(self, tokens, limit=10, window=60, latency=0.0, results_per_query=3):
+        self.tokens = set(tokens)
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.results_per_query = results_per_query
+        # token -> [window end, requests in window]
+        self.windows = {}
+        self.requests = Counter()
+        self.violations = Counter()
+        self.max_concurrency = 0
+        self.concurrency = 0
+        self.url = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='mock-github', daemon=True)
+        self.runner = None
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/search/code', self._search_code)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def _search_code(self, request):
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if token not in self.tokens:
+            return web.json_response({'message': 'Bad credentials'}, status=401)
+
+        now = time.time()
+        window = self.windows.get(token)
+        if window is None or window[0] <= now:
+            window = self.windows[token] = [now + self.window, 0]
+        window[1] += 1
+        self.requests[token] += 1
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(max(self.limit - window[1], 0)),
+            'X-RateLimit-Reset': str(int(window[0]) + 1),
+            'X-RateLimit-Used': str(window[1]),
+            'X-RateLimit-Resource': 'code_search'
+        }
+        if window[1] > self.limit:
+            self.violations[token] += 1
+            return web.json_response({'message': 'API rate limit exceeded'}, status=403, headers=headers)
+
+        self.concurrency += 1
+        self.max_concurrency = max(self.max_concurrency, self.concurrency)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.concurrency -= 1
+
+        query = request.query.get('q', '')
+        seed = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        items = [{
+            'name': f"config{i}.env",
+            'path': f"src/config{i}.env",
+            'html_url': f"https://github.com/mock/{seed[:8]}/blob/main/src/config{i}.env",
+            'text_matches': [{'fragment': f"{query} = '{seed[i:i + 16]}'"}]
+        } for i in range(self.results_per_query)]
+        return web.json_response({'total_count': len(items), 'incomplete_results': False, 'items': items},
+                                 headers=headers)
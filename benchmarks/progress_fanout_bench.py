@@ -0,0 +1,251 @@
+"""
+Benchmark for progress fan-out to many connected watchers
+
+Starts one watcher thread per simulated SSE client on a single progress
+channel, publishes a burst of updates and reports what the server pays:
+publish cost on the scan thread, wake-ups delivered to watchers and how
+many updates were coalesced away.
+
+--topology worker runs the deployed layout instead: a separate worker
+process writes the scan's progress to the progress store on a fresh SQLite
+file, while the watchers in the web process follow it as the progress
+endpoints do, and the queries the web process sends to the store are
+counted. --feed poll repeats that with every watcher polling the store
+itself, as the endpoints did before channels were fed from the store.
+
+Usage:
+    python -m benchmarks.progress_fanout_bench [--watchers 500] [--updates 200] [--interval 0.005]
+    python -m benchmarks.progress_fanout_bench --topology worker [--feed shared|poll] [--interval 0.02]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from services.progress_bus import ProgressChannel
+
+def run(watchers, updates, interval, min_interval):
+    """
+    Publish `updates` snapshots to `watchers` waiting threads
+
+    Returns:
+        dict: Publish cost, delivery counts and delivery lag
+    """
+    channel = ProgressChannel(1)
+    deliveries = [0] * watchers
+    lags = [[] for _ in range(watchers)]
+    ready = threading.Barrier(watchers + 1)
+
+    def watcher(index):
+        since = 0
+        ready.wait()
+        while True:
+            version, snapshot, closed = channel.wait(since, 5)
+            if snapshot is None:
+                if closed:
+                    return
+                continue
+            since = version
+            deliveries[index] += 1
+            lags[index].append(time.perf_counter() - snapshot['published_at'])
+            if closed:
+                return
+            # Same per-watcher pacing as the SSE endpoint
+            time.sleep(min_interval)
+
+    threads = [threading.Thread(target=watcher, args=(i,), daemon=True) for i in range(watchers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    time.sleep(0.2)
+
+    publish_costs = []
+    started = time.perf_counter()
+    for i in range(updates):
+        snapshot = {'progress': int(i * 100 / updates), 'published_at': time.perf_counter()}
+        before = time.perf_counter()
+        channel.publish(snapshot, final=(i == updates - 1))
+        publish_costs.append(time.perf_counter() - before)
+        time.sleep(interval)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_lags = sorted(lag for per_watcher in lags for lag in per_watcher)
+    publish_costs.sort()
+    delivered = sum(deliveries)
+    return {
+        'watchers': watchers,
+        'updates': updates,
+        'elapsed_s': elapsed,
+        'publish_mean_us': statistics.fmean(publish_costs) * 1e6,
+        'publish_p99_us': publish_costs[int(len(publish_costs) * 0.99)] * 1e6,
+        'deliveries': delivered,
+        'coalesced_pct': 100 - delivered * 100 / (watchers * updates),
+        'lag_p50_ms': all_lags[len(all_lags) // 2] * 1000,
+        'lag_p99_ms': all_lags[int(len(all_lags) * 0.99)] * 1000
+    }
+
+def write_progress(session_id, updates, interval):
+    """Worker process side: advance the session in the progress store, stamping each update with its time"""
+    from app import app
+    from services.progress_store import get_progress_store
+
+    with app.app_context():
+        store = get_progress_store()
+        for i in range(updates - 1):
+            store.increment(session_id, 'google', repr(time.time()))
+            time.sleep(interval)
+        store.update(session_id, status='completed', progress=100, current_step=repr(time.time()))
+
+def run_worker_topology(watchers, updates, interval, feed):
+    """
+    Web process side: follow a scan written by a worker process; DATABASE_URL must already be set
+
+    Returns:
+        dict: Progress store queries sent by this process, deliveries and delivery lag
+    """
+    import logging
+    logging.disable(logging.INFO)
+    import config
+    from sqlalchemy import event
+    from app import app, db
+    from models import ScanSession
+    from routes import follow_progress, progress_snapshot
+    from services.progress_store import FINISHED_STATUSES, get_progress_store
+
+    with app.app_context():
+        session = ScanSession(target='fanout.example.com', target_type='domain', status='running', platforms='google')
+        db.session.add(session)
+        db.session.commit()
+        session_id = session.id
+        get_progress_store().create(session_id, status='running', total_steps=updates)
+        engine = db.engine
+
+    queries = [0]
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count(connection, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'scan_progress' in statement:
+            queries[0] += 1
+
+    def wait_shared(since, timeout):
+        return follow_progress(session_id).wait(since, timeout)
+
+    def wait_polling(since, timeout):
+        # The endpoints' per-request store polling before channels were fed from the store
+        deadline = time.monotonic() + timeout
+        while True:
+            with app.app_context():
+                snapshot = progress_snapshot(session_id)
+            closed = snapshot['status'] in FINISHED_STATUSES
+            if snapshot['version'] > since:
+                return snapshot['version'], snapshot, closed
+            if closed or time.monotonic() >= deadline:
+                return snapshot['version'], None, closed
+            time.sleep(config.PROGRESS_MIN_INTERVAL)
+
+    wait = wait_shared if feed == 'shared' else wait_polling
+    deliveries = [0] * watchers
+    lags = [[] for _ in range(watchers)]
+    ready = threading.Barrier(watchers + 1)
+
+    def watcher(index):
+        since = 0
+        ready.wait()
+        while True:
+            version, snapshot, closed = wait(since, config.PROGRESS_HEARTBEAT)
+            if snapshot is None:
+                if closed:
+                    return
+                continue
+            since = version
+            deliveries[index] += 1
+            lags[index].append(time.time() - float(snapshot['current_step']) if snapshot['version'] > 1 else 0.0)
+            if closed:
+                return
+            time.sleep(config.PROGRESS_MIN_INTERVAL)
+
+    threads = [threading.Thread(target=watcher, args=(i,), daemon=True) for i in range(watchers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    time.sleep(0.5)
+
+    queries[0] = 0
+    started = time.perf_counter()
+    writer = subprocess.Popen([sys.executable, '-m', 'benchmarks.progress_fanout_bench', '--write',
+                               json.dumps([session_id, updates, interval])])
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writer.wait()
+
+    all_lags = sorted(lag for per_watcher in lags for lag in per_watcher if lag)
+    return {
+        'topology': 'worker',
+        'feed': feed,
+        'watchers': watchers,
+        'updates': updates,
+        'elapsed_s': elapsed,
+        'store_queries': queries[0],
+        'store_queries_per_second': queries[0] / elapsed,
+        'deliveries': sum(deliveries),
+        'lag_p50_ms': all_lags[len(all_lags) // 2] * 1000 if all_lags else 0.0,
+        'lag_p99_ms': all_lags[int(len(all_lags) * 0.99)] * 1000 if all_lags else 0.0
+    }
+
+def run_in_process(watchers, updates, interval, feed):
+    """Run the worker topology case in a fresh web process against a fresh SQLite file"""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'fanout.db')}")
+        process = subprocess.run([sys.executable, '-m', 'benchmarks.progress_fanout_bench', '--case',
+                                  json.dumps([watchers, updates, interval, feed])],
+                                 env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Fan-out case failed:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--watchers', type=int, default=500)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.005, help='seconds between published updates')
+    parser.add_argument('--min-interval', type=float, default=0.25, help='per-watcher pacing, as PROGRESS_MIN_INTERVAL')
+    parser.add_argument('--topology', choices=('local', 'worker'), default='local',
+                        help='scan publishing in the web process, or in a worker process through the store')
+    parser.add_argument('--feed', choices=('shared', 'poll'), default='shared',
+                        help='worker topology: one store poller per session, or one per watcher')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--write', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.write:
+        write_progress(*json.loads(args.write))
+        return
+    if args.case:
+        print(json.dumps(run_worker_topology(*json.loads(args.case))))
+        return
+
+    if args.topology == 'worker':
+        stats = run_in_process(args.watchers, args.updates, args.interval, args.feed)
+        print(f"{stats['watchers']} watchers ({stats['feed']} feed), {stats['updates']} updates written by a "
+              f"worker process in {stats['elapsed_s']:.2f}s")
+        print(f"  progress store queries from the web process: {stats['store_queries']:,} "
+              f"({stats['store_queries_per_second']:,.1f}/s)")
+        print(f"  deliveries: {stats['deliveries']}")
+        print(f"  delivery lag: p50 {stats['lag_p50_ms']:.1f}ms, p99 {stats['lag_p99_ms']:.1f}ms")
+        return
+
+    stats = run(args.watchers, args.updates, args.interval, args.min_interval)
+    print(f"{stats['watchers']} watchers, {stats['updates']} updates in {stats['elapsed_s']:.2f}s")
+    print(f"  publish cost: mean {stats['publish_mean_us']:.1f}us, p99 {stats['publish_p99_us']:.1f}us")
+    print(f"  deliveries: {stats['deliveries']} ({stats['coalesced_pct']:.1f}% coalesced)")
+    print(f"  delivery lag: p50 {stats['lag_p50_ms']:.1f}ms, p99 {stats['lag_p99_ms']:.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Microbenchmark for RateLimiter acquire overhead under thread contention
+
+Usage:
+    python -m benchmarks.rate_limiter_bench [--threads 64] [--acquires 20000]
+"""
+import argparse
+import statistics
+import threading
+import time
+from services.rate_limiter import RateLimiter
+
+def run(threads, acquires_per_thread):
+    """
+    Hammer a single limiter from many threads and measure per-acquire latency
+
+    The limit is set high enough that no caller ever sleeps, so the numbers
+    reflect the cost of the reservation itself.
+
+    Returns:
+        dict: Throughput and latency percentiles in microseconds
+    """
+    limiter = RateLimiter("benchmark")
+    limiter.configure(max_requests=10**12, window=1)
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        samples = latencies[index]
+        barrier.wait()
+        for _ in range(acquires_per_thread):
+            started = time.perf_counter_ns()
+            limiter.wait_blocking()
+            samples.append(time.perf_counter_ns() - started)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = sorted(sample for per_thread in latencies for sample in per_thread)
+    return {
+        'threads': threads,
+        'acquires': len(samples),
+        'acquires_per_second': len(samples) / elapsed,
+        'mean_us': statistics.fmean(samples) / 1000,
+        'p50_us': samples[len(samples) // 2] / 1000,
+        'p99_us': samples[int(len(samples) * 0.99)] / 1000,
+        'max_us': samples[-1] / 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--acquires', type=int, default=20000, help='acquires per thread')
+    args = parser.parse_args()
+
+    stats = run(args.threads, args.acquires)
+    print(f"{stats['acquires']} acquires across {stats['threads']} threads: "
+          f"{stats['acquires_per_second']:,.0f}/s, mean {stats['mean_us']:.2f}us, "
+          f"p50 {stats['p50_us']:.2f}us, p99 {stats['p99_us']:.2f}us, max {stats['max_us']:.2f}us")
+
+if __name__ == '__main__':
+    main()
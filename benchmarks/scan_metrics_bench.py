@@ -0,0 +1,104 @@
+"""
+Benchmark for the cost of scan profiling
+
+Times a span in each state the instrumentation can be in, then runs the
+scan pipeline benchmark with SCAN_METRICS_ENABLED off and on and compares
+the best wall time of each:
+
+    disabled   SCAN_METRICS_ENABLED off, the span only reads the clock
+    process    no scan profile active, the span lands in the process totals
+    scan       a scan profile active, the span lands in both and keeps its detail
+
+Pipeline runs alternate between the two settings, each in a fresh process
+on a fresh SQLite file, so drift on the host affects both alike.
+
+Usage:
+    python -m benchmarks.scan_metrics_bench [--spans 200000] [--dorks 1000] [--results 10]
+        [--latency 0] [--repeats 3] [--output scan_metrics_bench.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import time
+from benchmarks.scan_pipeline_bench import run_in_process
+
+def time_spans(count):
+    """
+    Time `count` spans in each instrumentation state
+
+    Returns:
+        dict: Nanoseconds per span, by state
+    """
+    import config
+    from services.scan_metrics import profiling, span
+
+    def loop():
+        started = time.perf_counter()
+        for _ in range(count):
+            with span('bench', 'google', 'site:example.com filetype:env'):
+                pass
+        return (time.perf_counter() - started) * 1e9 / count
+
+    costs = {}
+    config.SCAN_METRICS_ENABLED = False
+    costs['disabled'] = loop()
+    config.SCAN_METRICS_ENABLED = True
+    costs['process'] = loop()
+    with profiling(0):
+        costs['scan'] = loop()
+    return costs
+
+def time_pipeline(dorks, results_per_dork, latency, repeats):
+    """
+    Run the scan pipeline with profiling off and on, alternately
+
+    Returns:
+        dict: Best pipeline measurements for 'off' and 'on'
+    """
+    best = {}
+    for _ in range(repeats):
+        for setting, value in (('off', '0'), ('on', '1')):
+            os.environ['SCAN_METRICS_ENABLED'] = value
+            try:
+                stats = run_in_process('sqlite', dorks, results_per_dork, latency)
+            finally:
+                del os.environ['SCAN_METRICS_ENABLED']
+            if setting not in best or stats['elapsed'] < best[setting]['elapsed']:
+                best[setting] = stats
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--spans', type=int, default=200000, help='spans timed in each state')
+    parser.add_argument('--dorks', type=int, default=1000, help='dorks in each pipeline run')
+    parser.add_argument('--results', type=int, default=10, help='results per dork')
+    parser.add_argument('--latency', type=float, default=0.0, help='fixture backend seconds per search')
+    parser.add_argument('--repeats', type=int, default=3, help='pipeline runs with each setting')
+    parser.add_argument('--output', default='scan_metrics_bench.json')
+    args = parser.parse_args()
+
+    spans = time_spans(args.spans)
+    for state, cost in spans.items():
+        print(f"span, {state:<8} {cost:,.0f} ns")
+
+    pipeline = time_pipeline(args.dorks, args.results, args.latency, args.repeats)
+    off, on = pipeline['off']['elapsed'], pipeline['on']['elapsed']
+    overhead = (on - off) / off * 100
+    print(f"pipeline, {args.dorks:,} dorks x {args.results} results: profiling off {off:.2f}s, "
+          f"on {on:.2f}s ({overhead:+.1f}%)")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'span_ns': spans,
+            'pipeline': pipeline,
+            'pipeline_overhead_percent': overhead
+        }, f, indent=2)
+    print(f"Wrote results to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+End-to-end benchmark for the scan pipeline
+
+Runs execute_scan against the fixture search backend for every combination
+of database, dork count and results per dork, each in a fresh process, and
+writes the numbers to a JSON file. Besides dorks/s and results/s it reports
+time spent in database statements (split into result persistence, progress
+and other), time spent in the backend, catalogue rendering time and peak
+RSS, so a regression in any of them shows up in the numbers.
+
+Database and backend times are summed over the executor's threads, so they
+can exceed the wall time. Commits are not statements and are not counted
+in the database time; the writer's own rows/s figure includes them.
+
+Each case drops and recreates every table, so only point --database at a
+database made for benchmarking. "sqlite" means a fresh temporary file.
+
+Usage:
+    python -m benchmarks.scan_pipeline_bench [--database sqlite] [--database postgresql://...]
+        [--dorks 100,1000,10000] [--results 0,10,50] [--latency 0] [--output scan_pipeline_bench.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+TARGET = 'bench.example.com'
+CATEGORIES = ['Secrets', 'Admin Panels', 'Dev/Test', 'Index Pages', 'Files / Configs']
+# Tables written by the result writer, as opposed to progress tracking
+PERSISTENCE_TABLES = re.compile(r'\b(result|dork_checkpoint|result_fingerprint)\b')
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def synthetic_dorks(count):
+    """Dork rows split evenly between Google and GitHub"""
+    return [{
+        'platform': 'google' if i % 2 == 0 else 'github',
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'template': f'site:{{{{DOMAIN}}}} intext:"bench{i}"' if i % 2 == 0 else f'org:{{{{ORG}}}} filename:bench{i}.env'
+    } for i in range(count)]
+
+def run_case(dorks, results_per_dork, latency):
+    """
+    Run one scan in this process; DATABASE_URL must already point at the database
+
+    Returns:
+        dict: Measurements of the scan
+    """
+    import logging
+    logging.disable(logging.INFO)
+    import config
+    config.SEARCH_BACKEND = 'fixture'
+    config.SEARCH_FIXTURE_RESULTS = (results_per_dork, results_per_dork)
+    config.SEARCH_FIXTURE_LATENCY = latency
+
+    from sqlalchemy import event, func, insert, select
+    from app import app, db
+    from models import Dork, Result, ScanSession
+    from routes import execute_scan
+    from services.dork_manager import DorkManager
+    from services.progress_store import get_progress_store
+    from services.search_backend import get_search_backend
+    from services.write_queue import get_write_queue
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Dork), synthetic_dorks(dorks))
+        session = ScanSession(target=TARGET, target_type='domain', status='pending', platforms='both', categories='[]')
+        db.session.add(session)
+        db.session.commit()
+        session_id = session.id
+        get_progress_store().create(session_id, status='queued', current_step='Benchmark')
+
+        # Catalogue load and rendering, timed apart from the scan that reuses them
+        DorkManager.invalidate()
+        started = time.perf_counter()
+        manager = DorkManager()
+        loaded = time.perf_counter()
+        manager.render_dorks('google', [], {'DOMAIN': TARGET})
+        manager.render_dorks('github', [], {'ORG': ''}, suffix=f" {TARGET}")
+        rendered = time.perf_counter()
+
+        db_time = {'persistence': 0.0, 'progress': 0.0, 'other': 0.0}
+        statements = {'persistence': 0, 'progress': 0, 'other': 0}
+        lock = threading.Lock()
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            context._bench_started = time.perf_counter()
+
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - context._bench_started
+            if 'scan_progress' in statement:
+                kind = 'progress'
+            elif PERSISTENCE_TABLES.search(statement):
+                kind = 'persistence'
+            else:
+                kind = 'other'
+            with lock:
+                db_time[kind] += elapsed
+                statements[kind] += 1
+
+        # On SQLite, scan writes run on the write queue's own engine
+        engines = {db.engine, get_write_queue().engine}
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', before_execute)
+            event.listen(engine, 'after_cursor_execute', after_execute)
+        rss_before = peak_rss_mb()
+        started_scan = time.perf_counter()
+        execute_scan(session_id, TARGET, 'both', '[]', 'domain')
+        elapsed = time.perf_counter() - started_scan
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_execute)
+            event.remove(engine, 'after_cursor_execute', after_execute)
+
+        backend = get_search_backend('google')
+        # execute_scan committed in its own application context
+        db.session.expire_all()
+        status = db.session.get(ScanSession, session_id).status
+        stored = db.session.scalar(select(func.count()).select_from(Result).where(Result.scan_session_id == session_id))
+        progress = get_progress_store().get(session_id) or {}
+
+    return {
+        'status': status,
+        'dorks': dorks,
+        'results_per_dork': results_per_dork,
+        'latency': latency,
+        'results': stored,
+        'elapsed': elapsed,
+        'dorks_per_second': dorks / elapsed,
+        'results_per_second': stored / elapsed,
+        'db_time': db_time,
+        'db_statements': statements,
+        'backend_time': backend.search_time,
+        'backend_searches': backend.searches,
+        'writer_rows_per_second': progress.get('rows_per_second'),
+        'catalogue_load_time': loaded - started,
+        'render_time': rendered - loaded,
+        'peak_rss_mb_before_scan': rss_before,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def describe_database(url):
+    """Database URL safe to write to the results file"""
+    from sqlalchemy.engine import make_url
+    return make_url(url).render_as_string(hide_password=True)
+
+def run_in_process(database, dorks, results_per_dork, latency):
+    """Run a case in a fresh interpreter, so each gets its own peak RSS and database connection"""
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}" if database == 'sqlite' else database
+        case = json.dumps({'dorks': dorks, 'results_per_dork': results_per_dork, 'latency': latency})
+        process = subprocess.run([sys.executable, '-m', 'benchmarks.scan_pipeline_bench', '--case', case],
+                                 env=dict(os.environ, DATABASE_URL=url), capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Benchmark case failed:\n{process.stderr[-2000:]}")
+    stats = json.loads(process.stdout.strip().splitlines()[-1])
+    stats['database'] = 'sqlite' if database == 'sqlite' else describe_database(database)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', action='append', help='"sqlite" or a database URL; repeatable')
+    parser.add_argument('--dorks', default='100,1000,10000', help='comma-separated dork counts')
+    parser.add_argument('--results', default='0,10,50', help='comma-separated results per dork')
+    parser.add_argument('--latency', type=float, default=0.0, help='fixture backend seconds per search')
+    parser.add_argument('--output', default='scan_pipeline_bench.json')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(**json.loads(args.case))))
+        return
+
+    cases = []
+    for database in args.database or ['sqlite']:
+        for dorks in [int(value) for value in args.dorks.split(',')]:
+            for results_per_dork in [int(value) for value in args.results.split(',')]:
+                stats = run_in_process(database, dorks, results_per_dork, args.latency)
+                cases.append(stats)
+                db_time = sum(stats['db_time'].values())
+                print(f"{stats['database']}: {dorks} dorks x {results_per_dork} results -> {stats['status']} "
+                      f"in {stats['elapsed']:.2f}s, {stats['dorks_per_second']:,.0f} dorks/s, "
+                      f"{stats['results_per_second']:,.0f} results/s, db {db_time:.2f}s, "
+                      f"backend {stats['backend_time']:.2f}s, peak RSS {stats['peak_rss_mb']:.0f} MiB")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cases': cases
+        }, f, indent=2)
+    print(f"Wrote {len(cases)} cases to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark for classifying result severities
+
+Compares the severity functions formerly inlined in routes.py with the
+table-driven SeverityClassifier, one result at a time and in per-dork
+batches as execute_scan calls it, and checks that all three agree.
+
+Usage:
+    python -m benchmarks.severity_bench [--results 1000000] [--per-dork 10]
+"""
+import argparse
+import json
+import os
+import time
+from services.severity import SeverityClassifier
+
+def legacy_google_severity(result):
+    """Google severity as routes.google_severity computed it"""
+    severity = 'medium'
+    if result['category'].lower() in ['credentials', 'secrets', 'passwords', 'private keys']:
+        severity = 'high'
+    elif result['category'].lower() in ['sensitive files', 'backup files', 'config files']:
+        severity = 'medium'
+    elif result['category'].lower() in ['information disclosure', 'technology detection']:
+        severity = 'low'
+    return severity
+
+def legacy_github_severity(result):
+    """GitHub severity as routes.github_severity computed it"""
+    severity = 'medium'
+    if result['category'].lower() in ['credentials', 'secrets', 'api keys', 'tokens']:
+        severity = 'high'
+    elif result['category'].lower() in ['configuration', 'database', 'env files']:
+        severity = 'medium'
+    elif result['category'].lower() in ['information', 'documentation']:
+        severity = 'low'
+    high_severity_keywords = ['password', 'secret', 'key', 'token', 'credential', 'auth', 'ssh']
+    if any(keyword in result['dork'].lower() for keyword in high_severity_keywords):
+        severity = 'high'
+    return severity
+
+LEGACY = {'google': legacy_google_severity, 'github': legacy_github_severity}
+
+def make_batches(total, per_dork):
+    """Per-dork batches of results built from the shipped dork catalogue"""
+    with open(os.path.join('data', 'dork_templates.json'), 'r') as f:
+        catalogue = json.load(f)
+    dorks = [(platform, dork['category'], dork['template'].replace('{{DOMAIN}}', 'example.com').replace('{{ORG}}', 'example'))
+             for platform in ('google', 'github') for dork in catalogue[platform]]
+    batches = []
+    for i in range(total // per_dork):
+        platform, category, template = dorks[i % len(dorks)]
+        # A unique suffix keeps every dork string distinct, as rendered dorks are
+        dork = f"{template} {i}"
+        batches.append((platform, [{'dork': dork, 'category': category, 'url': f"https://example.com/{i}/{j}",
+                                    'snippet': f"snippet {j}"} for j in range(per_dork)]))
+    return batches
+
+def run(total, per_dork):
+    """
+    Classify `total` results with each implementation
+
+    Returns:
+        dict: Results per second of each implementation and whether they agree
+    """
+    batches = make_batches(total, per_dork)
+    classifier = SeverityClassifier.from_file()
+    count = sum(len(results) for _, results in batches)
+
+    started = time.perf_counter()
+    legacy = [LEGACY[platform](result) for platform, results in batches for result in results]
+    legacy_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single = [classifier.classify(platform, result) for platform, results in batches for result in results]
+    single_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = [severity for platform, results in batches for severity in classifier.classify_batch(platform, results)]
+    batch_time = time.perf_counter() - started
+
+    return {
+        'results': count,
+        'legacy_per_second': count / legacy_time,
+        'classify_per_second': count / single_time,
+        'classify_batch_per_second': count / batch_time,
+        'agree': legacy == single == batched
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--results', type=int, default=1000000)
+    parser.add_argument('--per-dork', type=int, default=10, help='results in each classified batch')
+    args = parser.parse_args()
+
+    stats = run(args.results, args.per_dork)
+    print(f"{stats['results']:,} results")
+    print(f"legacy functions:  {stats['legacy_per_second']:>12,.0f} results/s")
+    print(f"classify:          {stats['classify_per_second']:>12,.0f} results/s")
+    print(f"classify_batch:    {stats['classify_batch_per_second']:>12,.0f} results/s")
+    print(f"implementations agree: {stats['agree']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Stress test for SQLite under concurrent scans and dashboard traffic
+
+Runs several scans at once against the fixture search backend while reader
+threads poll the endpoints the dashboard uses, and reports scan throughput,
+reader latency and every "database is locked" error on either side. Each
+SQLite mode runs in a fresh process on a fresh database file:
+
+    default     driver defaults: rollback journal, every thread writes itself
+    wal         the production pragmas (SQLITE_PRAGMAS), every thread writes itself
+    production  the production pragmas and the single writer queue
+
+Usage:
+    python -m benchmarks.sqlite_stress_bench [--modes default,wal,production] [--scans 8]
+        [--dorks 300] [--results 10] [--latency 0.005] [--readers 4] [--output sqlite_stress_bench.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.scan_pipeline_bench import peak_rss_mb, synthetic_dorks
+
+MODES = {
+    'default': {'SQLITE_PROFILE': 'default', 'SQLITE_SINGLE_WRITER': '0'},
+    'wal': {'SQLITE_PROFILE': 'production', 'SQLITE_SINGLE_WRITER': '0'},
+    'production': {'SQLITE_PROFILE': 'production', 'SQLITE_SINGLE_WRITER': '1'}
+}
+LOCKED = 'database is locked'
+
+def percentile(values, fraction):
+    """Value below which `fraction` of the sorted values fall"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_case(scans, dorks, results_per_dork, latency, readers):
+    """
+    Run concurrent scans with dashboard readers in this process; DATABASE_URL and the mode's variables must be set
+
+    Returns:
+        dict: Measurements of the run
+    """
+    import logging
+    logging.disable(logging.WARNING)
+    import config
+    config.SEARCH_BACKEND = 'fixture'
+    config.SEARCH_FIXTURE_RESULTS = (results_per_dork, results_per_dork)
+    config.SEARCH_FIXTURE_LATENCY = latency
+
+    from sqlalchemy import func, insert, select
+    from app import app, db
+    from models import Dork, Result, ScanSession
+    from routes import execute_scan
+    from services.dork_manager import DorkManager
+    from services.progress_store import get_progress_store
+    from services.write_queue import get_write_queue
+    # Reader errors surface as exceptions rather than 500 pages
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Dork), synthetic_dorks(dorks))
+        DorkManager.invalidate()
+        sessions = [ScanSession(target=f"stress{i}.example.com", target_type='domain', status='pending',
+                                platforms='both', categories='[]') for i in range(scans)]
+        db.session.add_all(sessions)
+        db.session.commit()
+        targets = {session.id: session.target for session in sessions}
+        for session_id in targets:
+            get_progress_store().create(session_id, status='queued', current_step='Stress test')
+
+    session_ids = list(targets)
+    paths = [lambda session_id: f"/api/scan/progress/{session_id}",
+             lambda session_id: f"/api/v1/scan/{session_id}/results?limit=100",
+             lambda session_id: f"/api/session/{session_id}?limit=100",
+             lambda session_id: "/api/sessions",
+             lambda session_id: "/api/v1/scans"]
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    read_errors = {'errors': 0, 'locked': 0, 'messages': []}
+
+    def reader(index):
+        client = app.test_client()
+        request_number = index
+        while not stop.is_set():
+            path = paths[request_number % len(paths)](session_ids[request_number % len(session_ids)])
+            request_number += 1
+            error = None
+            started = time.perf_counter()
+            try:
+                response = client.get(path)
+                if response.status_code >= 500:
+                    error = f"{path}: HTTP {response.status_code}"
+            except Exception as e:
+                error = f"{path}: {str(e)}"
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if error is not None:
+                    read_errors['errors'] += 1
+                    read_errors['locked'] += LOCKED in error
+                    if len(read_errors['messages']) < 5:
+                        read_errors['messages'].append(error[:200])
+
+    reader_threads = [threading.Thread(target=reader, args=(index,), daemon=True) for index in range(readers)]
+    scan_threads = [threading.Thread(target=execute_scan, args=(session_id, target, 'both', '[]', 'domain'))
+                    for session_id, target in targets.items()]
+    for thread in reader_threads:
+        thread.start()
+    started = time.perf_counter()
+    for thread in scan_threads:
+        thread.start()
+    for thread in scan_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    with app.app_context():
+        rows = db.session.execute(select(ScanSession.status, ScanSession.error_message)
+                                  .where(ScanSession.id.in_(session_ids))).all()
+        stored = db.session.scalar(select(func.count()).select_from(Result))
+        write_stats = get_write_queue().stats()
+
+    scan_errors = [error_message for status, error_message in rows if status != 'completed']
+    latencies.sort()
+    return {
+        'scans': scans,
+        'dorks_per_scan': dorks,
+        'results_per_dork': results_per_dork,
+        'latency': latency,
+        'readers': readers,
+        'elapsed': elapsed,
+        'completed_scans': sum(1 for status, _ in rows if status == 'completed'),
+        'failed_scans': len(scan_errors),
+        'scan_locked_errors': sum(1 for error_message in scan_errors if error_message and LOCKED in error_message),
+        'scan_errors': [str(error_message)[:200] for error_message in scan_errors[:5]],
+        'results': stored,
+        'results_per_second': stored / elapsed,
+        'reads': len(latencies),
+        'reads_per_second': len(latencies) / elapsed,
+        'read_p50_ms': percentile(latencies, 0.5) * 1000,
+        'read_p95_ms': percentile(latencies, 0.95) * 1000,
+        'read_p99_ms': percentile(latencies, 0.99) * 1000,
+        'read_max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'read_errors': read_errors['errors'],
+        'read_locked_errors': read_errors['locked'],
+        'read_error_samples': read_errors['messages'],
+        'writes': write_stats,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def run_in_process(mode, case):
+    """Run a case for one mode in a fresh interpreter against a fresh database file"""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'stress.db')}",
+                   QUERY_CACHE_PATH=os.path.join(directory, 'query_cache.db'), **MODES[mode])
+        process = subprocess.run([sys.executable, '-m', 'benchmarks.sqlite_stress_bench', '--case', json.dumps(case)],
+                                 env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Stress case failed:\n{process.stderr[-2000:]}")
+    stats = json.loads(process.stdout.strip().splitlines()[-1])
+    stats['mode'] = mode
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='default,wal,production', help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument('--scans', type=int, default=8, help='scans running at once')
+    parser.add_argument('--dorks', type=int, default=300, help='dorks in each scan')
+    parser.add_argument('--results', type=int, default=10, help='results per dork')
+    parser.add_argument('--latency', type=float, default=0.005, help='fixture backend seconds per search')
+    parser.add_argument('--readers', type=int, default=4, help='dashboard reader threads')
+    parser.add_argument('--output', default='sqlite_stress_bench.json')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(**json.loads(args.case))))
+        return
+
+    case = {'scans': args.scans, 'dorks': args.dorks, 'results_per_dork': args.results,
+            'latency': args.latency, 'readers': args.readers}
+    cases = []
+    for mode in args.modes.split(','):
+        stats = run_in_process(mode, case)
+        cases.append(stats)
+        print(f"{mode}: {stats['completed_scans']}/{stats['scans']} scans completed in {stats['elapsed']:.2f}s, "
+              f"{stats['results_per_second']:,.0f} results/s, locked errors {stats['scan_locked_errors']} in scans "
+              f"and {stats['read_locked_errors']} in {stats['reads']:,} reads; read p50 {stats['read_p50_ms']:.1f} ms, "
+              f"p95 {stats['read_p95_ms']:.1f} ms, max {stats['read_max_ms']:.0f} ms")
+        for message in stats['scan_errors'] + stats['read_error_samples']:
+            print(f"  {message}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cases': cases
+        }, f, indent=2)
+    print(f"Wrote {len(cases)} cases to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,33 @@ GITHUB_DEFAULT_HEADERS = {
 GITHUB_RETRY_DELAY = 60  # seconds
 GITHUB_MAX_RETRIES = 3
 GITHUB_DEFAULT_TOKEN = os.environ.get("GITHUB_TOKEN", "")
+GITHUB_CODE_SEARCH_LIMIT = 10  # code search requests per window per token, as documented by GitHub
+GITHUB_CODE_SEARCH_WINDOW = 60  # seconds
+GITHUB_SEARCH_PER_PAGE = 100  # results requested per code search (GitHub's maximum)
+GITHUB_MAX_CONNECTIONS = 16  # pooled HTTP connections to the GitHub API per process
+GITHUB_REQUEST_TIMEOUT = 30  # seconds
+GITHUB_TOKEN_FLUSH_INTERVAL = 10.0  # seconds between batched write-backs of token budgets
+
+# Search backend settings
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "auto")  # "auto", "example" or "fixture"
+SEARCH_FIXTURE_PATH = os.environ.get("SEARCH_FIXTURE_PATH")  # JSON recordings served by the fixture backend
+SEARCH_FIXTURE_LATENCY = float(os.environ.get("SEARCH_FIXTURE_LATENCY", 0.0))  # seconds per fixture search
+SEARCH_FIXTURE_RESULTS = (0, 3)  # min and max results generated per fixture query
+SEARCH_FIXTURE_SEED = 0  # changes every generated fixture result
+
+# Severity classification settings
+SEVERITY_RULES_PATH = os.environ.get("SEVERITY_RULES_PATH",
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "severity_rules.json"))
+
+# Secret scanning settings
+SECRET_SCAN_ENABLED = os.environ.get("SECRET_SCAN_ENABLED", "1") != "0"
+SECRET_RULES_PATH = os.environ.get("SECRET_RULES_PATH",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "secret_rules.json"))
+SECRET_SCAN_PROCESSES = int(os.environ.get("SECRET_SCAN_PROCESSES", 0))  # scanner processes per worker; 0 scans in the dork's thread
+SECRET_SCAN_CHUNK_SIZE = 512  # snippets per task when scanning in bulk
+
+# Placeholders allowed in dork templates, e.g. {{DOMAIN}}
+DORK_PLACEHOLDERS = frozenset({"DOMAIN", "ORG"})
 
 # Proxy settings
 USE_PROXIES = False  # Set to True to enable proxy rotation
@@ -35,6 +62,67 @@ RATE_LIMIT_MAX_REQUESTS = {
     "github": 30   # requests per window
 }
 
+# Extra random spacing (min, max seconds) applied only when the rate limiter had to wait
+PACING_JITTER = {
+    "google": (0.5, 1.5),
+    "github": (0.0, 0.5)
+}
+
+# Scan executor settings
+SCAN_MAX_WORKERS = {
+    "google": int(os.environ.get("SCAN_GOOGLE_WORKERS", 2)),  # concurrent Google dorks
+    "github": int(os.environ.get("SCAN_GITHUB_WORKERS", 4))   # concurrent GitHub dorks
+}
+SCAN_QUEUED_PER_WORKER = 2  # dorks submitted ahead of each platform worker; the rest wait unsubmitted
+
+# Scan job queue settings
+SCAN_JOB_CONCURRENCY = int(os.environ.get("SCAN_JOB_CONCURRENCY", 4))  # scans running at once across all workers
+SCAN_JOB_LEASE = 60  # seconds a claimed job stays leased without a heartbeat
+SCAN_JOB_MAX_ATTEMPTS = 3  # claims before a job whose lease keeps expiring is failed
+SCAN_JOB_POLL_INTERVAL = 1.0  # seconds an idle worker waits before claiming again
+SCAN_WORKER_PROCESSES = int(os.environ.get("SCAN_WORKER_PROCESSES", 2))  # processes started by python -m worker
+SCAN_EMBEDDED_WORKERS = int(os.environ.get("SCAN_EMBEDDED_WORKERS", 1))  # worker threads started by the main.py dev server
+
+# Result persistence settings
+RESULT_BATCH_SIZE = int(os.environ.get("RESULT_BATCH_SIZE", 500))  # rows per bulk insert
+RESULT_FLUSH_INTERVAL = 2.0  # seconds between flushes at dork boundaries
+RESULT_COPY_ENABLED = os.environ.get("RESULT_COPY_ENABLED", "1") != "0"  # stream result batches through COPY on PostgreSQL
+
+# Scan profiling settings
+SCAN_METRICS_ENABLED = os.environ.get("SCAN_METRICS_ENABLED", "1") != "0"  # time scan stages for the profile endpoint and /metrics
+SCAN_METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # histogram bounds in seconds
+SCAN_METRICS_SLOWEST = 5  # slowest spans kept per stage in a scan profile
+SCAN_PROFILE_FLUSH_INTERVAL = 10.0  # seconds between profile writes while a scan runs
+
+# Query result cache settings
+QUERY_CACHE_ENABLED = os.environ.get("QUERY_CACHE_ENABLED", "1") != "0"
+QUERY_CACHE_PATH = os.environ.get("QUERY_CACHE_PATH")  # SQLite file shared by all processes; defaults to the instance folder
+QUERY_CACHE_MEMORY_ENTRIES = 1024  # queries kept in each process's LRU tier
+QUERY_CACHE_MAX_BYTES = int(os.environ.get("QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # disk tier size budget
+QUERY_CACHE_TTL = {
+    "google": 24 * 3600,  # seconds a cached response stays valid
+    "github": 6 * 3600
+}
+QUERY_CACHE_STATS_INTERVAL = 5.0  # seconds between hit/miss counter writes to the disk tier
+
+# Progress store settings
+PROGRESS_STORE = os.environ.get("PROGRESS_STORE", "database")  # "database" (shared by all workers) or "memory"
+PROGRESS_TTL = 3600  # seconds finished scans stay in the progress store
+
+# Progress streaming settings
+PROGRESS_MIN_INTERVAL = 0.25  # seconds between events sent to one watcher; faster updates coalesce
+PROGRESS_HEARTBEAT = 15  # seconds between keep-alive comments on idle SSE streams
+PROGRESS_SSE_RETRY_MS = 3000  # reconnect delay suggested to EventSource clients
+PROGRESS_LONG_POLL_TIMEOUT = 25  # longest a long-poll request may wait
+PROGRESS_FEED_IDLE = 30  # seconds a progress store poller keeps running after its session was last followed
+
+# API pagination settings
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 1000
+
+# Export settings
+EXPORT_FETCH_SIZE = 1000  # rows fetched and written per chunk when streaming exports
+
 # User agent rotation list
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36",
@@ -47,3 +135,16 @@ USER_AGENTS = [
 # Database settings
 SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///dorkrecon.db")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# SQLite profile, applied when DATABASE_URL points at a SQLite file
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "production")  # "production" (pragmas below) or "default" (driver defaults)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers never wait for the writer
+    "synchronous": "NORMAL",  # fsync at checkpoints only; safe with WAL
+    "busy_timeout": 30000,  # milliseconds to wait for the write lock
+    "cache_size": -65536,  # KiB when negative: 64 MiB page cache per connection
+    "mmap_size": 268435456,  # bytes of the file read through a memory map
+    "temp_store": "MEMORY"
+}
+SQLITE_SINGLE_WRITER = os.environ.get("SQLITE_SINGLE_WRITER", "1") != "0"  # funnel scan writes through one connection
+SQLITE_WRITE_BATCH = 64  # queued writes committed in one transaction
@@ -1,4 +1,11 @@
+import os
 from app import app
+import config
 
 if __name__ == "__main__":
+    # The development server runs queued scans itself; deployments run python -m worker.
+    # With the reloader on, only the serving child process starts workers.
+    if config.SCAN_EMBEDDED_WORKERS and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from services.scan_worker import start_embedded_workers
+        start_embedded_workers(config.SCAN_EMBEDDED_WORKERS)
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,171 @@
+"""
+Lightweight schema migrations for DorkRecon
+
+db.create_all() only creates missing tables, so columns and indexes added to
+existing models never reach databases created by older versions. upgrade()
+adds any column or index declared on the models that the database does not
+have yet, and drops the indexes listed in DROPPED_INDEXES. New columns must
+be nullable or have a server default.
+
+migrate() creates missing tables and runs upgrade() in one transaction that
+holds a database-wide lock, so when several processes start at once (web
+workers, scan workers) one of them migrates and the rest find nothing to do.
+
+Usage:
+    python migrations.py              # apply pending columns and indexes
+    python migrations.py --check-plans  # also check hot queries use indexes
+"""
+import argparse
+import logging
+import sys
+import datetime
+from sqlalchemy import inspect, select, func, case, and_, or_
+from sqlalchemy.schema import CreateColumn
+from app import app, db
+from models import Dork, DorkCheckpoint, Result, ResultFingerprint, ScanSession
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock held while one process migrates the schema
+MIGRATION_LOCK_KEY = 0x5CA9_0C
+
+# Indexes earlier versions created that are no longer declared, by table
+DROPPED_INDEXES = {
+    # Every Result query filters by session first, so the (scan_session_id, ...) composites serve them
+    'result': ('ix_result_platform', 'ix_result_severity', 'ix_result_is_false_positive'),
+}
+
+def migrate():
+    """
+    Create missing tables and apply upgrade(), one process at a time
+
+    PostgreSQL serializes migrations with an advisory lock and SQLite with
+    BEGIN IMMEDIATE; either way a process that waited for the lock inspects
+    the schema only after the previous migration committed.
+
+    Returns:
+        list: Columns and indexes changed by upgrade()
+    """
+    with db.engine.begin() as connection:
+        dialect = connection.dialect.name
+        if dialect == 'postgresql':
+            connection.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+        elif dialect == 'sqlite':
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+        db.metadata.create_all(connection)
+        return upgrade(connection)
+
+def upgrade(connection):
+    """
+    Create columns and indexes declared on the models but missing from the database
+
+    Args:
+        connection (Connection): Connection in the migrating transaction
+
+    Returns:
+        list: Names of the columns (as table.column) and indexes that were created or dropped
+    """
+    inspector = inspect(connection)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                definition = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {definition}")
+                created.append(f"{table.name}.{column.name}")
+                logger.info(f"Added column {column.name} to {table.name}")
+        
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+                logger.info(f"Created index {index.name} on {table.name}")
+        
+        for name in DROPPED_INDEXES.get(table.name, ()):
+            if name in existing:
+                connection.exec_driver_sql(f"DROP INDEX {name}")
+                created.append(f"dropped {name}")
+                logger.info(f"Dropped index {name} from {table.name}")
+    return created
+
+def hot_queries():
+    """
+    Queries issued by the dashboard, exports and API on every request
+
+    Returns:
+        dict: Mapping of description to SQLAlchemy select statement
+    """
+    return {
+        'session results': select(Result).where(Result.scan_session_id == 1),
+        'session severity count': select(func.count()).select_from(Result)
+            .where(Result.scan_session_id == 1, Result.severity == 'high'),
+        'session false positive count': select(func.count()).select_from(Result)
+            .where(Result.scan_session_id == 1, Result.is_false_positive == True),
+        'session platform results': select(Result).where(Result.scan_session_id == 1, Result.platform == 'github'),
+        'session results page': select(Result.id, Result.result_url, Result.severity)
+            .where(Result.scan_session_id == 1, Result.id > 100).order_by(Result.id).limit(51),
+        'session export': select(Result.id, Result.result_url, Result.snippet)
+            .where(Result.scan_session_id == 1).order_by(Result.id),
+        'severity counts by session': select(Result.scan_session_id, func.count(Result.id),
+                                             func.sum(case((Result.severity == 'high', 1), else_=0)))
+            .where(Result.scan_session_id.in_([1, 2, 3])).group_by(Result.scan_session_id),
+        'checkpoint status counts': select(DorkCheckpoint.status, func.count())
+            .where(DorkCheckpoint.scan_session_id == 1).group_by(DorkCheckpoint.status),
+        'recent sessions': select(ScanSession).order_by(ScanSession.created_at.desc()).limit(10),
+        'scan sessions page': select(ScanSession).where(or_(
+                ScanSession.created_at < datetime.datetime(2025, 1, 1),
+                and_(ScanSession.created_at == datetime.datetime(2025, 1, 1), ScanSession.id < 100)
+            )).order_by(ScanSession.created_at.desc(), ScanSession.id.desc()).limit(21),
+        'dorks by platform and category': select(Dork).where(Dork.platform == 'google', Dork.category == 'Secrets'),
+        'target fingerprints': select(ResultFingerprint.url_hash).where(ResultFingerprint.target == 'example.com'),
+        'session URL lookup': select(Result.dorks).where(Result.scan_session_id == 1, Result.url_hash == 'a' * 40),
+    }
+
+def check_query_plans():
+    """
+    Verify that hot queries are served by indexes rather than full table scans
+
+    Only SQLite plans are checked; other backends have their plans logged.
+
+    Returns:
+        list: Descriptions of queries that fall back to a full table scan
+    """
+    failures = []
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as connection:
+        for description, statement in hot_queries().items():
+            sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            if dialect == 'sqlite':
+                plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+                # "SCAN <table>" without an index is a full table scan
+                if any(step.startswith('SCAN') and 'INDEX' not in step for step in plan):
+                    failures.append(description)
+            else:
+                plan = [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+            logger.info(f"{description}: {' | '.join(plan)}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply DorkRecon schema migrations')
+    parser.add_argument('--check-plans', action='store_true', help='fail if a hot query needs a full table scan')
+    args = parser.parse_args()
+
+    with app.app_context():
+        created = migrate()
+        print(f"Applied {len(created)} column/index change(s): {', '.join(created) if created else 'none'}")
+
+        if args.check_plans:
+            failures = check_query_plans()
+            if failures:
+                print(f"Full table scans in: {', '.join(failures)}")
+                return 1
+            print("All hot queries use indexes")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
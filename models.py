@@ -1,8 +1,13 @@
+import json
 import datetime
 from app import db
 
 class Dork(db.Model):
     """Model for dork templates"""
+    __table_args__ = (
+        db.Index('ix_dork_platform_category', 'platform', 'category'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     platform = db.Column(db.String(50), nullable=False)  # google or github
     category = db.Column(db.String(100), nullable=False)
@@ -17,21 +22,37 @@ class ScanSession(db.Model):
     target = db.Column(db.String(255), nullable=False)  # domain or org
     target_type = db.Column(db.String(50), nullable=False)  # domain or organization
     status = db.Column(db.String(50), default='pending')  # pending, running, completed, failed
-    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     platforms = db.Column(db.String(50), nullable=False)  # google, github, or both
     categories = db.Column(db.Text, nullable=True)  # JSON array of selected categories
     error_message = db.Column(db.Text, nullable=True)
+    cache_only = db.Column(db.Boolean, default=False)  # replay from the query cache without searching
+    delta = db.Column(db.Boolean, default=False)  # store only findings new or changed since earlier scans
+    profile = db.Column(db.Text, nullable=True)  # JSON stage timings of the latest run (ScanProfile.to_dict)
     
-    results = db.relationship('Result', backref='scan_session', lazy=True, cascade="all, delete-orphan")
+    results = db.relationship('Result', backref='scan_session', lazy=True, cascade="all, delete-orphan",
+                              foreign_keys='Result.scan_session_id')
+    checkpoints = db.relationship('DorkCheckpoint', backref='scan_session', lazy=True, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<ScanSession {self.id} - {self.target}>"
 
 class Result(db.Model):
     """Model for scan results"""
+    __table_args__ = (
+        # Per-session results pages and exports, in id order without a sort
+        db.Index('ix_result_session_id', 'scan_session_id', 'id'),
+        # Per-session dashboard and count queries
+        db.Index('ix_result_session_severity', 'scan_session_id', 'severity'),
+        db.Index('ix_result_session_false_positive', 'scan_session_id', 'is_false_positive'),
+        db.Index('ix_result_session_platform', 'scan_session_id', 'platform'),
+        # One row per normalized URL in a session; rows from before deduplication have no hash
+        db.Index('uq_result_session_url', 'scan_session_id', 'url_hash', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    scan_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False)
+    scan_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False)  # indexed by the composites below
     dork = db.Column(db.Text, nullable=False)
     platform = db.Column(db.String(50), nullable=False)  # google or github
     category = db.Column(db.String(100), nullable=False)
@@ -41,6 +62,11 @@ class Result(db.Model):
     is_false_positive = db.Column(db.Boolean, default=False)
     notes = db.Column(db.Text, nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    first_seen_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=True)  # session that first found this URL
+    delta_status = db.Column(db.String(20), nullable=True)  # new, changed or unchanged since earlier scans of the target
+    url_hash = db.Column(db.String(40), nullable=True)  # SHA-1 of the normalized result URL
+    dorks = db.Column(db.Text, nullable=True)  # JSON array of every dork in the session that found this URL
+    secret_rules = db.Column(db.Text, nullable=True)  # JSON array of secret rule IDs the snippet matched
     
     def __repr__(self):
         return f"<Result {self.id} - {self.platform}>"
@@ -58,9 +84,49 @@ class Result(db.Model):
             'severity': self.severity,
             'is_false_positive': self.is_false_positive,
             'notes': self.notes,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'first_seen_session_id': self.first_seen_session_id,
+            'delta_status': self.delta_status,
+            'dorks': json.loads(self.dorks) if self.dorks else [self.dork],
+            'secret_rules': json.loads(self.secret_rules) if self.secret_rules else []
         }
 
+class DorkCheckpoint(db.Model):
+    """Model for the outcome of one dork in a scan session, used to resume scans"""
+    __table_args__ = (
+        db.Index('ix_dork_checkpoint_session_status', 'scan_session_id', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scan_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False)  # indexed by the composite above
+    platform = db.Column(db.String(50), nullable=False)  # google or github
+    category = db.Column(db.String(100), nullable=False)
+    dork = db.Column(db.Text, nullable=False)  # rendered query, matches Result.dork
+    status = db.Column(db.String(20), nullable=False)  # done or failed
+    result_count = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+    completed_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<DorkCheckpoint {self.platform}:{self.status} - Session {self.scan_session_id}>"
+
+class ResultFingerprint(db.Model):
+    """Model for findings seen on a target across scan sessions, used by delta scans"""
+    __table_args__ = (
+        db.Index('ix_result_fingerprint_target_key', 'target', 'platform', 'url_hash', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(255), nullable=False)  # lowercased scan target
+    platform = db.Column(db.String(50), nullable=False)  # google or github
+    url_hash = db.Column(db.String(40), nullable=False)  # SHA-1 of the normalized result URL
+    snippet_hash = db.Column(db.String(40), nullable=False)  # SHA-1 of the latest snippet
+    first_seen_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False)
+    changed_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False)  # session that stored the latest snippet
+    
+    def __repr__(self):
+        return f"<ResultFingerprint {self.platform}:{self.url_hash[:8]} - {self.target}>"
+
 class ProxyServer(db.Model):
     """Model for proxy servers"""
     id = db.Column(db.Integer, primary_key=True)
@@ -94,3 +160,46 @@ class GithubToken(db.Model):
     
     def __repr__(self):
         return f"<GithubToken {self.id} - Owner: {self.owner}>"
+
+class ScanProgress(db.Model):
+    """Model for live scan progress, shared between web workers"""
+    session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), primary_key=True)
+    status = db.Column(db.String(50), default='initializing')
+    progress = db.Column(db.Integer, default=0)
+    current_step = db.Column(db.Text, nullable=True)
+    total_steps = db.Column(db.Integer, default=0)
+    completed_steps = db.Column(db.Integer, default=0)
+    google_dorks_total = db.Column(db.Integer, default=0)
+    google_dorks_completed = db.Column(db.Integer, default=0)
+    github_dorks_total = db.Column(db.Integer, default=0)
+    github_dorks_completed = db.Column(db.Integer, default=0)
+    rows_per_second = db.Column(db.Float, nullable=True)
+    version = db.Column(db.Integer, default=0)  # bumped on every update
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True, index=True)  # used for TTL eviction
+    
+    def __repr__(self):
+        return f"<ScanProgress {self.session_id} - {self.progress}%>"
+
+class ScanJob(db.Model):
+    """Model for queued scan jobs, claimed by worker processes under a lease"""
+    __table_args__ = (
+        # Claim query: oldest queued job first
+        db.Index('ix_scan_job_status_id', 'status', 'id'),
+        # Lease expiry sweep
+        db.Index('ix_scan_job_status_lease', 'status', 'lease_expires_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scan_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    worker_id = db.Column(db.String(100), nullable=True)  # holder of the lease
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<ScanJob {self.id} - Session {self.scan_session_id} ({self.status})>"
@@ -1,11 +1,28 @@
+import io
+import csv
 import json
+import time
 import datetime
-from flask import render_template, request, jsonify, redirect, url_for, flash
+from flask import render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
+from sqlalchemy import and_, or_, case, func, select, update
 from app import app, db
-from models import Dork, Result, ScanSession, ProxyServer, GithubToken
+from models import Dork, DorkCheckpoint, Result, ScanSession, ProxyServer, GithubToken
 from services.dork_manager import DorkManager
 from services.google_dorker import GoogleDorker
 from services.github_dorker import GithubDorker
+from services.result_writer import ResultWriter
+from services.scan_executor import ScanExecutor
+from services.pagination import CursorError, decode_cursor, encode_cursor, parse_limit
+from services.progress_bus import progress_bus
+from services.progress_store import FINISHED_STATUSES, get_progress_store
+from services.job_queue import JobQueue
+from services.query_cache import query_cache
+from services.fingerprint import FingerprintIndex
+from services.severity import get_classifier
+from services.secret_scanner import get_scanner, scan_results
+from services.write_queue import get_write_queue
+from services.scan_metrics import profiling, registry, span, stored_profiles
+import config
 
 # Initialize services
 dork_manager = DorkManager()
@@ -30,10 +47,6 @@ def settings():
     tokens = GithubToken.query.all()
     return render_template('settings.html', proxies=proxies, tokens=tokens)
 
-import threading
-
-# Dictionary to store scan progress information
-scan_progress = {}
 
 @app.route('/api/scan', methods=['POST'])
 def start_scan():
@@ -45,6 +58,8 @@ def start_scan():
     platforms = data.get('platforms', 'both')
     categories = json.dumps(data.get('categories', []))
     target_type = 'domain' if '.' in target else 'organization'
+    cache_only = bool(data.get('cache_only', False))
+    delta = bool(data.get('delta', False))
     
     if not target:
         return jsonify({"error": "Target is required"}), 400
@@ -54,224 +69,389 @@ def start_scan():
         target_type=target_type,
         status='pending',
         platforms=platforms,
-        categories=categories
+        categories=categories,
+        cache_only=cache_only,
+        delta=delta
     )
     db.session.add(new_session)
     db.session.commit()
     
-    # Initialize progress tracking for this session
-    scan_progress[new_session.id] = {
-        'status': 'initializing',
-        'progress': 0,
-        'current_step': 'Starting scan...',
-        'total_steps': 0,
-        'completed_steps': 0,
-        'google_dorks_total': 0,
-        'google_dorks_completed': 0,
-        'github_dorks_total': 0,
-        'github_dorks_completed': 0
-    }
+    enqueue_scan(new_session.id, 'Waiting for a scan worker...')
     
-    # Update session status to running
-    new_session.status = 'running'
+    return jsonify({
+        "session_id": new_session.id, 
+        "status": "queued",
+        "message": "Scan queued. Check progress via /api/scan/progress endpoint."
+    })
+
+@app.route('/api/scan/<int:session_id>/resume', methods=['POST'])
+def resume_scan(session_id):
+    """API endpoint to rerun the dorks of a scan that are missing or failed"""
+    ScanSession.query.get_or_404(session_id)
+    
+    # Conditional update, so concurrent resume requests queue a single job
+    resumed = db.session.execute(update(ScanSession).where(
+        ScanSession.id == session_id,
+        ScanSession.status.notin_(['pending', 'running'])
+    ).values(status='pending', error_message=None, completed_at=None)).rowcount
     db.session.commit()
+    if not resumed:
+        return jsonify({"error": "Scan is still queued or running"}), 409
+    
+    checkpoints = dict(db.session.execute(
+        select(DorkCheckpoint.status, func.count())
+        .where(DorkCheckpoint.scan_session_id == session_id)
+        .group_by(DorkCheckpoint.status)
+    ).all())
+    
+    enqueue_scan(session_id, 'Waiting for a scan worker to resume...')
+    
+    return jsonify({
+        "session_id": session_id,
+        "status": "queued",
+        "completed_dorks": checkpoints.get('done', 0),
+        "failed_dorks": checkpoints.get('failed', 0),
+        "message": "Scan resume queued. Completed dorks are skipped and their results kept."
+    })
+
+@app.route('/api/scan/<int:session_id>/replay', methods=['POST'])
+def replay_scan(session_id):
+    """API endpoint to rebuild a scan's results from the query cache into a new session, without searching"""
+    session = ScanSession.query.get_or_404(session_id)
     
-    # Start scan in background thread
-    scan_thread = threading.Thread(
-        target=execute_scan,
-        args=(new_session.id, target, platforms, categories, target_type)
+    replay = ScanSession(
+        target=session.target,
+        target_type=session.target_type,
+        status='pending',
+        platforms=session.platforms,
+        categories=session.categories,
+        cache_only=True
     )
-    scan_thread.daemon = True
-    scan_thread.start()
+    db.session.add(replay)
+    db.session.commit()
+    
+    enqueue_scan(replay.id, 'Waiting for a scan worker to replay from cache...')
     
     return jsonify({
-        "session_id": new_session.id, 
-        "status": "started",
-        "message": "Scan started in background. Check progress via /api/scan/progress endpoint."
+        "session_id": replay.id,
+        "replay_of": session_id,
+        "status": "queued",
+        "message": "Cache replay queued. Queries missing from the cache return no results."
     })
 
-def execute_scan(session_id, target, platforms, categories, target_type):
-    """Execute the scan in a background thread"""
+def enqueue_scan(session_id, current_step):
+    """Reset a session's progress and queue it for the scan workers (python -m worker)"""
+    get_progress_store().create(session_id, status='queued', current_step=current_step)
+    if progress_bus.get(session_id) is not None:
+        # Reopen the finished channel this process still holds for a resumed session
+        publish_progress(session_id)
+    
+    # The web tier only enqueues; a scan worker picks the job up
+    JobQueue().enqueue(session_id)
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """API endpoint reporting query cache hits and misses across all scan workers"""
+    return jsonify(query_cache.stats())
+
+@app.route('/api/scan/queue')
+def get_scan_queue():
+    """API endpoint reporting scan jobs by status"""
+    return jsonify(JobQueue().stats())
+
+def execute_scan(session_id, target, platforms, categories, target_type, cache_only=False, delta=False):
+    """
+    Execute the scan; called by a scan worker holding the job's lease
+    
+    Dorks with a "done" checkpoint from an earlier run are skipped, so the same
+    call both starts a new scan and resumes a failed or interrupted one. With
+    cache_only, dorks are answered from the query cache and never searched.
+    Every scan updates the target's fingerprint index; with delta, results
+    already seen unchanged by an earlier scan are not stored.
+    """
     # Use Flask application context to ensure database access works correctly
-    with app.app_context():
+    with app.app_context(), profiling(session_id) as profile:
+        writer = None
         try:
             session = ScanSession.query.get(session_id)
             if not session:
                 return
             
+            update_session(session_id, status='running')
+            
             selected_categories = json.loads(categories) if categories else []
-            total_steps = 0
+            # Dorks may have been added by the web process since this worker loaded its catalogue
+            DorkManager.refresh()
+            writer = ResultWriter(session_id, fingerprints=FingerprintIndex(target).load(), delta=delta)
+            executor = ScanExecutor()
+            classifier = get_classifier()
+            scanner = get_scanner()
+            completed = writer.resume()
+            
+            def on_google_dork(dork, results):
+                # Buffer results and flush at the dork boundary
+                for result, severity in zip(results, classifier.classify_batch('google', results)):
+                    writer.add('google', result, scanner.escalate(severity, result.get('secret_rules')))
+                writer.complete_dork('google', dork, len(results))
+                writer.checkpoint()
+                update_google_progress(session_id, dork)
+                if profile.flush_due():
+                    save_profile(session_id, profile)
             
-            # Calculate total steps for progress tracking
+            def on_github_dork(dork, results):
+                # Buffer results and flush at the dork boundary
+                for result, severity in zip(results, classifier.classify_batch('github', results)):
+                    writer.add('github', result, scanner.escalate(severity, result.get('secret_rules')))
+                writer.complete_dork('github', dork, len(results))
+                writer.checkpoint()
+                update_github_progress(session_id, dork)
+                if profile.flush_due():
+                    save_profile(session_id, profile)
+            
+            # Render dorks up front so progress tracking knows the total
+            google_total = github_total = google_done = github_done = 0
             if platforms in ['google', 'both']:
-                google_dorker = GoogleDorker()
-                google_dorks = google_dorker.dork_manager.get_dorks('google', selected_categories)
-                scan_progress[session_id]['google_dorks_total'] = len(google_dorks)
-                total_steps += len(google_dorks)
+                google_dorker = GoogleDorker(cache_only=cache_only)
+                google_dorks = google_dorker.prepare_dorks(target, selected_categories)
+                google_total = len(google_dorks)
+                google_dorks = [dork for dork in google_dorks if ('google', dork.template) not in completed]
+                google_done = google_total - len(google_dorks)
+                executor.add_platform('google', google_dorks,
+                                      lambda dork: scan_results(google_dorker.run_dork(dork, target)),
+                                      on_google_dork,
+                                      lambda dork, error: writer.fail_dork('google', dork, error))
             
             if platforms in ['github', 'both']:
-                github_dorker = GithubDorker()
-                github_dorks = github_dorker.dork_manager.get_dorks('github', selected_categories)
-                scan_progress[session_id]['github_dorks_total'] = len(github_dorks)
-                total_steps += len(github_dorks)
+                github_dorker = GithubDorker(cache_only=cache_only)
+                github_dorks = github_dorker.prepare_dorks(target, selected_categories, target_type)
+                github_total = len(github_dorks)
+                github_dorks = [dork for dork in github_dorks if ('github', dork.template) not in completed]
+                github_done = github_total - len(github_dorks)
+                executor.add_platform('github', github_dorks,
+                                      lambda dork: scan_results(github_dorker.run_dork(dork, target, target_type)),
+                                      on_github_dork,
+                                      lambda dork, error: writer.fail_dork('github', dork, error))
             
-            scan_progress[session_id]['total_steps'] = total_steps
+            total = google_total + github_total
+            done = google_done + github_done
+            get_progress_store().update(session_id,
+                                        google_dorks_total=google_total,
+                                        github_dorks_total=github_total,
+                                        google_dorks_completed=google_done,
+                                        github_dorks_completed=github_done,
+                                        total_steps=total,
+                                        completed_steps=done,
+                                        progress=int(done * 100 / total) if total > 0 else 0,
+                                        status='running',
+                                        current_step='Executing dorks...')
+            publish_progress(session_id)
             
-            # Run Google dorking if selected
-            if platforms in ['google', 'both']:
-                scan_progress[session_id]['status'] = 'running'
-                scan_progress[session_id]['current_step'] = 'Executing Google dorks...'
-                
-                google_dorker = GoogleDorker(progress_callback=lambda dork, results: update_google_progress(session_id, dork))
-                google_results = google_dorker.search(target, selected_categories)
-                
-                # Save results to database
-                for result in google_results:
-                    severity = 'medium'  # Default severity
-                    
-                    # Assign severity based on category
-                    if result['category'].lower() in ['credentials', 'secrets', 'passwords', 'private keys']:
-                        severity = 'high'
-                    elif result['category'].lower() in ['sensitive files', 'backup files', 'config files']:
-                        severity = 'medium'
-                    elif result['category'].lower() in ['information disclosure', 'technology detection']:
-                        severity = 'low'
-                    
-                    new_result = Result(
-                        scan_session_id=session_id,
-                        dork=result['dork'],
-                        platform='google',
-                        category=result['category'],
-                        result_url=result['url'],
-                        snippet=result['snippet'],
-                        severity=severity
-                    )
-                    db.session.add(new_result)
-                    db.session.commit()
-                
-            # Run GitHub dorking if selected
-            if platforms in ['github', 'both']:
-                scan_progress[session_id]['current_step'] = 'Executing GitHub dorks...'
-                
-                github_dorker = GithubDorker(progress_callback=lambda dork, results: update_github_progress(session_id, dork))
-                github_results = github_dorker.search(target, selected_categories, target_type)
-                
-                # Save results to database
-                for result in github_results:
-                    severity = 'medium'  # Default severity
-                    
-                    # Assign severity based on category for GitHub findings
-                    if result['category'].lower() in ['credentials', 'secrets', 'api keys', 'tokens']:
-                        severity = 'high'
-                    elif result['category'].lower() in ['configuration', 'database', 'env files']:
-                        severity = 'medium'
-                    elif result['category'].lower() in ['information', 'documentation']:
-                        severity = 'low'
-                        
-                    # Keywords that might indicate high severity
-                    high_severity_keywords = ['password', 'secret', 'key', 'token', 'credential', 'auth', 'ssh']
-                    if any(keyword in result['dork'].lower() for keyword in high_severity_keywords):
-                        severity = 'high'
-                    
-                    new_result = Result(
-                        scan_session_id=session_id,
-                        dork=result['dork'],
-                        platform='github',
-                        category=result['category'],
-                        result_url=result['url'],
-                        snippet=result['snippet'],
-                        severity=severity
-                    )
-                    db.session.add(new_result)
-                    db.session.commit()
+            # Run all selected platforms concurrently
+            executor.run()
+            
+            # Write any remaining buffered results
+            writer.close()
             
             # Update session status to completed
-            session = ScanSession.query.get(session_id)
-            session.status = 'completed'
-            session.completed_at = datetime.datetime.utcnow()
-            db.session.commit()
+            profile.finish('completed')
+            update_session(session_id, status='completed', completed_at=datetime.datetime.utcnow(),
+                           profile=profile.to_json())
             
             # Update progress
-            scan_progress[session_id]['status'] = 'completed'
-            scan_progress[session_id]['progress'] = 100
-            scan_progress[session_id]['current_step'] = 'Scan completed successfully.'
+            get_progress_store().update(session_id,
+                                        status='completed',
+                                        progress=100,
+                                        current_step='Scan completed successfully.',
+                                        rows_per_second=round(writer.rows_per_second, 1))
+            publish_progress(session_id, final=True)
             
         except Exception as e:
             # Handle errors
             print(f"Error in execute_scan: {str(e)}")
             try:
-                session = ScanSession.query.get(session_id)
-                if session:
-                    session.status = 'failed'
-                    session.error_message = str(e)
-                    db.session.commit()
+                # Keep the results and checkpoints of the dorks that finished, so the scan can be resumed
+                if writer is not None:
+                    try:
+                        writer.close()
+                    except Exception as flush_error:
+                        print(f"Error saving partial results in execute_scan: {str(flush_error)}")
+                
+                profile.finish('failed')
+                update_session(session_id, status='failed', error_message=str(e), profile=profile.to_json())
                 
                 # Update progress with error
-                scan_progress[session_id]['status'] = 'failed'
-                scan_progress[session_id]['current_step'] = f'Error: {str(e)}'
+                get_progress_store().update(session_id, status='failed', current_step=f'Error: {str(e)}')
+                publish_progress(session_id, final=True)
             except Exception as inner_e:
                 print(f"Error handling exception in execute_scan: {str(inner_e)}")
 
+def update_session(session_id, **values):
+    """Set scan session columns through the write queue shared by all scan writes"""
+    get_write_queue().run(lambda connection: connection.execute(
+        update(ScanSession).where(ScanSession.id == session_id).values(**values)))
+
+def save_profile(session_id, profile):
+    """Store a running scan's profile without waiting for the write"""
+    values = {'profile': profile.to_json()}
+    get_write_queue().submit(lambda connection: connection.execute(
+        update(ScanSession).where(ScanSession.id == session_id).values(**values)))
+
 def update_google_progress(session_id, dork):
     """Update progress for Google dorking"""
-    if session_id in scan_progress:
-        # These operations are just updating memory, not DB, so no app context needed
-        scan_progress[session_id]['google_dorks_completed'] += 1
-        scan_progress[session_id]['completed_steps'] += 1
-        total = scan_progress[session_id]['total_steps']
-        completed = scan_progress[session_id]['completed_steps']
-        scan_progress[session_id]['progress'] = int((completed / total) * 100) if total > 0 else 0
-        scan_progress[session_id]['current_step'] = f'Processing Google dork: {dork["template"][:40]}...'
-        print(f"Progress update: {scan_progress[session_id]['progress']}% - {scan_progress[session_id]['current_step']}")
+    # Counters are incremented atomically by the store, so concurrent dorks never lose a step
+    with span('progress', 'google'):
+        get_progress_store().increment(session_id, 'google', f'Processing Google dork: {dork.template[:40]}...')
+        publish_progress(session_id)
 
 def update_github_progress(session_id, dork):
     """Update progress for GitHub dorking"""
-    if session_id in scan_progress:
-        # These operations are just updating memory, not DB, so no app context needed
-        scan_progress[session_id]['github_dorks_completed'] += 1
-        scan_progress[session_id]['completed_steps'] += 1
-        total = scan_progress[session_id]['total_steps']
-        completed = scan_progress[session_id]['completed_steps']
-        scan_progress[session_id]['progress'] = int((completed / total) * 100) if total > 0 else 0
-        scan_progress[session_id]['current_step'] = f'Processing GitHub dork: {dork["template"][:40]}...'
-        print(f"Progress update: {scan_progress[session_id]['progress']}% - {scan_progress[session_id]['current_step']}")
+    # Counters are incremented atomically by the store, so concurrent dorks never lose a step
+    with span('progress', 'github'):
+        get_progress_store().increment(session_id, 'github', f'Processing GitHub dork: {dork.template[:40]}...')
+        publish_progress(session_id)
 
-@app.route('/api/scan/progress/<int:session_id>')
-def get_scan_progress(session_id):
-    """API endpoint to get scan progress"""
-    if session_id not in scan_progress:
-        # Check database for status if not in memory
-        session = ScanSession.query.get_or_404(session_id)
-        return jsonify({
-            "session_id": session_id,
-            "status": session.status,
-            "progress": 100 if session.status == 'completed' else 0,
-            "current_step": "Scan completed" if session.status == 'completed' else "Scan not in progress"
-        })
-    
-    return jsonify({
+def progress_snapshot(session_id):
+    """
+    Build the progress payload for a scan from the progress store
+    
+    Returns:
+        dict: Progress payload, or None if the session is not tracked by the store
+    """
+    progress = get_progress_store().get(session_id)
+    if progress is None:
+        return None
+    
+    return {
         "session_id": session_id,
-        "status": scan_progress[session_id]['status'],
-        "progress": scan_progress[session_id]['progress'],
-        "current_step": scan_progress[session_id]['current_step'],
+        "status": progress['status'],
+        "progress": progress['progress'],
+        "current_step": progress['current_step'],
+        "version": progress['version'],
         "details": {
             "google_dorks": {
-                "total": scan_progress[session_id]['google_dorks_total'],
-                "completed": scan_progress[session_id]['google_dorks_completed']
+                "total": progress['google_dorks_total'],
+                "completed": progress['google_dorks_completed']
             },
             "github_dorks": {
-                "total": scan_progress[session_id]['github_dorks_total'],
-                "completed": scan_progress[session_id]['github_dorks_completed']
+                "total": progress['github_dorks_total'],
+                "completed": progress['github_dorks_completed']
             }
         }
+    }
+
+def stored_progress(session_id):
+    """Build a progress payload from the database for sessions no longer tracked by the store"""
+    session = ScanSession.query.get_or_404(session_id)
+    return {
+        "session_id": session_id,
+        "status": session.status,
+        "progress": 100 if session.status == 'completed' else 0,
+        "current_step": "Scan completed" if session.status == 'completed' else "Scan not in progress"
+    }
+
+def publish_progress(session_id, final=False):
+    """Push the current progress of a session to its watchers"""
+    snapshot = progress_snapshot(session_id)
+    if snapshot is not None:
+        progress_bus.publish(session_id, snapshot, final, snapshot['version'])
+
+def follow_progress(session_id):
+    """
+    Return the progress channel of a session wherever its scan runs
+    
+    Scans running in this process publish to their channel. For a scan run
+    by a worker process, the channel is fed from the progress store by one
+    poller shared by every request watching the session.
+    
+    Returns:
+        ProgressChannel: The channel, or None if the session is not tracked
+    """
+    def fetch():
+        # Called from the bus's poller thread, outside any request
+        with app.app_context():
+            snapshot = progress_snapshot(session_id)
+        if snapshot is None:
+            return None
+        return snapshot, snapshot['status'] in FINISHED_STATUSES
+    
+    return progress_bus.follow(session_id, fetch)
+
+@app.route('/api/scan/progress/<int:session_id>')
+def get_scan_progress(session_id):
+    """
+    API endpoint to get scan progress
+    
+    Passing since=<version> turns the request into a long poll that returns as
+    soon as a newer update is published, or after wait seconds at most.
+    """
+    since = request.args.get('since', type=int)
+    timeout = min(request.args.get('wait', config.PROGRESS_LONG_POLL_TIMEOUT, type=float),
+                  config.PROGRESS_LONG_POLL_TIMEOUT)
+    
+    channel = follow_progress(session_id)
+    if channel is None:
+        # No longer running anywhere
+        return jsonify(stored_progress(session_id))
+    
+    if since is not None:
+        channel.wait(since, timeout)
+    elif channel.snapshot is None:
+        # Another request is reading this session from the store right now
+        channel.wait(0, config.PROGRESS_MIN_INTERVAL)
+    # Report the latest snapshot, whether or not the wait saw a new one
+    return jsonify(channel.snapshot or stored_progress(session_id))
+
+@app.route('/api/scan/progress/<int:session_id>/stream')
+def stream_scan_progress(session_id):
+    """API endpoint streaming scan progress as Server-Sent Events"""
+    channel = follow_progress(session_id)
+    if channel is None:
+        # Not running anywhere: send the stored state once and end the stream
+        snapshot = stored_progress(session_id)
+        return Response(f"data: {json.dumps(snapshot)}\n\n", mimetype='text/event-stream')
+    
+    def generate():
+        since = 0
+        yield f"retry: {config.PROGRESS_SSE_RETRY_MS}\n\n"
+        while True:
+            # Following again keeps the store poller running while this stream is open
+            version, snapshot, closed = (follow_progress(session_id) or channel).wait(since, config.PROGRESS_HEARTBEAT)
+            if snapshot is None:
+                if closed:
+                    return
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            
+            since = version
+            yield f"id: {version}\ndata: {json.dumps(snapshot)}\n\n"
+            if closed:
+                return
+            
+            # Updates published meanwhile coalesce into the next snapshot
+            time.sleep(config.PROGRESS_MIN_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
+@app.route('/api/scan/progress/stats')
+def get_progress_stats():
+    """API endpoint reporting progress fan-out cost per open channel"""
+    return jsonify({"channels": progress_bus.stats()})
+
 @app.route('/api/session/<int:session_id>')
 def get_session(session_id):
-    """API endpoint to get session details"""
+    """API endpoint to get session details and one page of its results"""
     session = ScanSession.query.get_or_404(session_id)
-    results = Result.query.filter_by(scan_session_id=session_id).all()
     
+    try:
+        results_data, next_cursor = query_results(session_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    counts = get_session_counts([session_id]).get(session_id, EMPTY_COUNTS)
     session_data = {
         "id": session.id,
         "target": session.target,
@@ -281,29 +461,107 @@ def get_session(session_id):
         "completed_at": session.completed_at.isoformat() if session.completed_at else None,
         "platforms": session.platforms,
         "categories": json.loads(session.categories) if session.categories else [],
+        "cache_only": bool(session.cache_only),
+        "delta": bool(session.delta),
         "error_message": session.error_message,
-        "results_count": len(results)
+        "results_count": counts['total'],
+        "severity_counts": {key: value for key, value in counts.items() if key != 'total'}
     }
     
-    results_data = [{
-        "id": result.id,
-        "dork": result.dork,
-        "platform": result.platform,
-        "category": result.category,
-        "result_url": result.result_url,
-        "snippet": result.snippet,
-        "severity": result.severity,
-        "is_false_positive": result.is_false_positive,
-        "notes": result.notes,
-        "timestamp": result.timestamp.isoformat()
-    } for result in results]
-    
-    return jsonify({"session": session_data, "results": results_data})
+    return jsonify({"session": session_data, "results": results_data, "next_cursor": next_cursor})
+
+# Result fields selectable through the fields argument of the result endpoints
+RESULT_FIELDS = ['id', 'scan_session_id', 'dork', 'platform', 'category', 'result_url',
+                 'snippet', 'severity', 'is_false_positive', 'notes', 'timestamp',
+                 'first_seen_session_id', 'delta_status', 'dorks', 'secret_rules']
+# Snippets can be large, so they are only returned when asked for
+DEFAULT_RESULT_FIELDS = [field for field in RESULT_FIELDS if field != 'snippet']
+
+def query_results(session_id):
+    """
+    Fetch one page of a session's results using the request arguments
+    
+    Supported arguments:
+        limit, cursor: keyset pagination over result IDs
+        severity, platform, category, delta_status: exact-match filters
+        false_positive: 'true' or 'false'
+        secrets: 'true' for results whose snippet matched a secret rule, 'false' for the rest
+        fields: comma-separated subset of RESULT_FIELDS
+        include_snippet: '1' or 'true' to add the snippet to the default fields
+    
+    Args:
+        session_id (int): Scan session ID
+        
+    Returns:
+        tuple: (list of result dictionaries, next page cursor or None)
+        
+    Raises:
+        ValueError: If an argument is invalid
+    """
+    args = request.args
+    limit = parse_limit(args.get('limit'))
+    
+    # Pick the projected columns; id is always needed for the cursor
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown result fields: {', '.join(unknown)}")
+    else:
+        fields = list(DEFAULT_RESULT_FIELDS)
+        if args.get('include_snippet', '').lower() in ('1', 'true', 'yes'):
+            fields.insert(fields.index('severity'), 'snippet')
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    
+    statement = select(*[getattr(Result, field) for field in fields]) \
+        .where(Result.scan_session_id == session_id) \
+        .order_by(Result.id) \
+        .limit(limit + 1)
+    
+    for field in ('severity', 'platform', 'category', 'delta_status'):
+        if args.get(field):
+            statement = statement.where(getattr(Result, field) == args[field])
+    if args.get('false_positive'):
+        statement = statement.where(Result.is_false_positive == (args['false_positive'].lower() in ('1', 'true', 'yes')))
+    if args.get('secrets'):
+        has_secrets = args['secrets'].lower() in ('1', 'true', 'yes')
+        statement = statement.where(Result.secret_rules.isnot(None) if has_secrets else Result.secret_rules.is_(None))
+    
+    if args.get('cursor'):
+        last_id, = decode_cursor(args['cursor'], 1)
+        if not isinstance(last_id, int):
+            raise CursorError(f"Invalid cursor: {args['cursor']}")
+        statement = statement.where(Result.id > last_id)
+    
+    rows = db.session.execute(statement).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    
+    results = []
+    for row in rows:
+        record = row._asdict()
+        if 'timestamp' in record:
+            record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+        if 'dorks' in record:
+            record['dorks'] = json.loads(record['dorks']) if record['dorks'] else None
+        if 'secret_rules' in record:
+            record['secret_rules'] = json.loads(record['secret_rules']) if record['secret_rules'] else []
+        results.append(record)
+    
+    return results, next_cursor
 
 @app.route('/api/sessions')
 def get_sessions():
-    """API endpoint to get all sessions"""
-    sessions = ScanSession.query.order_by(ScanSession.created_at.desc()).all()
+    """API endpoint to get scan sessions, newest first, one keyset page at a time"""
+    try:
+        sessions, next_cursor = paginate_sessions()
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    counts = get_session_counts([session.id for session in sessions])
     sessions_data = [{
         "id": session.id,
         "target": session.target,
@@ -311,60 +569,116 @@ def get_sessions():
         "created_at": session.created_at.isoformat(),
         "completed_at": session.completed_at.isoformat() if session.completed_at else None,
         "platforms": session.platforms,
-        "results_count": len(session.results)
+        "results_count": counts.get(session.id, EMPTY_COUNTS)['total']
     } for session in sessions]
     
-    return jsonify({"sessions": sessions_data})
+    return jsonify({"sessions": sessions_data, "next_cursor": next_cursor})
+
+# Columns written by the exports, in output order
+EXPORT_FIELDS = ['dork', 'platform', 'category', 'result_url', 'snippet', 'severity', 'is_false_positive', 'notes', 'timestamp',
+                 'first_seen_session_id', 'delta_status', 'dorks', 'secret_rules']
 
 @app.route('/api/export/session/<int:session_id>/<format>')
 def export_session(session_id, format):
-    """API endpoint to export session results"""
+    """API endpoint to export session results, streamed as they are read"""
     session = ScanSession.query.get_or_404(session_id)
-    results = Result.query.filter_by(scan_session_id=session_id).all()
     
     if format == 'json':
-        data = {
-            "session": {
-                "id": session.id,
-                "target": session.target,
-                "target_type": session.target_type,
-                "status": session.status,
-                "created_at": session.created_at.isoformat(),
-                "completed_at": session.completed_at.isoformat() if session.completed_at else None,
-                "platforms": session.platforms,
-                "categories": json.loads(session.categories) if session.categories else []
-            },
-            "results": [{
-                "dork": result.dork,
-                "platform": result.platform,
-                "category": result.category,
-                "result_url": result.result_url,
-                "snippet": result.snippet,
-                "severity": result.severity,
-                "is_false_positive": result.is_false_positive,
-                "notes": result.notes,
-                "timestamp": result.timestamp.isoformat()
-            } for result in results]
+        session_data = {
+            "id": session.id,
+            "target": session.target,
+            "target_type": session.target_type,
+            "status": session.status,
+            "created_at": session.created_at.isoformat(),
+            "completed_at": session.completed_at.isoformat() if session.completed_at else None,
+            "platforms": session.platforms,
+            "categories": json.loads(session.categories) if session.categories else []
         }
-        return jsonify(data)
+        return Response(stream_with_context(stream_json_export(session_id, session_data)),
+                        content_type='application/json')
+    
+    elif format == 'ndjson':
+        return Response(stream_with_context(stream_ndjson_export(session_id)), headers={
+            'Content-Type': 'application/x-ndjson',
+            'Content-Disposition': f'attachment; filename=dorkrecon_export_{session_id}.ndjson'
+        })
     
     elif format == 'csv':
-        # In a real app, this would generate and return a CSV file
-        # For this example, we'll return a simplified CSV structure as text
-        csv_content = "dork,platform,category,result_url,snippet,severity,is_false_positive,notes,timestamp\n"
-        for result in results:
-            # Escape commas and quotes in fields
-            safe_snippet = result.snippet.replace('"', '""') if result.snippet else ""
-            safe_notes = result.notes.replace('"', '""') if result.notes else ""
-            csv_content += f'"{result.dork}",{result.platform},{result.category},"{result.result_url}","{safe_snippet}",{result.severity},{result.is_false_positive},"{safe_notes}",{result.timestamp.isoformat()}\n'
-        
-        return csv_content, 200, {
+        return Response(stream_with_context(stream_csv_export(session_id)), headers={
             'Content-Type': 'text/csv',
             'Content-Disposition': f'attachment; filename=dorkrecon_export_{session_id}.csv'
-        }
+        })
     
     return jsonify({"error": "Unsupported export format"}), 400
 
+def iter_export_rows(session_id):
+    """
+    Yield export rows for a session from a server-side cursor
+    
+    Only the exported columns are selected and rows are fetched in batches of
+    config.EXPORT_FETCH_SIZE, so memory stays flat however large the session is.
+    
+    Yields:
+        dict: Result fields keyed by EXPORT_FIELDS
+    """
+    statement = select(*[getattr(Result, field) for field in EXPORT_FIELDS]) \
+        .where(Result.scan_session_id == session_id) \
+        .order_by(Result.id) \
+        .execution_options(stream_results=True, yield_per=config.EXPORT_FETCH_SIZE)
+    
+    for row in db.session.execute(statement):
+        record = row._asdict()
+        record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+        record['dorks'] = json.loads(record['dorks']) if record['dorks'] else [record['dork']]
+        record['secret_rules'] = json.loads(record['secret_rules']) if record['secret_rules'] else []
+        yield record
+
+def stream_csv_export(session_id):
+    """Generate a CSV export in chunks, quoting fields with the csv module"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    
+    for count, record in enumerate(iter_export_rows(session_id), 1):
+        record['dorks'] = ' | '.join(record['dorks'])
+        record['secret_rules'] = ' | '.join(record['secret_rules'])
+        writer.writerow([record[field] for field in EXPORT_FIELDS])
+        if count % config.EXPORT_FETCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+def stream_ndjson_export(session_id):
+    """Generate a newline-delimited JSON export, one result per line"""
+    chunk = []
+    for record in iter_export_rows(session_id):
+        chunk.append(json.dumps(record))
+        if len(chunk) >= config.EXPORT_FETCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+def stream_json_export(session_id, session_data):
+    """Generate a JSON export document without holding the results in memory"""
+    yield '{"session": ' + json.dumps(session_data) + ', "results": ['
+    
+    chunk = []
+    separator = ''
+    for record in iter_export_rows(session_id):
+        chunk.append(json.dumps(record))
+        if len(chunk) >= config.EXPORT_FETCH_SIZE:
+            yield separator + ', '.join(chunk)
+            separator = ', '
+            chunk = []
+    
+    if chunk:
+        yield separator + ', '.join(chunk)
+    yield ']}'
+
 @app.route('/api/categories')
 def get_categories():
     """API endpoint to get available dork categories"""
@@ -455,7 +769,7 @@ def get_dorks():
     category = request.args.get('category')
     
     dorks = dork_manager.get_dorks(platform, category)
-    return jsonify({"dorks": dorks})
+    return jsonify({"dorks": [dict(dork) for dork in dorks]})
 
 @app.route('/api/result/<int:result_id>/severity', methods=['PUT'])
 def update_result_severity(result_id):
@@ -498,12 +812,15 @@ def mark_false_positive(result_id):
 
 @app.route('/api/v1/scan/<int:session_id>/results')
 def api_get_results(session_id):
-    """API v1 endpoint to get results for a scan session"""
+    """API v1 endpoint to get one page of results for a scan session"""
     session = ScanSession.query.get_or_404(session_id)
-    results = Result.query.filter_by(scan_session_id=session_id).all()
     
-    # Convert results to dictionaries
-    result_dicts = [result.to_dict() for result in results]
+    try:
+        result_dicts, next_cursor = query_results(session_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    counts = get_session_counts([session_id]).get(session_id, EMPTY_COUNTS)
     
     return jsonify({
         "scan_id": session_id,
@@ -512,25 +829,25 @@ def api_get_results(session_id):
         "completed_at": session.completed_at.isoformat() if session.completed_at else None,
         "platforms": session.platforms,
         "status": session.status,
-        "result_count": len(result_dicts),
-        "results": result_dicts
+        "result_count": counts['total'],
+        "results": result_dicts,
+        "next_cursor": next_cursor
     })
 
 @app.route('/api/v1/scans')
 def api_get_scans():
-    """API v1 endpoint to get all scan sessions"""
-    sessions = ScanSession.query.order_by(ScanSession.created_at.desc()).all()
+    """API v1 endpoint to get scan sessions, newest first, one keyset page at a time"""
+    try:
+        sessions, next_cursor = paginate_sessions()
+    except CursorError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Count results by severity for the whole page in one query
+    counts = get_session_counts([session.id for session in sessions])
     
     session_data = []
     for session in sessions:
-        result_count = Result.query.filter_by(scan_session_id=session.id).count()
-        
-        # Count results by severity
-        high_count = Result.query.filter_by(scan_session_id=session.id, severity='high').count()
-        medium_count = Result.query.filter_by(scan_session_id=session.id, severity='medium').count()
-        low_count = Result.query.filter_by(scan_session_id=session.id, severity='low').count()
-        false_positive_count = Result.query.filter_by(scan_session_id=session.id, is_false_positive=True).count()
-        
+        session_counts = counts.get(session.id, EMPTY_COUNTS)
         session_data.append({
             "id": session.id,
             "target": session.target,
@@ -539,13 +856,158 @@ def api_get_scans():
             "created_at": session.created_at.isoformat(),
             "completed_at": session.completed_at.isoformat() if session.completed_at else None,
             "platforms": session.platforms,
-            "result_count": result_count,
+            "result_count": session_counts['total'],
             "severity_counts": {
-                "high": high_count,
-                "medium": medium_count,
-                "low": low_count,
-                "false_positive": false_positive_count
+                "high": session_counts['high'],
+                "medium": session_counts['medium'],
+                "low": session_counts['low'],
+                "false_positive": session_counts['false_positive']
             }
         })
     
-    return jsonify({"scans": session_data})
+    return jsonify({"scans": session_data, "next_cursor": next_cursor})
+
+@app.route('/api/v1/scan/<int:session_id>/profile')
+def api_get_profile(session_id):
+    """
+    API v1 endpoint reporting where a scan spends its time, stage by stage
+    
+    A scan running in this process reports its live profile; otherwise the
+    profile last stored on the session is returned.
+    """
+    session = ScanSession.query.get_or_404(session_id)
+    
+    live = registry.profile(session_id)
+    if live is not None:
+        profile = live.to_dict()
+    elif session.profile:
+        profile = json.loads(session.profile)
+    else:
+        return jsonify({"error": f"No profile recorded for scan {session_id}"}), 404
+    
+    return jsonify({
+        "scan_id": session_id,
+        "target": session.target,
+        "status": session.status,
+        "live": live is not None,
+        "profile": profile
+    })
+
+def refresh_stored_profiles():
+    """Update the /metrics stage sums with profiles stored since the last scrape"""
+    markers = {session_id: (status, completed_at) for session_id, status, completed_at in db.session.execute(
+        select(ScanSession.id, ScanSession.status, ScanSession.completed_at).where(ScanSession.profile.isnot(None)))}
+    
+    def load(session_ids):
+        profiles = {}
+        # Chunked to stay under the bound parameter limit
+        for start in range(0, len(session_ids), 500):
+            profiles.update(db.session.execute(select(ScanSession.id, ScanSession.profile)
+                                               .where(ScanSession.id.in_(session_ids[start:start + 500]))).all())
+        return profiles
+    
+    return stored_profiles.refresh(markers, load)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """
+    Prometheus endpoint with scan stage histograms and the shared scan pipeline counters
+    
+    Scans run in worker processes, so stage histograms are summed from the
+    profiles the scans store on their sessions rather than taken from this
+    process. A running scan's stages lag by up to SCAN_PROFILE_FLUSH_INTERVAL.
+    """
+    refresh_stored_profiles()
+    families = [('dorkrecon_scan_jobs', 'gauge', 'Scan jobs by status',
+                 [({'status': status}, count) for status, count in sorted(JobQueue().stats().items())])]
+    
+    cache = query_cache.stats()
+    if cache['enabled']:
+        families.append(('dorkrecon_query_cache_lookups_total', 'counter', 'Query cache lookups by outcome, across all processes',
+                         [({'outcome': 'memory_hit'}, cache['memory_hits']),
+                          ({'outcome': 'disk_hit'}, cache['disk_hits']),
+                          ({'outcome': 'miss'}, cache['misses'])]))
+    
+    writes = get_write_queue().stats()
+    if writes['mode'] == 'queue':
+        families += [
+            ('dorkrecon_sqlite_writes_total', 'counter', 'Writes committed by the SQLite writer thread', [({}, writes['writes'])]),
+            ('dorkrecon_sqlite_write_failures_total', 'counter', 'Writes the SQLite writer thread rolled back', [({}, writes['failed'])]),
+            ('dorkrecon_sqlite_write_transactions_total', 'counter', 'Transactions committed by the SQLite writer thread',
+             [({}, writes['transactions'])]),
+            ('dorkrecon_sqlite_write_queue_depth', 'gauge', 'Writes waiting for the SQLite writer thread', [({}, writes['queued'])])
+        ]
+    
+    return Response(stored_profiles.prometheus(families), mimetype='text/plain; version=0.0.4')
+
+EMPTY_COUNTS = {'total': 0, 'high': 0, 'medium': 0, 'low': 0, 'false_positive': 0}
+
+def paginate_sessions():
+    """
+    Fetch one page of scan sessions using the request's limit and cursor arguments
+    
+    Sessions are ordered by (created_at, id) descending, and the cursor holds the
+    keys of the last session on the previous page, so every page costs the same.
+    
+    Returns:
+        tuple: (list of ScanSession, next page cursor or None)
+        
+    Raises:
+        CursorError: If the cursor argument is malformed
+    """
+    limit = parse_limit(request.args.get('limit'))
+    query = ScanSession.query.order_by(ScanSession.created_at.desc(), ScanSession.id.desc())
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.datetime.fromisoformat(created_at)
+        except (TypeError, ValueError) as e:
+            raise CursorError(f"Invalid cursor: {cursor}") from e
+        if not isinstance(last_id, int):
+            raise CursorError(f"Invalid cursor: {cursor}")
+        query = query.filter(or_(
+            ScanSession.created_at < created_at,
+            and_(ScanSession.created_at == created_at, ScanSession.id < last_id)
+        ))
+    
+    # Fetch one extra row to learn whether another page exists
+    sessions = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), last.id)
+    
+    return sessions, next_cursor
+
+def get_session_counts(session_ids):
+    """
+    Count results per session and severity with a single grouped query
+    
+    Args:
+        session_ids (list): IDs of the sessions to count
+        
+    Returns:
+        dict: Mapping of session ID to total, high, medium, low and false_positive counts
+    """
+    if not session_ids:
+        return {}
+    
+    rows = db.session.query(
+        Result.scan_session_id,
+        func.count(Result.id),
+        func.sum(case((Result.severity == 'high', 1), else_=0)),
+        func.sum(case((Result.severity == 'medium', 1), else_=0)),
+        func.sum(case((Result.severity == 'low', 1), else_=0)),
+        func.sum(case((Result.is_false_positive == True, 1), else_=0))
+    ).filter(Result.scan_session_id.in_(session_ids)).group_by(Result.scan_session_id).all()
+    
+    return {row[0]: {
+        'total': row[1],
+        'high': row[2] or 0,
+        'medium': row[3] or 0,
+        'low': row[4] or 0,
+        'false_positive': row[5] or 0
+    } for row in rows}
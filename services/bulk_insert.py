@@ -0,0 +1,120 @@
+import io
+import logging
+import datetime
+from sqlalchemy import insert
+import config
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL drivers whose cursors can stream COPY data
+COPY_DRIVERS = ('psycopg2', 'psycopg')
+
+# Lines handed to the driver at a time
+COPY_CHUNK_LINES = 1000
+
+def copy_text(text):
+    """Escape the characters with a meaning in COPY's text format"""
+    # Chained replace() is several times faster than str.translate() here
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def copy_value(value):
+    """
+    Format a value as a field of COPY's text format
+
+    Args:
+        value: Column value
+
+    Returns:
+        str: The field, with \\N for NULL
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return copy_text(value)
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    return copy_text(str(value))
+
+class BulkInserter:
+    """
+    Inserts batches of rows into one table, through COPY on PostgreSQL
+
+    On PostgreSQL a batch is streamed to the server with COPY ... FROM STDIN,
+    which skips per-row statement parsing and parameter binding. Other
+    databases get a regular executemany INSERT. Both paths fill in the
+    Python-side column defaults the rows leave out. COPY has no ON CONFLICT
+    clause, so one duplicate key aborts the whole batch: only use it for
+    tables whose rows cannot collide with rows written by other scans.
+    """
+
+    def __init__(self, table, use_copy=None):
+        self.table = getattr(table, '__table__', table)
+        self.use_copy = config.RESULT_COPY_ENABLED if use_copy is None else use_copy
+
+    def method(self, connection):
+        """
+        Name the path a batch takes on a connection
+
+        Args:
+            connection (Connection): SQLAlchemy connection
+
+        Returns:
+            str: 'copy' or 'executemany'
+        """
+        dialect = connection.dialect
+        if self.use_copy and dialect.name == 'postgresql' and dialect.driver in COPY_DRIVERS:
+            return 'copy'
+        return 'executemany'
+
+    def insert(self, connection, rows):
+        """
+        Insert rows in the connection's current transaction
+
+        Args:
+            connection (Connection): SQLAlchemy connection
+            rows (list): Row dictionaries keyed by column, all with the same keys
+
+        Returns:
+            int: Number of rows inserted
+        """
+        if not rows:
+            return 0
+        if self.method(connection) == 'copy':
+            self._copy(connection, rows)
+        else:
+            connection.execute(insert(self.table), rows)
+        return len(rows)
+
+    def _copy(self, connection, rows):
+        columns = [column for column in self.table.columns if column.key in rows[0]]
+        # Defaults are computed once per batch, like a server-side DEFAULT now()
+        defaults = [(column, column.default.arg(None) if column.default.is_callable else column.default.arg)
+                    for column in self.table.columns
+                    if column.key not in rows[0] and column.default is not None and not column.default.is_sequence]
+        suffix = ''.join('\t' + copy_value(value) for _, value in defaults)
+
+        preparer = connection.dialect.identifier_preparer
+        names = ', '.join(preparer.quote(column.name) for column in columns + [column for column, _ in defaults])
+        sql = f"COPY {preparer.format_table(self.table)} ({names}) FROM STDIN"
+        keys = [column.key for column in columns]
+
+        cursor = connection.connection.cursor()
+        try:
+            if connection.dialect.driver == 'psycopg2':
+                cursor.copy_expert(sql, io.StringIO(''.join(self._lines(rows, keys, suffix))))
+            else:
+                with cursor.copy(sql) as copy:
+                    for start in range(0, len(rows), COPY_CHUNK_LINES):
+                        copy.write(''.join(self._lines(rows[start:start + COPY_CHUNK_LINES], keys, suffix)))
+        finally:
+            cursor.close()
+
+    def _lines(self, rows, keys, suffix):
+        for row in rows:
+            # Text columns dominate, so strings skip copy_value's type checks
+            yield '\t'.join([copy_text(value) if type(value) is str else copy_value(value)
+                              for value in map(row.get, keys)]) + suffix + '\n'
@@ -1,24 +1,136 @@
 import json
 import logging
 import os
+import threading
+from types import MappingProxyType
+from sqlalchemy import func, select
 from app import db
 from models import Dork
+from services.dork_template import CompiledBatch, TemplateError, compile_template
+from services.scan_metrics import span
 
 logger = logging.getLogger(__name__)
 
+PLATFORMS = ('google', 'github')
+
+class DorkCatalogue:
+    """Immutable in-memory index of dork templates by platform and category"""
+    
+    def __init__(self, version, dork_objects, stamp=None):
+        self.version = version
+        self.stamp = stamp  # dork table stamp when loaded, see DorkManager.database_stamp()
+        
+        by_category = {platform: {} for platform in PLATFORMS}
+        compiled = {platform: {} for platform in PLATFORMS}
+        for dork in dork_objects:
+            # Templates are parsed once here; invalid ones never reach a scan
+            try:
+                compiled_template = compile_template(dork.template)
+            except TemplateError as e:
+                logger.error(f"Skipping dork {dork.id}: {str(e)}")
+                continue
+            
+            entry = MappingProxyType({
+                'platform': dork.platform,
+                'category': dork.category,
+                'template': dork.template
+            })
+            by_category.setdefault(dork.platform, {}).setdefault(dork.category, []).append(entry)
+            compiled.setdefault(dork.platform, {}).setdefault(dork.category, []).append((dork.category, compiled_template))
+        
+        # Freeze the index: platform -> category -> tuple of read-only dork mappings
+        self.by_category = MappingProxyType({
+            platform: MappingProxyType({category: tuple(dorks) for category, dorks in categories.items()})
+            for platform, categories in by_category.items()
+        })
+        # Compiled templates batched per platform/category for one-pass rendering
+        self.compiled = MappingProxyType({
+            platform: MappingProxyType({category: CompiledBatch.from_entries(entries) for category, entries in categories.items()})
+            for platform, categories in compiled.items()
+        })
+        self.all_compiled = MappingProxyType({
+            platform: CompiledBatch.from_entries(entry for entries in categories.values() for entry in entries)
+            for platform, categories in compiled.items()
+        })
+        self.all_dorks = MappingProxyType({
+            platform: tuple(dork for dorks in categories.values() for dork in dorks)
+            for platform, categories in self.by_category.items()
+        })
+        self.categories = MappingProxyType({
+            platform: tuple(sorted(categories)) for platform, categories in self.by_category.items()
+        })
+        self.all_categories = tuple(sorted({category for categories in self.categories.values() for category in categories}))
+
 class DorkManager:
-    """Class to manage dork templates"""
+    """
+    Class to manage dork templates
+    
+    The catalogue is cached per process. add_dork() invalidates it in the
+    process that added the dork; scan workers pick the change up through
+    refresh(), which compares the dork table's stamp when a scan starts.
+    """
+    
+    # Process-wide catalogue cache, rebuilt whenever the version counter moves
+    _catalogue = None
+    _version = 0
+    _lock = threading.Lock()
     
     def __init__(self):
-        self.dorks = None
-        self._load_dorks()
+        self.dorks = self._get_catalogue()
+    
+    @classmethod
+    def invalidate(cls):
+        """Invalidate the cached catalogue so the next read reloads it from the database"""
+        with cls._lock:
+            cls._version += 1
+    
+    @staticmethod
+    def database_stamp():
+        """
+        Cheap fingerprint of the dork table
+        
+        Dorks are only ever inserted, so the row count and highest ID change
+        whenever the catalogue does.
+        
+        Returns:
+            tuple: (row count, highest dork ID)
+        """
+        return tuple(db.session.execute(select(func.count(Dork.id), func.max(Dork.id))).one())
+    
+    @classmethod
+    def refresh(cls):
+        """Invalidate the cached catalogue if another process changed the dork table since it was loaded"""
+        catalogue = cls._catalogue
+        if catalogue is not None and catalogue.stamp != cls.database_stamp():
+            logger.info("Dork table changed in another process; reloading the catalogue")
+            cls.invalidate()
+    
+    def _get_catalogue(self):
+        """Return the cached catalogue, loading it if missing or stale"""
+        catalogue = DorkManager._catalogue
+        if catalogue is not None and catalogue.version == DorkManager._version:
+            return catalogue
+        
+        with DorkManager._lock:
+            catalogue = DorkManager._catalogue
+            if catalogue is None or catalogue.version != DorkManager._version:
+                catalogue = self._load_dorks(DorkManager._version)
+                DorkManager._catalogue = catalogue
+            return catalogue
     
-    def _load_dorks(self):
+    def _load_dorks(self, version):
         """Load dork templates from database or initialize from JSON file"""
         # Check if dorks are already in the database
         if Dork.query.count() == 0:
             self._initialize_dorks_from_file()
         
+        # Stamped before reading, so a dork added meanwhile triggers another reload rather than being missed
+        stamp = self.database_stamp()
+        catalogue = DorkCatalogue(version, Dork.query.order_by(Dork.id).all(), stamp)
+        logger.info(f"Loaded dork catalogue version {version} with "
+                    f"{sum(len(dorks) for dorks in catalogue.all_dorks.values())} dorks")
+        return catalogue
+        
     def _initialize_dorks_from_file(self):
         """Initialize dork database from JSON file"""
         try:
@@ -98,42 +210,62 @@ class DorkManager:
     
     def get_dorks(self, platform='both', categories=None):
         """
-        Get dorks from database
+        Get dorks from the cached catalogue
         
         Args:
             platform (str): 'google', 'github', or 'both'
             categories (list): List of categories to filter. If None, all categories will be returned.
             
         Returns:
-            list: List of dork dictionaries
+            tuple: Tuple of read-only dork mappings
         """
-        query = Dork.query
+        catalogue = self._get_catalogue()
+        platforms = PLATFORMS if platform == 'both' else (platform,)
         
-        # Filter by platform
-        if platform != 'both':
-            query = query.filter_by(platform=platform)
+        if not categories:
+            return sum((catalogue.all_dorks.get(p, ()) for p in platforms), ())
         
-        # Filter by categories
-        if categories and len(categories) > 0:
-            query = query.filter(Dork.category.in_(categories))
+        if isinstance(categories, str):
+            categories = (categories,)
         
-        # Get dorks from database
-        dork_objects = query.all()
+        dorks = ()
+        for p in platforms:
+            by_category = catalogue.by_category.get(p, {})
+            for category in categories:
+                dorks += by_category.get(category, ())
+        return dorks
+    
+    def render_dorks(self, platform, categories, values, suffix=''):
+        """
+        Render the catalogue's compiled templates against a target in one pass
         
-        # Convert to dictionaries
-        dorks = []
-        for dork in dork_objects:
-            dorks.append({
-                'platform': dork.platform,
-                'category': dork.category,
-                'template': dork.template
-            })
+        Args:
+            platform (str): 'google' or 'github'
+            categories (list): List of categories to filter. If None, all categories will be rendered.
+            values (dict): Mapping of placeholder name (e.g. 'DOMAIN', 'ORG') to replacement text
+            suffix (str): Text appended to every rendered query
+            
+        Returns:
+            list: List of RenderedDork records
+        """
+        catalogue = self._get_catalogue()
         
-        return dorks
+        if not categories:
+            batch = catalogue.all_compiled.get(platform, CompiledBatch())
+        else:
+            if isinstance(categories, str):
+                categories = (categories,)
+            by_category = catalogue.compiled.get(platform, {})
+            batch = CompiledBatch()
+            for category in categories:
+                batch += by_category.get(category, CompiledBatch())
+        
+        with span('render', platform):
+            return batch.render(platform, values, suffix)
     
     def get_categories(self, platform='both'):
         """
-        Get unique categories from database
+        Get unique categories from the cached catalogue
         
         Args:
             platform (str): 'google', 'github', or 'both'
@@ -141,15 +273,10 @@ class DorkManager:
         Returns:
             list: List of unique categories
         """
-        query = db.session.query(Dork.category).distinct()
-        
-        # Filter by platform
-        if platform != 'both':
-            query = query.filter_by(platform=platform)
-        
-        # Get categories
-        categories = [row[0] for row in query.all()]
-        return sorted(categories)
+        catalogue = self._get_catalogue()
+        if platform == 'both':
+            return list(catalogue.all_categories)
+        return list(catalogue.categories.get(platform, ()))
     
     def add_dork(self, platform, category, template):
         """
@@ -162,7 +289,13 @@ class DorkManager:
             
         Returns:
             Dork: The newly created dork object
+            
+        Raises:
+            TemplateError: If the template uses an unknown placeholder
         """
+        # Reject bad templates before they are stored
+        compile_template(template)
+        
         new_dork = Dork(
             platform=platform,
             category=category,
@@ -170,4 +303,7 @@ class DorkManager:
         )
         db.session.add(new_dork)
         db.session.commit()
+        
+        # Bump the catalogue version so every manager reloads on next read
+        self.invalidate()
         return new_dork
@@ -0,0 +1,156 @@
+import re
+from functools import lru_cache
+from itertools import repeat
+from typing import NamedTuple
+import config
+
+# Matches {{NAME}} placeholders, tolerating inner whitespace
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([^{}]*?)\s*\}\}')
+
+# Separates templates inside a batch; rejected in templates and target values
+SEPARATOR = '\x00'
+
+class TemplateError(ValueError):
+    """Raised when a dork template is malformed or references an unknown placeholder"""
+
+class RenderedDork(NamedTuple):
+    """Compact record of a dork rendered against a target"""
+    platform: str
+    category: str
+    template: str
+
+class CompiledTemplate:
+    """Dork template parsed once into literal and placeholder segments"""
+
+    __slots__ = ('source', 'segments', 'placeholders', 'canonical')
+
+    def __init__(self, source):
+        if SEPARATOR in source:
+            raise TemplateError(f"Dork template contains a NUL character: {source!r}")
+        self.source = source
+
+        segments = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            name = match.group(1)
+            if name not in config.DORK_PLACEHOLDERS:
+                raise TemplateError(f"Unknown placeholder '{{{{{name}}}}}' in dork template: {source}")
+            if match.start() > position:
+                segments.append((False, source[position:match.start()]))
+            segments.append((True, name))
+            position = match.end()
+        if position < len(source):
+            segments.append((False, source[position:]))
+
+        # Segments are (is_placeholder, text) pairs in template order
+        self.segments = tuple(segments)
+        self.placeholders = frozenset(text for is_placeholder, text in self.segments if is_placeholder)
+        # Source with placeholders normalized to {{NAME}}, used for batch rendering
+        self.canonical = ''.join('{{' + text + '}}' if is_placeholder else text
+                                 for is_placeholder, text in self.segments)
+
+    def render(self, values):
+        """
+        Render the template with the given placeholder values
+
+        Args:
+            values (dict): Mapping of placeholder name to replacement text
+
+        Returns:
+            str: Rendered dork query. Placeholders without a value are left as is.
+        """
+        return ''.join(values.get(text, '{{' + text + '}}') if is_placeholder else text
+                       for is_placeholder, text in self.segments)
+
+class CompiledBatch:
+    """
+    Sequence of compiled templates that render against a target in one pass
+
+    The canonical templates are joined into a single string, so rendering a
+    whole catalogue is one substitution pass and one split, instead of a
+    copy and a replace per dork. Substituted values are never scanned
+    again, so a target containing a placeholder token stays literal.
+    """
+
+    __slots__ = ('categories', 'source')
+
+    def __init__(self, categories=(), source=''):
+        self.categories = tuple(categories)
+        self.source = source
+
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        Build a batch from (category, CompiledTemplate) pairs
+
+        Args:
+            entries (iterable): (category, CompiledTemplate) pairs
+
+        Returns:
+            CompiledBatch: The batch
+        """
+        entries = list(entries)
+        return cls([category for category, _ in entries],
+                   SEPARATOR.join(compiled.canonical for _, compiled in entries))
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __add__(self, other):
+        if not other.categories:
+            return self
+        if not self.categories:
+            return other
+        return CompiledBatch(self.categories + other.categories, self.source + SEPARATOR + other.source)
+
+    def render(self, platform, values, suffix=''):
+        """
+        Render every template in the batch against one target
+
+        Args:
+            platform (str): 'google' or 'github'
+            values (dict): Mapping of placeholder name to replacement text
+            suffix (str): Text appended to every rendered query
+
+        Returns:
+            list: List of RenderedDork records
+        """
+        if not self.categories:
+            return []
+
+        for name, value in values.items():
+            if SEPARATOR in value:
+                raise ValueError(f"Value for placeholder {name} contains a NUL character")
+        replacements = {'{{' + name + '}}': value for name, value in values.items()}
+        text = self.source
+        if len(replacements) == 1:
+            # One str.replace() never rescans what it inserted, and is the fastest single pass
+            (token, value), = replacements.items()
+            text = text.replace(token, value)
+        elif replacements:
+            text = _placeholder_pattern(tuple(replacements)).sub(lambda match: replacements[match.group(0)], text)
+        if suffix:
+            text = text.replace(SEPARATOR, suffix + SEPARATOR) + suffix
+
+        return list(map(tuple.__new__, repeat(RenderedDork),
+                        zip(repeat(platform), self.categories, text.split(SEPARATOR))))
+
+@lru_cache(maxsize=32)
+def _placeholder_pattern(tokens):
+    """Regex matching any of the given canonical {{NAME}} tokens"""
+    return re.compile('|'.join(map(re.escape, tokens)))
+
+def compile_template(template):
+    """
+    Compile a dork template, validating its placeholders
+
+    Args:
+        template (str): Dork template string
+
+    Returns:
+        CompiledTemplate: The compiled template
+
+    Raises:
+        TemplateError: If the template uses a placeholder not listed in config.DORK_PLACEHOLDERS
+    """
+    return CompiledTemplate(template)
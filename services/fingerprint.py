@@ -0,0 +1,114 @@
+import hashlib
+import logging
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import select
+from app import db
+from models import ResultFingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """
+    Normalize a result URL so equivalent spellings compare equal
+
+    Lowercases the scheme and host, drops default ports, fragments and a
+    trailing slash, and sorts query parameters.
+
+    Args:
+        url (str): Result URL
+
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def url_hash(url):
+    """SHA-1 hex digest of the normalized URL"""
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+
+def snippet_hash(snippet):
+    """SHA-1 hex digest of the snippet with whitespace collapsed"""
+    return hashlib.sha1(' '.join((snippet or '').split()).encode('utf-8')).hexdigest()
+
+class FingerprintIndex:
+    """
+    Fingerprints of every finding seen on a target, loaded once per scan
+
+    A finding is identified by its platform and normalized URL; a different
+    snippet hash at the same URL means the finding changed. Lookups are
+    dictionary reads. Index changes are returned to the caller, which writes
+    them in the same transaction as the results they describe.
+    """
+
+    def __init__(self, target):
+        self.target = target.lower()
+        # (platform, url hash) -> [snippet hash, first-seen session ID]
+        self.seen = {}
+
+    def load(self):
+        """
+        Load the target's fingerprints from the database
+
+        Returns:
+            FingerprintIndex: This index
+        """
+        rows = db.session.execute(select(
+            ResultFingerprint.platform,
+            ResultFingerprint.url_hash,
+            ResultFingerprint.snippet_hash,
+            ResultFingerprint.first_seen_session_id
+        ).where(ResultFingerprint.target == self.target))
+        self.seen = {(platform, url): [snippet, first_seen] for platform, url, snippet, first_seen in rows}
+        logger.info(f"Loaded {len(self.seen)} fingerprints for {self.target}")
+        return self
+
+    def observe(self, session_id, platform, result, url_digest=None):
+        """
+        Classify a result against the index and record it
+
+        Args:
+            session_id (int): Scan session the result belongs to
+            platform (str): 'google' or 'github'
+            result (dict): Result dictionary produced by a dorker
+            url_digest (str): url_hash() of the result URL, if already computed
+
+        Returns:
+            tuple: (status, first-seen session ID, change), where status is 'new',
+                'changed' or 'unchanged' and change is the fingerprint row to
+                insert or update, or None
+        """
+        key = (platform, url_digest or url_hash(result['url']))
+        digest = snippet_hash(result['snippet'])
+        entry = self.seen.get(key)
+
+        if entry is None:
+            self.seen[key] = [digest, session_id]
+            return 'new', session_id, ('insert', {
+                'target': self.target,
+                'platform': platform,
+                'url_hash': key[1],
+                'snippet_hash': digest,
+                'first_seen_session_id': session_id,
+                'changed_session_id': session_id
+            })
+
+        if entry[0] != digest:
+            entry[0] = digest
+            return 'changed', entry[1], ('update', {
+                'b_target': self.target,
+                'b_platform': platform,
+                'b_url_hash': key[1],
+                'snippet_hash': digest,
+                'changed_session_id': session_id
+            })
+
+        return 'unchanged', entry[1], None
@@ -0,0 +1,359 @@
+import time
+import asyncio
+import logging
+import datetime
+import threading
+import aiohttp
+from sqlalchemy import bindparam, update
+from models import GithubToken
+from services.write_queue import get_write_queue
+import config
+
+logger = logging.getLogger(__name__)
+
+# Asks GitHub to include the matching fragments of each file
+TEXT_MATCH_MEDIA_TYPE = "application/vnd.github.text-match+json"
+
+class GithubSearchError(Exception):
+    """Raised when GitHub answers a code search with an error"""
+
+def _from_timestamp(timestamp):
+    """Naive UTC datetime, as stored by the models, from epoch seconds"""
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).replace(tzinfo=None)
+
+class TokenBudget:
+    """
+    Code-search budget of one GitHub token
+
+    Requests are spaced window / limit seconds apart, so a token never bursts
+    past GitHub's documented limit. The X-RateLimit headers of each response
+    correct the local count, which also accounts for requests sent with the
+    same token by other processes.
+    """
+
+    def __init__(self, token, token_id=None, remaining=None, reset_at=None, limit=None, window=None):
+        self.token = token
+        self.token_id = token_id  # GithubToken row, or None for GITHUB_TOKEN from the environment
+        self.limit = limit or config.GITHUB_CODE_SEARCH_LIMIT
+        self.window = window or config.GITHUB_CODE_SEARCH_WINDOW
+        self.interval = self.window / self.limit
+        self.remaining = self.limit if remaining is None else min(remaining, self.limit)
+        self.reset_at = reset_at or 0.0  # epoch second the current window ends, 0 if unknown
+        self.next_slot = 0.0  # earliest epoch second of the next request
+        self.blocked_until = 0.0  # set by secondary rate limits (Retry-After)
+        self.in_flight = 0
+        self.disabled = False  # rejected by GitHub as invalid
+        self.requests = 0
+        self.last_used = None
+        self.dirty = False  # changed since the last write-back
+
+    def available_at(self, now):
+        """Epoch second this token may send its next request"""
+        start = self.reset_at if self.remaining <= 0 and self.reset_at > now else now
+        return max(start, self.next_slot, self.blocked_until)
+
+    def reserve(self, now):
+        """Spend one request of the budget; the caller checked available_at()"""
+        if self.remaining <= 0:
+            # The window has ended, so the budget is full again
+            self.remaining = self.limit - self.in_flight
+        self.remaining -= 1
+        self.in_flight += 1
+        self.next_slot = max(self.next_slot, now) + self.interval
+        self.requests += 1
+        self.last_used = now
+        self.dirty = True
+
+    def observe(self, status, headers, now):
+        """Update the budget from a response, or from a failed request if status is None"""
+        self.in_flight -= 1
+        if status == 401:
+            self.disabled = True
+            logger.warning(f"GitHub rejected token {self.token_id or 'GITHUB_TOKEN'}; it is no longer scheduled")
+            return
+
+        retry_after = headers.get('Retry-After')
+        if status in (403, 429) and retry_after:
+            self.blocked_until = now + float(retry_after)
+
+        limit = headers.get('X-RateLimit-Limit')
+        if limit and int(limit) < self.limit:
+            self.limit = int(limit)
+            self.interval = self.window / self.limit
+
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        remaining, reset = int(remaining), float(reset)
+        if reset > self.reset_at:
+            # First response of a new window
+            self.reset_at = reset
+            self.remaining = remaining - self.in_flight
+        else:
+            self.remaining = min(self.remaining, remaining - self.in_flight)
+
+class TokenPool:
+    """
+    Schedules code searches across the configured GitHub tokens
+
+    Each search goes to the token that can send soonest, preferring the one
+    with the most budget left. Budgets live in memory and are written back to
+    GithubToken in one batched UPDATE at most every GITHUB_TOKEN_FLUSH_INTERVAL.
+    """
+
+    def __init__(self, budgets=None):
+        self.budgets = {budget.token: budget for budget in budgets or []}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def __len__(self):
+        return sum(1 for budget in self.budgets.values() if not budget.disabled)
+
+    def load(self):
+        """
+        Sync the pool with the active GithubToken rows and GITHUB_TOKEN
+
+        Budgets of tokens already in the pool are kept.
+
+        Returns:
+            TokenPool: This pool
+        """
+        rows = GithubToken.query.filter_by(is_active=True).all()
+        now = time.time()
+        with self.lock:
+            budgets = {}
+            for row in rows:
+                budget = self.budgets.get(row.token)
+                if budget is None:
+                    reset_at = row.rate_limit_reset.replace(tzinfo=datetime.timezone.utc).timestamp() \
+                        if row.rate_limit_reset else 0.0
+                    # A stored budget only applies until its window ends
+                    remaining = row.rate_limit_remaining if reset_at > now else None
+                    budget = TokenBudget(row.token, row.id, remaining, reset_at)
+                budgets[row.token] = budget
+            if config.GITHUB_DEFAULT_TOKEN and config.GITHUB_DEFAULT_TOKEN not in budgets:
+                budgets[config.GITHUB_DEFAULT_TOKEN] = self.budgets.get(config.GITHUB_DEFAULT_TOKEN) \
+                    or TokenBudget(config.GITHUB_DEFAULT_TOKEN)
+            self.budgets = budgets
+        return self
+
+    async def acquire(self):
+        """
+        Wait for the token that can send soonest and spend one request of it
+
+        Returns:
+            TokenBudget: Budget of the token to send with
+
+        Raises:
+            GithubSearchError: If no usable token is configured
+        """
+        while True:
+            now = time.time()
+            with self.lock:
+                usable = [budget for budget in self.budgets.values() if not budget.disabled]
+                if not usable:
+                    raise GithubSearchError("No usable GitHub tokens are configured")
+                budget = min(usable, key=lambda budget: (budget.available_at(now), -budget.remaining))
+                start = budget.available_at(now)
+                if start <= now:
+                    budget.reserve(now)
+                    return budget
+            await asyncio.sleep(start - now)
+
+    def release(self, budget, status, headers):
+        """
+        Record the response to a request sent with `budget`
+
+        Args:
+            budget (TokenBudget): Budget returned by acquire()
+            status (int): HTTP status, or None if the request failed
+            headers (Mapping): Response headers
+        """
+        with self.lock:
+            budget.observe(status, headers, time.time())
+
+    def flush(self):
+        """
+        Write changed budgets back to their GithubToken rows
+
+        Returns:
+            int: Number of tokens written
+        """
+        with self.lock:
+            rows = [{
+                'b_id': budget.token_id,
+                'rate_limit_remaining': max(budget.remaining, 0),
+                'rate_limit_reset': _from_timestamp(budget.reset_at) if budget.reset_at else None,
+                'last_used': _from_timestamp(budget.last_used)
+            } for budget in self.budgets.values() if budget.dirty and budget.token_id is not None]
+            for budget in self.budgets.values():
+                budget.dirty = False
+            self.last_flush = time.monotonic()
+        if not rows:
+            return 0
+
+        try:
+            get_write_queue().run(lambda connection: connection.execute(
+                update(GithubToken).where(GithubToken.id == bindparam('b_id')), rows))
+        except Exception as e:
+            # Budgets are only advisory in the database; the next flush writes them again
+            logger.warning(f"Error writing back GitHub token budgets: {str(e)}")
+            return 0
+        return len(rows)
+
+    def flush_due(self):
+        """Flush if GITHUB_TOKEN_FLUSH_INTERVAL has elapsed since the last write-back"""
+        if time.monotonic() - self.last_flush >= config.GITHUB_TOKEN_FLUSH_INTERVAL:
+            return self.flush()
+        return 0
+
+    def stats(self):
+        """
+        Budget of every token in the pool
+
+        Returns:
+            list: One dictionary per token, without the token itself
+        """
+        with self.lock:
+            return [{
+                'token_id': budget.token_id,
+                'requests': budget.requests,
+                'remaining': budget.remaining,
+                'reset_at': budget.reset_at,
+                'disabled': budget.disabled
+            } for budget in self.budgets.values()]
+
+class GithubSearchClient:
+    """
+    Asynchronous GitHub code search over one pooled HTTP session
+
+    Requests are scheduled on a TokenPool. Rate-limited responses (403 or 429)
+    and failed connections are retried up to GITHUB_MAX_RETRIES times, on
+    whichever token the pool picks next.
+    """
+
+    def __init__(self, pool, base_url=None, max_connections=None, per_page=None, timeout=None):
+        self.pool = pool
+        self.base_url = (base_url or config.GITHUB_API_BASE_URL).rstrip('/')
+        self.max_connections = max_connections or config.GITHUB_MAX_CONNECTIONS
+        self.per_page = per_page or config.GITHUB_SEARCH_PER_PAGE
+        self.timeout = timeout or config.GITHUB_REQUEST_TIMEOUT
+        self.session = None
+
+    async def open(self):
+        """Open the pooled HTTP session; must run on the loop that will use it"""
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=dict(config.GITHUB_DEFAULT_HEADERS, Accept=TEXT_MATCH_MEDIA_TYPE)
+        )
+        return self
+
+    async def close(self):
+        """Close the HTTP session and its connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def search_code(self, query, page=1):
+        """
+        Run one code search
+
+        Args:
+            query (str): Rendered dork query
+            page (int): Result page
+
+        Returns:
+            list: Dictionaries with the 'url' and 'snippet' of each matching file
+
+        Raises:
+            GithubSearchError: If GitHub keeps answering with an error
+        """
+        params = {'q': query, 'per_page': self.per_page, 'page': page}
+        error = None
+        for attempt in range(config.GITHUB_MAX_RETRIES + 1):
+            budget = await self.pool.acquire()
+            status, headers, payload = None, {}, None
+            try:
+                async with self.session.get(f"{self.base_url}/search/code", params=params,
+                                            headers={'Authorization': f"Bearer {budget.token}"}) as response:
+                    status, headers = response.status, response.headers
+                    payload = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                error = e
+                logger.warning(f"GitHub code search failed (attempt {attempt + 1}): {str(e)}")
+                continue
+            finally:
+                self.pool.release(budget, status, headers)
+
+            if status == 200:
+                return [self._to_result(item) for item in payload.get('items', [])]
+
+            message = payload.get('message') if isinstance(payload, dict) else None
+            if status == 422:
+                # The query itself is invalid; retrying cannot help
+                logger.warning(f"GitHub rejected query {query!r}: {message}")
+                return []
+            error = GithubSearchError(f"GitHub code search returned {status}: {message}")
+            if status not in (401, 403, 429) and status < 500:
+                raise error
+
+        raise GithubSearchError(f"GitHub code search failed after {config.GITHUB_MAX_RETRIES + 1} attempts: {error}")
+
+    @staticmethod
+    def _to_result(item):
+        """Convert a code search item to a result dictionary"""
+        fragments = [match['fragment'] for match in item.get('text_matches', []) if match.get('fragment')]
+        return {
+            'url': item['html_url'],
+            'snippet': '\n...\n'.join(fragments) or item.get('path', '')
+        }
+
+class BlockingGithubClient:
+    """Runs a GithubSearchClient on a private event loop for the scan executor's threads"""
+
+    def __init__(self, pool, **options):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='github-client', daemon=True)
+        self.thread.start()
+        self.client = GithubSearchClient(pool, **options)
+        self._call(self.client.open())
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def search_code(self, query, page=1):
+        """Blocking GithubSearchClient.search_code()"""
+        return self._call(self.client.search_code(query, page))
+
+    def close(self):
+        """Close the session and stop the event loop"""
+        self._call(self.client.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+# Process-wide token budgets, shared by every scan so tokens are never over-scheduled
+token_pool = TokenPool()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_github_client():
+    """
+    Process-wide blocking client, started on first use
+
+    Returns:
+        BlockingGithubClient: Client scheduling on token_pool
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BlockingGithubClient(token_pool)
+        return _client
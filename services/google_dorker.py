@@ -1,23 +1,20 @@
 import logging
-import time
-import random
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from app import db
-from models import ProxyServer
-from services.rate_limiter import RateLimiter
+from services.pacer import Pacer
 from services.proxy_manager import ProxyManager
 from services.dork_manager import DorkManager
-import config
+from services.query_cache import query_cache
+from services.search_backend import get_search_backend
+from services.scan_metrics import span
 
 logger = logging.getLogger(__name__)
 
 class GoogleDorker:
     """Class to handle Google dorking operations"""
     
-    def __init__(self, progress_callback=None):
-        self.rate_limiter = RateLimiter("google")
+    def __init__(self, progress_callback=None, cache_only=False, backend=None):
+        self.cache_only = cache_only  # answer from the query cache only, never searching
+        self.backend = backend or get_search_backend('google')
+        self.pacer = Pacer("google")
         self.proxy_manager = ProxyManager()
         self.dork_manager = DorkManager()
         self.progress_callback = progress_callback
@@ -36,76 +33,59 @@ class GoogleDorker:
         logger.info(f"Starting Google dork search for domain: {domain}")
         results = []
         
-        # Get dorks for Google platform
-        dorks = self.dork_manager.get_dorks('google', categories)
-        
-        # Replace {{DOMAIN}} placeholder in dork templates
-        processed_dorks = []
-        for dork in dorks:
-            processed_dork = dork.copy()
-            processed_dork['template'] = processed_dork['template'].replace('{{DOMAIN}}', domain)
-            processed_dorks.append(processed_dork)
-        
         # Execute searches
-        for dork in processed_dorks:
-            # Wait for rate limiting
-            self.rate_limiter.wait_blocking()
-            
-            # Generate example results (since we can't reliably query Google)
-            dork_results = self._generate_example_results(dork, domain)
+        for dork in self.prepare_dorks(domain, categories):
+            dork_results = self.run_dork(dork, domain)
             results.extend(dork_results)
             
             # Call progress callback if provided
             if self.progress_callback:
                 self.progress_callback(dork, dork_results)
             
-            # Add delay between searches
-            time.sleep(random.uniform(1.0, 2.0))
-            
         logger.info(f"Google dork search completed. Found {len(results)} results.")
         return results
+    
+    def prepare_dorks(self, domain, categories=None):
+        """
+        Render Google dork templates for the given domain
         
-    def _generate_example_results(self, dork, domain):
-        """Generate example results for demonstration purposes"""
-        results = []
-        query = dork['template']
-        category = dork['category']
-        
-        logger.info(f"Processing Google dork: {query}")
+        Args:
+            domain (str): Target domain to search for
+            categories (list): List of categories to search for. If None, all categories will be used.
+            
+        Returns:
+            list: List of RenderedDork records
+        """
+        return self.dork_manager.render_dorks('google', categories, {'DOMAIN': domain})
+    
+    def run_dork(self, dork, domain):
+        """
+        Execute a single rendered Google dork
         
-        # Create a Google search URL (for reference only)
-        search_url = f"https://www.google.com/search?q={quote_plus(query)}"
+        Args:
+            dork (RenderedDork): Rendered dork record
+            domain (str): Target domain
+            
+        Returns:
+            list: List of search results for this dork
+        """
+        # Identical queries from earlier scans cost no rate-limit budget
+        if self.backend.cacheable:
+            with span('query_cache', 'google'):
+                cached = query_cache.get('google', dork.template)
+            if cached is not None:
+                return [dict(result, dork=dork.template, category=dork.category) for result in cached]
+        if self.cache_only:
+            return []
         
-        # Generate between 0-3 sample results per dork
-        num_results = random.randint(0, 3)
+        if self.backend.paced:
+            # Wait for the limiter; it alone decides the spacing between searches
+            self.pacer.wait_blocking()
         
-        for i in range(num_results):
-            # Generate simulated results based on category
-            if category == "Secrets":
-                url = f"https://{domain}/config.{random.choice(['env', 'json', 'yml'])}"
-                snippet = "DB_PASSWORD=... AWS_SECRET_KEY=... Contains sensitive information."
-            elif category == "Admin Panels":
-                url = f"https://{domain}/{random.choice(['admin', 'login', 'dashboard', 'cp'])}"
-                snippet = "Login | Admin Dashboard. Enter your credentials to access the administration panel."
-            elif category == "Dev/Test":
-                url = f"https://{random.choice(['dev', 'staging', 'test'])}.{domain}/"
-                snippet = "Development environment. This site is for testing purposes only."
-            elif category == "Index Pages":
-                url = f"https://{domain}/{random.choice(['backup', 'files', 'old'])}"
-                snippet = "Index of /backup. Parent Directory. config_old.zip. database.sql."
-            elif category == "Files / Configs":
-                url = f"https://{domain}/wp-content/{random.choice(['uploads', 'backup', 'config'])}"
-                snippet = "Contains configuration files and database credentials."
-            else:
-                url = f"https://{domain}/{category.lower().replace(' ', '-')}"
-                snippet = f"Found {category.lower()} content that may contain sensitive information."
-            
-            results.append({
-                'dork': query,
-                'category': category,
-                'url': url,
-                'snippet': snippet
-            })
+        with span('backend', 'google', dork.template):
+            dork_results = [dict(result, dork=dork.template, category=dork.category)
+                            for result in self.backend.search('google', dork, domain)]
+        if self.backend.cacheable:
+            query_cache.put('google', dork.template, dork_results)
         
-        logger.info(f"Generated {len(results)} example results for query: {query}")
-        return results
+        return dork_results
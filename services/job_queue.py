@@ -0,0 +1,187 @@
+import logging
+import datetime
+from sqlalchemy import select, update, insert, func
+from app import db
+from models import ScanJob, ScanSession
+from services.progress_store import get_progress_store
+from services.write_queue import get_write_queue
+import config
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock serializing claims, so the running-job count each claim checks is current
+CLAIM_LOCK_KEY = 0x5CA9_0B
+
+class JobQueue:
+    """
+    Scan job queue stored in the scan_job table
+
+    Workers claim jobs with a conditional UPDATE that only succeeds while the
+    job is still queued, so any number of worker processes can share the queue
+    without a broker. A claimed job carries a lease that its worker renews
+    while the scan runs; jobs whose lease expired go back to the queue.
+
+    The SCAN_JOB_CONCURRENCY cap is checked by the claiming UPDATE itself.
+    SQLite runs one write transaction at a time, and on PostgreSQL claims
+    take an advisory lock first, so two workers can never both see one free
+    slot. On other server databases the cap is best-effort.
+    """
+
+    def __init__(self, lease=None, concurrency=None, max_attempts=None):
+        self.lease = datetime.timedelta(seconds=lease or config.SCAN_JOB_LEASE)
+        self.concurrency = concurrency or config.SCAN_JOB_CONCURRENCY
+        self.max_attempts = max_attempts or config.SCAN_JOB_MAX_ATTEMPTS
+
+    def enqueue(self, session_id):
+        """
+        Queue a scan session for a worker
+
+        Args:
+            session_id (int): Scan session ID
+
+        Returns:
+            int: ID of the new job
+        """
+        result = get_write_queue().run(lambda connection: connection.execute(insert(ScanJob).values(
+            scan_session_id=session_id,
+            status='queued',
+            attempts=0,
+            created_at=datetime.datetime.utcnow()
+        )))
+        return result.inserted_primary_key[0]
+
+    def claim(self, worker_id):
+        """
+        Claim the oldest queued job, unless the global concurrency limit is reached
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+
+        Returns:
+            Row: Claimed job (id, scan_session_id, attempts), or None if there is nothing to run
+        """
+        running_job = ScanJob.__table__.alias('running_job')
+        running = (select(func.count()).select_from(running_job)
+                   .where(running_job.c.status == 'running').scalar_subquery())
+
+        def try_claim(connection):
+            # Returns the claimed job, and whether another worker took the candidate first
+            if connection.dialect.name == 'postgresql':
+                # Under READ COMMITTED two concurrent claims would both count the same running jobs;
+                # the lock is released at commit, so the next claim counts this one
+                connection.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK_KEY)))
+            job_id = connection.execute(select(ScanJob.id).where(ScanJob.status == 'queued')
+                                        .order_by(ScanJob.id).limit(1)).scalar()
+            if job_id is None:
+                return None, False
+
+            now = datetime.datetime.utcnow()
+            result = connection.execute(update(ScanJob).where(
+                ScanJob.id == job_id,
+                ScanJob.status == 'queued',
+                running < self.concurrency
+            ).values(
+                status='running',
+                worker_id=worker_id,
+                lease_expires_at=now + self.lease,
+                attempts=ScanJob.attempts + 1,
+                started_at=now
+            ))
+            if result.rowcount == 1:
+                return connection.execute(select(ScanJob.id, ScanJob.scan_session_id, ScanJob.attempts)
+                                          .where(ScanJob.id == job_id)).first(), False
+
+            # Still queued means the concurrency limit was hit rather than a lost race
+            return None, connection.execute(select(ScanJob.status).where(ScanJob.id == job_id)).scalar() != 'queued'
+
+        # Another worker may take the candidate between the SELECT and the UPDATE; try the next one
+        for _ in range(3):
+            job, retry = get_write_queue().run(try_claim)
+            if job is not None:
+                logger.info(f"Worker {worker_id} claimed job {job.id} for session {job.scan_session_id} "
+                            f"(attempt {job.attempts})")
+                return job
+            if not retry:
+                return None
+        return None
+
+    def heartbeat(self, job_id, worker_id):
+        """
+        Extend the lease on a running job
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        result = get_write_queue().run(lambda connection: connection.execute(update(ScanJob).where(
+            ScanJob.id == job_id,
+            ScanJob.worker_id == worker_id,
+            ScanJob.status == 'running'
+        ).values(lease_expires_at=datetime.datetime.utcnow() + self.lease)))
+        return result.rowcount == 1
+
+    def finish(self, job_id, worker_id, status='done', error_message=None):
+        """
+        Mark a job held by this worker as done or failed
+
+        Args:
+            job_id (int): Job ID
+            worker_id (str): Identifier of the worker holding the lease
+            status (str): 'done' or 'failed'
+            error_message (str): Reason the job failed
+        """
+        get_write_queue().run(lambda connection: connection.execute(update(ScanJob).where(
+            ScanJob.id == job_id,
+            ScanJob.worker_id == worker_id
+        ).values(
+            status=status,
+            error_message=error_message,
+            lease_expires_at=None,
+            finished_at=datetime.datetime.utcnow()
+        )))
+
+    def requeue_expired(self):
+        """
+        Return jobs whose lease expired to the queue
+
+        A job is only requeued while it has attempts left; otherwise the job and
+        its scan session are marked failed.
+
+        Returns:
+            int: Number of requeued jobs
+        """
+        now = datetime.datetime.utcnow()
+        expired = (ScanJob.status == 'running', ScanJob.lease_expires_at < now)
+        message = f'Scan worker lost {self.max_attempts} times'
+
+        def write(connection):
+            exhausted = connection.execute(select(ScanJob.scan_session_id).where(
+                *expired, ScanJob.attempts >= self.max_attempts)).scalars().all()
+            if exhausted:
+                connection.execute(update(ScanJob).where(*expired, ScanJob.attempts >= self.max_attempts)
+                                   .values(status='failed', error_message=message, finished_at=now))
+                connection.execute(update(ScanSession).where(ScanSession.id.in_(exhausted))
+                                   .values(status='failed', error_message=message))
+                logger.error(f"Failed jobs for sessions {exhausted}: {message}")
+
+            requeued = connection.execute(update(ScanJob).where(*expired).values(
+                status='queued', worker_id=None, lease_expires_at=None)).rowcount
+            return exhausted, requeued
+
+        exhausted, requeued = get_write_queue().run(write)
+
+        for session_id in exhausted:
+            get_progress_store().update(session_id, status='failed', current_step=f'Error: {message}')
+        if requeued:
+            logger.warning(f"Requeued {requeued} scan jobs with expired leases")
+        return requeued
+
+    def stats(self):
+        """
+        Count jobs by status
+
+        Returns:
+            dict: Mapping of status to job count
+        """
+        with db.engine.connect() as connection:
+            rows = connection.execute(select(ScanJob.status, func.count()).group_by(ScanJob.status)).all()
+        return {status: count for status, count in rows}
@@ -0,0 +1,62 @@
+import time
+import random
+import logging
+import asyncio
+from services.rate_limiter import RateLimiter
+from services.scan_metrics import span
+import config
+
+logger = logging.getLogger(__name__)
+
+class Pacer:
+    """
+    Class to pace outbound requests for a platform
+
+    The platform's RateLimiter is the only source of truth for spacing. Extra
+    random jitter is added only when the limiter reports that the caller had
+    to wait, so scans with spare quota run at full speed.
+    """
+
+    def __init__(self, platform):
+        self.platform = platform
+        self.rate_limiter = RateLimiter(platform)
+        self.jitter = config.PACING_JITTER.get(platform, (0.0, 0.0))
+
+    def _jitter_delay(self):
+        """Return a random extra delay within the configured jitter range"""
+        low, high = self.jitter
+        if high <= 0:
+            return 0.0
+        return random.uniform(low, high)
+
+    def wait_blocking(self):
+        """
+        Block until the next request may be sent
+
+        Returns:
+            bool: True if the limiter made the caller wait, False otherwise
+        """
+        with span('rate_limit_wait', self.platform):
+            waited = self.rate_limiter.wait_blocking()
+        if waited:
+            delay = self._jitter_delay()
+            if delay > 0:
+                with span('pacing_sleep', self.platform):
+                    time.sleep(delay)
+        return waited
+
+    async def wait(self):
+        """
+        Asynchronously wait until the next request may be sent
+
+        Returns:
+            bool: True if the limiter made the caller wait, False otherwise
+        """
+        with span('rate_limit_wait', self.platform):
+            waited = await self.rate_limiter.wait()
+        if waited:
+            delay = self._jitter_delay()
+            if delay > 0:
+                with span('pacing_sleep', self.platform):
+                    await asyncio.sleep(delay)
+        return waited
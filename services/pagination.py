@@ -0,0 +1,62 @@
+import base64
+import json
+import config
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(*values):
+    """
+    Encode the keyset values of the last row on a page as an opaque cursor
+
+    Args:
+        *values: JSON-serializable keyset values, e.g. (created_at, id)
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor (str): Cursor string from a previous response
+        size (int): Number of keyset values expected
+
+    Returns:
+        list: The keyset values
+
+    Raises:
+        CursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise CursorError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorError(f"Invalid cursor: {cursor}")
+    return values
+
+def parse_limit(value, default=None, maximum=None):
+    """
+    Parse a page size query parameter, clamping it to the configured bounds
+
+    Args:
+        value (str): Raw query parameter value, or None
+        default (int): Page size when no value is given
+        maximum (int): Largest page size allowed
+
+    Returns:
+        int: Page size
+    """
+    default = default or config.PAGE_SIZE_DEFAULT
+    maximum = maximum or config.PAGE_SIZE_MAX
+    try:
+        limit = int(value) if value else default
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
@@ -0,0 +1,249 @@
+import time
+import logging
+import threading
+import config
+
+logger = logging.getLogger(__name__)
+
+class ProgressChannel:
+    """
+    Latest-value channel for one scan session's progress
+
+    Publishing replaces the snapshot and bumps a version number, so a burst of
+    updates coalesces into whatever is current when a watcher next wakes up.
+    Publishing cost does not depend on how many watchers are connected beyond
+    a single notify_all().
+
+    Scans running in this process publish to the channel directly. A channel
+    opened with ProgressBus.follow() is also fed by a poller reading the
+    progress store, for scans running in another process.
+    """
+
+    def __init__(self, session_id, fetch=None):
+        self.session_id = session_id
+        self.condition = threading.Condition()
+        self.version = 0
+        self.snapshot = None
+        self.closed = False
+        self.closed_at = None
+        self.watchers = 0
+        self.publish_count = 0
+        self.publish_time = 0.0
+        self.fetch = fetch  # reads the session from the progress store; None for channels only fed locally
+        self.poller = None  # thread feeding the channel from fetch, while one runs
+        self.followed_at = time.monotonic()
+        self.checked_at = None  # when follow() last read the store itself
+        self.polls = 0
+
+    def publish(self, snapshot, final=False, version=None):
+        """
+        Replace the current snapshot and wake every watcher
+
+        Args:
+            snapshot (dict): Progress payload
+            final (bool): True if no further updates will follow
+            version (int): Version of the snapshot in the progress store. Older
+                versions than the current one are dropped. If None, the channel
+                version is bumped.
+        """
+        started = time.perf_counter()
+        with self.condition:
+            if version is not None and version <= self.version:
+                return
+            self.snapshot = snapshot
+            self.version = version if version is not None else self.version + 1
+            # A resumed scan publishes to its old channel again, reopening it
+            self.closed = final
+            self.closed_at = time.monotonic() if final else None
+            self.condition.notify_all()
+        self.publish_count += 1
+        self.publish_time += time.perf_counter() - started
+
+    def close(self):
+        """Mark the channel finished without a new snapshot, waking every watcher"""
+        with self.condition:
+            self.closed = True
+            self.closed_at = time.monotonic()
+            self.condition.notify_all()
+
+    def wait(self, since, timeout):
+        """
+        Block until a snapshot newer than `since` is available
+
+        Args:
+            since (int): Last version the caller has seen
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            tuple: (version, snapshot, closed); the snapshot is None on timeout
+        """
+        with self.condition:
+            self.watchers += 1
+            try:
+                self.condition.wait_for(lambda: self.version > since or (self.closed and self.version == since),
+                                        timeout)
+                if self.version > since:
+                    return self.version, self.snapshot, self.closed
+                return self.version, None, self.closed
+            finally:
+                self.watchers -= 1
+
+    def stats(self):
+        """
+        Fan-out statistics for this channel
+
+        Returns:
+            dict: Watcher count, publish count and mean publish cost in microseconds
+        """
+        return {
+            'session_id': self.session_id,
+            'version': self.version,
+            'watchers': self.watchers,
+            'publishes': self.publish_count,
+            'mean_publish_us': (self.publish_time / self.publish_count * 1e6) if self.publish_count else 0.0,
+            'store_polls': self.polls,
+            'polling': self.poller is not None
+        }
+
+class ProgressBus:
+    """
+    Registry of per-session progress channels
+
+    Watchers of a scan running in another process (python -m worker) share
+    one poller thread per session, which reads the progress store every
+    PROGRESS_MIN_INTERVAL and publishes new versions to the local channel.
+    The store is read at that rate per watched session, however many
+    requests are waiting on it.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def channel(self, session_id):
+        """Return the channel for a session, creating it if needed"""
+        with self.lock:
+            channel = self.channels.get(session_id)
+            if channel is None:
+                self._evict_closed()
+                channel = self.channels[session_id] = ProgressChannel(session_id)
+            return channel
+
+    def _evict_closed(self):
+        """Drop channels closed, or followed and left unwatched, longer than config.PROGRESS_TTL ago"""
+        cutoff = time.monotonic() - config.PROGRESS_TTL
+        expired = [session_id for session_id, channel in self.channels.items()
+                   if not channel.watchers and channel.poller is None
+                   and ((channel.closed and channel.closed_at < cutoff)
+                        or (channel.fetch is not None and channel.followed_at < cutoff))]
+        for session_id in expired:
+            del self.channels[session_id]
+        if expired:
+            logger.debug(f"Evicted {len(expired)} closed progress channels")
+
+    def get(self, session_id):
+        """Return the channel for a session, or None if it has none"""
+        return self.channels.get(session_id)
+
+    def follow(self, session_id, fetch):
+        """
+        Return a session's channel, making sure it is fed wherever the scan runs
+
+        An open channel that no poller feeds belongs to a scan publishing in
+        this process and is returned as is. Otherwise the session is read
+        from the store once, published, and a poller is started unless the
+        scan has finished. The poller stops when the scan finishes or
+        nobody has followed the channel for PROGRESS_FEED_IDLE seconds.
+
+        The store is read here at most once per PROGRESS_MIN_INTERVAL per
+        session; requests arriving meanwhile get the channel and wait for
+        that read to be published.
+
+        Args:
+            session_id (int): Scan session ID
+            fetch (callable): Returns (snapshot, final) for the session from
+                the progress store, or None if the store does not track it
+
+        Returns:
+            ProgressChannel: The channel, or None if the session is neither
+                published here nor tracked by the store
+        """
+        now = time.monotonic()
+        with self.lock:
+            channel = self.channels.get(session_id)
+            if channel is None:
+                self._evict_closed()
+                channel = self.channels[session_id] = ProgressChannel(session_id, fetch)
+            channel.followed_at = now
+            if channel.poller is not None or (channel.fetch is None and not channel.closed):
+                return channel
+            if channel.checked_at is not None and now - channel.checked_at < config.PROGRESS_MIN_INTERVAL:
+                return channel
+            channel.fetch = channel.fetch or fetch
+            channel.checked_at = now
+
+        fetched = fetch()
+        with self.lock:
+            if fetched is None:
+                channel.close()
+                if not channel.version and self.channels.get(session_id) is channel:
+                    # Never tracked: keep no channel for it
+                    del self.channels[session_id]
+                    return None
+                return channel
+            snapshot, final = fetched
+            channel.publish(snapshot, final, snapshot['version'])
+            if not final and channel.poller is None:
+                channel.poller = threading.Thread(target=self._poll, args=(channel,),
+                                                  name=f'progress-feed-{session_id}', daemon=True)
+                channel.poller.start()
+            return channel
+
+    def _poll(self, channel):
+        """Feed a channel from the progress store until its scan finishes or nobody follows it"""
+        try:
+            while True:
+                time.sleep(config.PROGRESS_MIN_INTERVAL)
+                with self.lock:
+                    if not channel.watchers and time.monotonic() - channel.followed_at > config.PROGRESS_FEED_IDLE:
+                        channel.poller = None
+                        return
+                fetched = channel.fetch()
+                channel.polls += 1
+                if fetched is None:
+                    channel.close()
+                    break
+                snapshot, final = fetched
+                channel.publish(snapshot, final, snapshot['version'])
+                if final:
+                    break
+        except Exception as e:
+            logger.warning(f"Error polling progress of session {channel.session_id}: {str(e)}")
+        with self.lock:
+            channel.poller = None
+
+    def publish(self, session_id, snapshot, final=False, version=None):
+        """
+        Publish a progress snapshot for a session
+
+        Args:
+            session_id (int): Scan session ID
+            snapshot (dict): Progress payload
+            final (bool): True if the scan has finished
+            version (int): Version of the snapshot in the progress store
+        """
+        self.channel(session_id).publish(snapshot, final, version)
+
+    def stats(self):
+        """
+        Fan-out statistics for every open channel
+
+        Returns:
+            list: Per-channel statistics dictionaries
+        """
+        with self.lock:
+            channels = list(self.channels.values())
+        return [channel.stats() for channel in channels]
+
+# Process-wide bus shared by the scan threads and the progress endpoints
+progress_bus = ProgressBus()
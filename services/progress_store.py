@@ -0,0 +1,198 @@
+import time
+import logging
+import datetime
+import threading
+from sqlalchemy import select, update, delete, insert, case
+from app import db
+from models import ScanProgress
+from services.write_queue import get_write_queue
+import config
+
+logger = logging.getLogger(__name__)
+
+# Fields kept for every tracked scan, with their initial values
+PROGRESS_FIELDS = {
+    'status': 'initializing',
+    'progress': 0,
+    'current_step': 'Starting scan...',
+    'total_steps': 0,
+    'completed_steps': 0,
+    'google_dorks_total': 0,
+    'google_dorks_completed': 0,
+    'github_dorks_total': 0,
+    'github_dorks_completed': 0,
+    'rows_per_second': None,
+    'version': 1  # watchers start at version 0, so the initial state counts as an update
+}
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+class MemoryProgressStore:
+    """Progress store kept in this process; only suitable for a single web worker"""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else config.PROGRESS_TTL
+        self.entries = {}
+        self.finished_at = {}
+        self.lock = threading.Lock()
+
+    def create(self, session_id, **fields):
+        """Start tracking a scan session, overriding initial values with fields"""
+        self.evict_expired()
+        with self.lock:
+            previous = self.entries.get(session_id)
+            self.entries[session_id] = dict(PROGRESS_FIELDS, **fields)
+            if previous is not None:
+                # Versions keep increasing when a scan is resumed, so watchers see the restart
+                self.entries[session_id]['version'] = previous['version'] + 1
+            self.finished_at.pop(session_id, None)
+
+    def get(self, session_id):
+        """
+        Get the progress of a scan session
+
+        Returns:
+            dict: Copy of the progress fields, or None if the session is not tracked
+        """
+        entry = self.entries.get(session_id)
+        return dict(entry) if entry is not None else None
+
+    def update(self, session_id, **fields):
+        """Set progress fields for a scan session"""
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return
+            entry.update(fields)
+            entry['version'] += 1
+            if fields.get('status') in FINISHED_STATUSES:
+                self.finished_at[session_id] = time.monotonic()
+
+    def increment(self, session_id, platform, current_step):
+        """Count one completed dork for a platform and recompute the percentage"""
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return
+            entry[f'{platform}_dorks_completed'] += 1
+            entry['completed_steps'] += 1
+            total = entry['total_steps']
+            entry['progress'] = int(entry['completed_steps'] * 100 / total) if total > 0 else 0
+            entry['current_step'] = current_step
+            entry['version'] += 1
+
+    def evict_expired(self):
+        """
+        Drop finished sessions older than the TTL
+
+        Returns:
+            list: IDs of the evicted sessions
+        """
+        cutoff = time.monotonic() - self.ttl
+        with self.lock:
+            expired = [session_id for session_id, finished in self.finished_at.items() if finished < cutoff]
+            for session_id in expired:
+                self.entries.pop(session_id, None)
+                del self.finished_at[session_id]
+        return expired
+
+class DatabaseProgressStore:
+    """
+    Progress store backed by the scan_progress table
+
+    Every web worker reads the same rows, so progress is visible wherever a
+    request lands. Counters are incremented in a single UPDATE statement, so
+    concurrent dork completions never lose an update. Writes go through the
+    process's write queue, so on SQLite they never contend for the lock.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else config.PROGRESS_TTL
+
+    def create(self, session_id, **fields):
+        """Start tracking a scan session, overriding initial values with fields"""
+        self.evict_expired()
+        values = dict(PROGRESS_FIELDS, **fields)
+
+        def write(connection):
+            previous = connection.execute(select(ScanProgress.version)
+                                          .where(ScanProgress.session_id == session_id)).scalar()
+            if previous is not None:
+                # Versions keep increasing when a scan is resumed, so watchers see the restart
+                values['version'] = previous + 1
+                connection.execute(delete(ScanProgress).where(ScanProgress.session_id == session_id))
+            connection.execute(insert(ScanProgress).values(
+                session_id=session_id, updated_at=datetime.datetime.utcnow(), **values))
+
+        get_write_queue().run(write)
+
+    def get(self, session_id):
+        """
+        Get the progress of a scan session with a primary-key lookup
+
+        Returns:
+            dict: The progress fields, or None if the session is not tracked
+        """
+        columns = [getattr(ScanProgress, field) for field in PROGRESS_FIELDS]
+        with db.engine.connect() as connection:
+            row = connection.execute(select(*columns).where(ScanProgress.session_id == session_id)).first()
+        return row._asdict() if row is not None else None
+
+    def update(self, session_id, **fields):
+        """Set progress fields for a scan session"""
+        now = datetime.datetime.utcnow()
+        values = dict(fields, version=ScanProgress.version + 1, updated_at=now)
+        if fields.get('status') in FINISHED_STATUSES:
+            values['finished_at'] = now
+        get_write_queue().run(lambda connection: connection.execute(
+            update(ScanProgress).where(ScanProgress.session_id == session_id).values(**values)))
+
+    def increment(self, session_id, platform, current_step):
+        """Count one completed dork for a platform and recompute the percentage atomically"""
+        completed = getattr(ScanProgress, f'{platform}_dorks_completed')
+        # Right-hand sides see the pre-update row, so the percentage uses completed_steps + 1
+        statement = update(ScanProgress).where(ScanProgress.session_id == session_id).values({
+            completed: completed + 1,
+            ScanProgress.completed_steps: ScanProgress.completed_steps + 1,
+            ScanProgress.progress: case(
+                (ScanProgress.total_steps > 0, (ScanProgress.completed_steps + 1) * 100 // ScanProgress.total_steps),
+                else_=0
+            ),
+            ScanProgress.current_step: current_step,
+            ScanProgress.version: ScanProgress.version + 1,
+            ScanProgress.updated_at: datetime.datetime.utcnow()
+        })
+        # Not waited for: a watcher reading before it commits sees the step on its next poll
+        get_write_queue().submit(lambda connection: connection.execute(statement))
+
+    def evict_expired(self):
+        """
+        Delete finished sessions older than the TTL
+
+        Returns:
+            int: Number of evicted sessions
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.ttl)
+        result = get_write_queue().run(lambda connection: connection.execute(
+            delete(ScanProgress).where(ScanProgress.finished_at < cutoff)))
+        return result.rowcount
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_progress_store():
+    """
+    Return the process-wide progress store selected by config.PROGRESS_STORE
+
+    Returns:
+        MemoryProgressStore or DatabaseProgressStore: The progress store
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            if config.PROGRESS_STORE == 'memory':
+                _store = MemoryProgressStore()
+            else:
+                _store = DatabaseProgressStore()
+            logger.info(f"Using {type(_store).__name__} for scan progress")
+        return _store
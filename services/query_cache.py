@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from app import app
+import config
+
+logger = logging.getLogger(__name__)
+
+class QueryCache:
+    """
+    Two-tier cache of search responses keyed by (platform, rendered query)
+
+    Each process keeps an LRU dictionary in front of an SQLite file shared by
+    every worker process. Entries expire after a per-platform TTL. Once the
+    disk tier outgrows its size budget, its least recently used entries are
+    evicted. Access times on disk are refreshed only by disk hits, so entries
+    that are always served from memory age out of the disk tier first.
+
+    Dorkers only fetch the first page of results, so responses are not keyed by page.
+    """
+
+    COUNTERS = ('memory_hits', 'disk_hits', 'misses', 'stores', 'evictions')
+
+    def __init__(self, path=None, memory_entries=None, max_bytes=None, ttl=None, enabled=None):
+        self.path = path or config.QUERY_CACHE_PATH or os.path.join(app.instance_path, 'query_cache.db')
+        self.memory_entries = memory_entries or config.QUERY_CACHE_MEMORY_ENTRIES
+        self.max_bytes = max_bytes or config.QUERY_CACHE_MAX_BYTES
+        self.ttl = dict(config.QUERY_CACHE_TTL, **(ttl or {}))
+        self.enabled = config.QUERY_CACHE_ENABLED if enabled is None else enabled
+        # (platform, query) -> (expires_at, results), least recently used first
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.disk_bytes = 0
+        # Counter increments not yet added to the shared totals on disk
+        self.pending = dict.fromkeys(self.COUNTERS, 0)
+        self.last_stats_write = time.monotonic()
+
+    def get(self, platform, query):
+        """
+        Look up a cached response
+
+        Args:
+            platform (str): 'google' or 'github'
+            query (str): Rendered dork query
+
+        Returns:
+            list: Cached result dictionaries, or None on a miss. Callers must not modify them.
+        """
+        if not self.enabled:
+            return None
+
+        key = (platform, query)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.memory.move_to_end(key)
+                    self._count('memory_hits')
+                    return entry[1]
+                del self.memory[key]
+
+            connection = self._connect()
+            row = connection.execute("SELECT results, stored_at, size FROM query_cache "
+                                     "WHERE platform = ? AND query = ?", key).fetchone()
+            if row is not None:
+                results, stored_at, size = row
+                expires_at = stored_at + self._ttl(platform)
+                if expires_at > now:
+                    connection.execute("UPDATE query_cache SET accessed_at = ? "
+                                       "WHERE platform = ? AND query = ?", (now, *key))
+                    results = json.loads(results)
+                    self._remember(key, expires_at, results)
+                    self._count('disk_hits')
+                    return results
+
+                connection.execute("DELETE FROM query_cache WHERE platform = ? AND query = ?", key)
+                self.disk_bytes -= size
+
+            self._count('misses')
+            return None
+
+    def put(self, platform, query, results):
+        """
+        Store a response in both tiers
+
+        Args:
+            platform (str): 'google' or 'github'
+            query (str): Rendered dork query
+            results (list): Result dictionaries returned for the query
+        """
+        if not self.enabled:
+            return
+
+        key = (platform, query)
+        now = time.time()
+        payload = json.dumps(results)
+        with self.lock:
+            self._remember(key, now + self._ttl(platform), results)
+
+            connection = self._connect()
+            previous = connection.execute("SELECT size FROM query_cache "
+                                          "WHERE platform = ? AND query = ?", key).fetchone()
+            connection.execute("INSERT OR REPLACE INTO query_cache "
+                               "(platform, query, results, size, stored_at, accessed_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", (*key, payload, len(payload), now, now))
+            self.disk_bytes += len(payload) - (previous[0] if previous else 0)
+            self._count('stores')
+
+            if self.disk_bytes > self.max_bytes:
+                self._evict()
+
+    def flush_stats(self):
+        """Add this process's pending counter increments to the shared totals"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._write_stats()
+
+    def stats(self):
+        """
+        Hit and miss counters of every process using the disk tier
+
+        Returns:
+            dict: Counters, hit rate, and entry count and size of the disk tier
+        """
+        if not self.enabled:
+            return {'enabled': False}
+
+        with self.lock:
+            self._write_stats()
+            connection = self._connect()
+            stats = dict.fromkeys(self.COUNTERS, 0)
+            stats.update(connection.execute("SELECT name, value FROM query_cache_counter").fetchall())
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM query_cache").fetchone()
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats.update({
+            'enabled': True,
+            'hit_rate': (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes
+        })
+        return stats
+
+    def _ttl(self, platform):
+        return self.ttl.get(platform, min(self.ttl.values()))
+
+    def _connect(self):
+        """Open the disk tier on first use; called with the lock held"""
+        if self.connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Autocommit: every statement is its own short transaction
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Files written by earlier versions also keyed entries by page; they are only a cache, so start over
+            if 'page' in {row[1] for row in connection.execute("PRAGMA table_info(query_cache)")}:
+                connection.execute("DROP TABLE query_cache")
+            connection.execute("CREATE TABLE IF NOT EXISTS query_cache ("
+                               "platform TEXT NOT NULL, query TEXT NOT NULL, "
+                               "results TEXT NOT NULL, size INTEGER NOT NULL, "
+                               "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                               "PRIMARY KEY (platform, query))")
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_query_cache_accessed_at ON query_cache (accessed_at)")
+            connection.execute("CREATE TABLE IF NOT EXISTS query_cache_counter ("
+                               "name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.disk_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM query_cache").fetchone()[0]
+            self.connection = connection
+        return self.connection
+
+    def _remember(self, key, expires_at, results):
+        """Insert into the memory tier, dropping least recently used entries; called with the lock held"""
+        self.memory[key] = (expires_at, results)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        """Shrink the disk tier to 90% of its budget; called with the lock held"""
+        connection = self.connection
+        now = time.time()
+        evicted = 0
+        for platform, ttl in self.ttl.items():
+            evicted += connection.execute("DELETE FROM query_cache WHERE platform = ? AND stored_at < ?",
+                                          (platform, now - ttl)).rowcount
+
+        # Other processes write to the same file, so start from the real size
+        self.disk_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM query_cache").fetchone()[0]
+        target = self.max_bytes * 0.9
+        while self.disk_bytes > target:
+            rows = connection.execute("SELECT platform, query, size FROM query_cache "
+                                      "ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            connection.executemany("DELETE FROM query_cache WHERE platform = ? AND query = ?",
+                                   [row[:2] for row in rows])
+            self.disk_bytes -= sum(row[2] for row in rows)
+            evicted += len(rows)
+
+        self.pending['evictions'] += evicted
+        logger.info(f"Evicted {evicted} cached queries; disk tier now {self.disk_bytes} bytes")
+
+    def _count(self, name):
+        """Count an event, writing counters to disk at most every QUERY_CACHE_STATS_INTERVAL"""
+        self.pending[name] += 1
+        if time.monotonic() - self.last_stats_write >= config.QUERY_CACHE_STATS_INTERVAL:
+            self._write_stats()
+
+    def _write_stats(self):
+        """Add pending counter increments to the disk tier; called with the lock held"""
+        increments = [(name, value) for name, value in self.pending.items() if value]
+        self.last_stats_write = time.monotonic()
+        if not increments:
+            return
+        self._connect().executemany("INSERT INTO query_cache_counter (name, value) VALUES (?, ?) "
+                                    "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value", increments)
+        self.pending = dict.fromkeys(self.COUNTERS, 0)
+
+# Process-wide cache shared by the dorkers of every scan
+query_cache = QueryCache()
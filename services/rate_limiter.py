@@ -1,93 +1,109 @@
 import time
 import logging
 import asyncio
-from collections import deque
+import threading
 import config
 
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
-    """Class to handle rate limiting for API requests"""
-    
+    """
+    Class to handle rate limiting for API requests
+
+    Uses the generic cell rate algorithm (GCRA): the limiter only stores the
+    theoretical arrival time (TAT) of the next request. Each acquire reserves a
+    slot under a short lock and returns the exact delay until that slot, so
+    callers sleep once instead of polling. Reads never take the lock.
+    """
+
     _instances = {}
-    
+    _instances_lock = threading.Lock()
+
     def __new__(cls, platform):
         """Implement as singleton per platform"""
-        if platform not in cls._instances:
-            cls._instances[platform] = super(RateLimiter, cls).__new__(cls)
-            cls._instances[platform].platform = platform
-            cls._instances[platform].window = config.RATE_LIMIT_WINDOW
-            cls._instances[platform].max_requests = config.RATE_LIMIT_MAX_REQUESTS.get(platform, 10)
-            cls._instances[platform].request_times = deque()
-            cls._instances[platform].logger = logging.getLogger(f"{__name__}.{platform}")
-        return cls._instances[platform]
-    
+        with cls._instances_lock:
+            if platform not in cls._instances:
+                instance = super(RateLimiter, cls).__new__(cls)
+                instance.platform = platform
+                instance.lock = threading.Lock()
+                instance.logger = logging.getLogger(f"{__name__}.{platform}")
+                instance.tat = 0.0
+                instance.configure(config.RATE_LIMIT_MAX_REQUESTS.get(platform, 10), config.RATE_LIMIT_WINDOW)
+                cls._instances[platform] = instance
+            return cls._instances[platform]
+
+    def configure(self, max_requests=None, window=None):
+        """
+        Change the limit of this limiter
+
+        Args:
+            max_requests (int): Requests allowed per window
+            window (float): Window length in seconds
+        """
+        with self.lock:
+            if max_requests is not None:
+                self.max_requests = max_requests
+            if window is not None:
+                self.window = window
+            # Emission interval between requests at the sustained rate
+            self.interval = self.window / self.max_requests
+
+    def reserve(self):
+        """
+        Reserve the next request slot
+
+        Returns:
+            float: Seconds the caller must wait before sending its request (0 if none)
+        """
+        with self.lock:
+            now = time.monotonic()
+            tat = max(self.tat, now) + self.interval
+            self.tat = tat
+        # A burst of up to max_requests is allowed within one window
+        return max(0.0, tat - self.window - now)
+
     async def wait(self):
         """
         Asynchronously wait if rate limit is reached
-        
+
         Returns:
             bool: True if waited, False otherwise
         """
-        now = time.time()
-        
-        # Remove timestamps older than the window
-        while self.request_times and now - self.request_times[0] > self.window:
-            self.request_times.popleft()
-        
-        # If we've hit the rate limit, wait until oldest request expires
-        if len(self.request_times) >= self.max_requests:
-            wait_time = self.window - (now - self.request_times[0])
-            if wait_time > 0:
-                self.logger.info(f"Rate limit reached for {self.platform}. Waiting {wait_time:.2f} seconds.")
-                await asyncio.sleep(wait_time)
-                # Recursively check again after waiting
-                return await self.wait()
-        
-        # Add current request time
-        self.request_times.append(time.time())
-        return False
-    
+        wait_time = self.reserve()
+        if wait_time <= 0:
+            return False
+        self.logger.info(f"Rate limit reached for {self.platform}. Waiting {wait_time:.2f} seconds.")
+        await asyncio.sleep(wait_time)
+        return True
+
     def wait_blocking(self):
         """
         Synchronously wait if rate limit is reached
-        
+
         Returns:
             bool: True if waited, False otherwise
         """
-        now = time.time()
-        
-        # Remove timestamps older than the window
-        while self.request_times and now - self.request_times[0] > self.window:
-            self.request_times.popleft()
-        
-        # If we've hit the rate limit, wait until oldest request expires
-        if len(self.request_times) >= self.max_requests:
-            wait_time = self.window - (now - self.request_times[0])
-            if wait_time > 0:
-                self.logger.info(f"Rate limit reached for {self.platform}. Waiting {wait_time:.2f} seconds.")
-                time.sleep(wait_time)
-                # Recursively check again after waiting
-                return self.wait_blocking()
-        
-        # Add current request time
-        self.request_times.append(time.time())
-        return False
-    
+        wait_time = self.reserve()
+        if wait_time <= 0:
+            return False
+        self.logger.info(f"Rate limit reached for {self.platform}. Waiting {wait_time:.2f} seconds.")
+        time.sleep(wait_time)
+        return True
+
     def get_current_rate(self):
         """
         Get current request rate
-        
+
         Returns:
             tuple: (current_count, max_requests, reset_time)
         """
-        now = time.time()
-        
-        # Remove timestamps older than the window
-        while self.request_times and now - self.request_times[0] > self.window:
-            self.request_times.popleft()
-        
-        current_count = len(self.request_times)
-        reset_time = self.request_times[0] + self.window if self.request_times else now
-        
+        # Single attribute reads are atomic, so no lock is needed here
+        tat = self.tat
+        interval = self.interval
+        now = time.monotonic()
+
+        backlog = max(0.0, tat - now)
+        current_count = min(self.max_requests, int(-(-backlog // interval)))
+        reset_time = time.time() + backlog
+
         return (current_count, self.max_requests, reset_time)
@@ -0,0 +1,325 @@
+import json
+import logging
+import time
+import datetime
+from sqlalchemy import and_, bindparam, case, delete, exists, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from models import DorkCheckpoint, Result, ResultFingerprint
+from services.bulk_insert import BulkInserter
+from services.fingerprint import url_hash
+from services.write_queue import get_write_queue
+from services.scan_metrics import span
+import config
+
+logger = logging.getLogger(__name__)
+
+# Severity kept when duplicates of one URL disagree
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+# Results are the high-volume table, so they are COPYed on PostgreSQL. Fingerprints
+# are not: another scan of the target may store the same one, and COPY cannot skip conflicts
+result_inserter = BulkInserter(Result)
+
+# Dialects whose INSERT supports ON CONFLICT
+UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def upsert_fingerprints(connection, rows):
+    """
+    Insert fingerprints, merging any another scan of the target stored first
+
+    Each scan loads the target's index when it starts, so two scans of one
+    target running at once can both insert the same finding. The row stored
+    first keeps its first_seen_session_id; the later one updates the snippet
+    hash, and the changed session only if the snippet differs.
+
+    Args:
+        connection (Connection): SQLAlchemy connection
+        rows (list): Fingerprint row dictionaries
+    """
+    table = ResultFingerprint.__table__
+    dialect_insert = UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is None:
+        connection.execute(insert(table), rows)
+        return
+    statement = dialect_insert(table)
+    excluded = statement.excluded
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.target, table.c.platform, table.c.url_hash],
+        set_={
+            'snippet_hash': excluded.snippet_hash,
+            'changed_session_id': case((table.c.snippet_hash == excluded.snippet_hash, table.c.changed_session_id),
+                                       else_=excluded.changed_session_id)
+        }
+    ), rows)
+
+class ResultWriter:
+    """
+    Class to buffer scan results and persist them with bulk inserts (COPY on PostgreSQL)
+
+    Each finished dork also gets a checkpoint row. A checkpoint is committed in
+    the same transaction as the last of its dork's results, so a stored "done"
+    checkpoint always means every result of that dork is stored too. Changes
+    to the target's fingerprint index ride along with the checkpoint, so a
+    resumed scan never mistakes a discarded result for one seen before.
+
+    A URL found by several dorks of the session is stored once; later dorks
+    are merged into that row's dorks list (and can raise its severity and add
+    secret rules) by an UPDATE committed with their own checkpoint.
+    """
+
+    def __init__(self, session_id, batch_size=None, flush_interval=None, fingerprints=None, delta=False):
+        self.session_id = session_id
+        self.fingerprints = fingerprints  # FingerprintIndex of the target, or None
+        self.delta = delta  # drop results whose fingerprint is unchanged
+        self.fingerprint_changes = []  # index changes of the dork being added
+        self.skipped = 0
+        # Normalized URL hash -> {'dorks', 'severity', 'secret_rules', 'row' while buffered, 'stored'}
+        self.urls = {}
+        self.merged = set()  # URL hashes the dork being added merged into
+        self.duplicates = 0
+        self.batch_size = batch_size or config.RESULT_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else config.RESULT_FLUSH_INTERVAL
+        self.buffer = []
+        # Pending checkpoints as (rows added before it, checkpoint row, fingerprint changes)
+        self.checkpoints = []
+        self.rows_added = 0
+        self.rows_written = 0
+        self.write_time = 0.0
+        self.last_flush = time.monotonic()
+
+    def add(self, platform, result, severity):
+        """
+        Buffer a single result for insertion
+
+        Args:
+            platform (str): 'google' or 'github'
+            result (dict): Result dictionary produced by a dorker
+            severity (str): Severity assigned to the result
+            
+        Returns:
+            bool: False if the result was merged into an earlier row or dropped as unchanged by a delta scan
+        """
+        digest = url_hash(result['url'])
+        entry = self.urls.get(digest)
+        if entry is not None:
+            self.duplicates += 1
+            if entry['stored']:
+                self._merge(digest, entry, result['dork'], severity, result.get('secret_rules'))
+            return False
+        
+        delta_status = first_seen = None
+        if self.fingerprints is not None:
+            delta_status, first_seen, change = self.fingerprints.observe(self.session_id, platform, result, url_digest=digest)
+            if change is not None:
+                self.fingerprint_changes.append(change)
+            if self.delta and delta_status == 'unchanged':
+                self.urls[digest] = {'dorks': [result['dork']], 'severity': severity, 'secret_rules': [],
+                                     'row': None, 'stored': False}
+                self.skipped += 1
+                return False
+        
+        row = {
+            'scan_session_id': self.session_id,
+            'dork': result['dork'],
+            'platform': platform,
+            'category': result['category'],
+            'result_url': result['url'],
+            'snippet': result['snippet'],
+            'severity': severity,
+            'first_seen_session_id': first_seen,
+            'delta_status': delta_status,
+            'url_hash': digest,
+            'dorks': [result['dork']],
+            'secret_rules': json.dumps(result['secret_rules']) if result.get('secret_rules') else None
+        }
+        self.urls[digest] = {'dorks': row['dorks'], 'severity': severity,
+                             'secret_rules': list(result.get('secret_rules') or []), 'row': row, 'stored': True}
+        self.buffer.append(row)
+        self.rows_added += 1
+
+        # Write full chunks as soon as they are available
+        if len(self.buffer) >= self.batch_size:
+            self._write(self.batch_size)
+        return True
+
+    def _merge(self, digest, entry, dork, severity, secret_rules=None):
+        """Fold a duplicate URL into the row already kept for it"""
+        if dork not in entry['dorks']:
+            entry['dorks'].append(dork)
+        if SEVERITY_RANK.get(severity, 1) > SEVERITY_RANK.get(entry['severity'], 1):
+            entry['severity'] = severity
+        # The duplicate's secrets may be what raised the severity, so the row must list them too
+        for rule_id in secret_rules or ():
+            if rule_id not in entry['secret_rules']:
+                entry['secret_rules'].append(rule_id)
+        if entry['row'] is not None:
+            # Still buffered: the insert picks the merge up
+            entry['row']['severity'] = entry['severity']
+            entry['row']['secret_rules'] = json.dumps(entry['secret_rules']) if entry['secret_rules'] else None
+        self.merged.add(digest)
+
+    def complete_dork(self, platform, dork, result_count):
+        """
+        Record a dork whose results have all been added
+
+        Args:
+            platform (str): 'google' or 'github'
+            dork (RenderedDork): The dork that completed
+            result_count (int): Number of results the dork produced
+        """
+        self._add_checkpoint(platform, dork, 'done', result_count)
+
+    def fail_dork(self, platform, dork, error):
+        """
+        Record a dork that raised, so a resumed scan runs it again
+
+        Args:
+            platform (str): 'google' or 'github'
+            dork (RenderedDork): The dork that failed
+            error (Exception): The error it raised
+        """
+        self._add_checkpoint(platform, dork, 'failed', 0, str(error))
+
+    def _add_checkpoint(self, platform, dork, status, result_count, error_message=None):
+        changes, self.fingerprint_changes = self.fingerprint_changes, []
+        # Merges are written as the row's full dorks list, so applying them is idempotent
+        changes += [('merge', {
+            'b_session_id': self.session_id,
+            'b_url_hash': digest,
+            'dorks': json.dumps(self.urls[digest]['dorks']),
+            'severity': self.urls[digest]['severity'],
+            'secret_rules': json.dumps(self.urls[digest]['secret_rules']) if self.urls[digest]['secret_rules'] else None
+        }) for digest in self.merged]
+        self.merged = set()
+        self.checkpoints.append((self.rows_added, {
+            'scan_session_id': self.session_id,
+            'platform': platform,
+            'category': dork.category,
+            'dork': dork.template,
+            'status': status,
+            'result_count': result_count,
+            'error_message': error_message,
+            'completed_at': datetime.datetime.utcnow()
+        }, changes))
+
+    def resume(self):
+        """
+        Prepare the session for a (re)run and list the dorks already done
+
+        Results of dorks without a "done" checkpoint are partial, so they are
+        deleted together with failed checkpoints before those dorks run again.
+
+        Returns:
+            set: (platform, rendered dork) pairs that must not run again
+        """
+        done = and_(DorkCheckpoint.scan_session_id == self.session_id, DorkCheckpoint.status == 'done')
+        
+        def discard_unfinished(connection):
+            completed = set(connection.execute(select(DorkCheckpoint.platform, DorkCheckpoint.dork).where(done)).tuples())
+            discarded = connection.execute(delete(Result).where(
+                Result.scan_session_id == self.session_id,
+                ~exists().where(done, DorkCheckpoint.platform == Result.platform, DorkCheckpoint.dork == Result.dork)
+            )).rowcount
+            connection.execute(delete(DorkCheckpoint).where(DorkCheckpoint.scan_session_id == self.session_id,
+                                                            DorkCheckpoint.status != 'done'))
+            return completed, discarded
+        
+        completed, discarded = get_write_queue().run(discard_unfinished)
+        
+        # Rebuild the dedup index from the rows kept
+        rows = db.session.execute(select(Result.url_hash, Result.dorks, Result.severity, Result.secret_rules).where(
+            Result.scan_session_id == self.session_id, Result.url_hash.isnot(None)))
+        self.urls = {digest: {'dorks': json.loads(dorks) if dorks else [], 'severity': severity,
+                              'secret_rules': json.loads(secret_rules) if secret_rules else [],
+                              'row': None, 'stored': True}
+                     for digest, dorks, severity, secret_rules in rows}
+        
+        if completed or discarded:
+            logger.info(f"Resuming session {self.session_id}: skipping {len(completed)} completed dorks, "
+                        f"discarded {discarded} results of unfinished dorks")
+        return completed
+
+    def checkpoint(self):
+        """
+        Flush buffered results at a dork boundary if the flush interval has elapsed
+
+        Returns:
+            int: Number of rows written
+        """
+        if (self.buffer or self.checkpoints) and time.monotonic() - self.last_flush >= self.flush_interval:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """
+        Write every buffered result to the database
+
+        Returns:
+            int: Number of rows written
+        """
+        written = 0
+        while self.buffer:
+            written += self._write(self.batch_size)
+        if self.checkpoints:
+            # Checkpoints of dorks that produced no results
+            self._write(0)
+        self.last_flush = time.monotonic()
+        return written
+
+    def close(self):
+        """Flush remaining results and log write throughput"""
+        self.flush()
+        logger.info(f"Persisted {self.rows_written} results for session {self.session_id} "
+                    f"in {self.write_time:.3f}s ({self.rows_per_second:.0f} rows/s)"
+                    + f", merged {self.duplicates} duplicate URLs"
+                    + (f", skipped {self.skipped} unchanged" if self.delta else ""))
+
+    @property
+    def rows_per_second(self):
+        """Rows written per second of database time"""
+        if self.write_time <= 0:
+            return 0.0
+        return self.rows_written / self.write_time
+
+    def _write(self, count):
+        """Insert and commit up to `count` buffered rows, plus the checkpoints they complete"""
+        chunk = self.buffer[:count]
+        del self.buffer[:count]
+        written_through = self.rows_written + len(chunk)
+        ready = [checkpoint for checkpoint in self.checkpoints if checkpoint[0] <= written_through]
+        if not chunk and not ready:
+            return 0
+        self.checkpoints = [checkpoint for checkpoint in self.checkpoints if checkpoint[0] > written_through]
+        inserts = [row for _, _, changes in ready for kind, row in changes if kind == 'insert']
+        updates = [row for _, _, changes in ready for kind, row in changes if kind == 'update']
+        merges = [row for _, _, changes in ready for kind, row in changes if kind == 'merge']
+        for row in chunk:
+            self.urls[row['url_hash']]['row'] = None
+
+        def write(connection):
+            if chunk:
+                result_inserter.insert(connection, [dict(row, dorks=json.dumps(row['dorks'])) for row in chunk])
+            if ready:
+                connection.execute(insert(DorkCheckpoint), [row for _, row, _ in ready])
+            if inserts:
+                upsert_fingerprints(connection, inserts)
+            if updates:
+                connection.execute(update(ResultFingerprint).where(
+                    ResultFingerprint.target == bindparam('b_target'),
+                    ResultFingerprint.platform == bindparam('b_platform'),
+                    ResultFingerprint.url_hash == bindparam('b_url_hash')
+                ), updates)
+            if merges:
+                connection.execute(update(Result).where(
+                    Result.scan_session_id == bindparam('b_session_id'),
+                    Result.url_hash == bindparam('b_url_hash')
+                ), merges)
+        
+        started = time.perf_counter()
+        with span('db_write'):
+            get_write_queue().run(write)
+        self.write_time += time.perf_counter() - started
+        self.rows_written += len(chunk)
+        self.last_flush = time.monotonic()
+        return len(chunk)
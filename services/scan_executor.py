@@ -0,0 +1,96 @@
+import logging
+import threading
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, FIRST_EXCEPTION, wait
+from app import app
+from services.scan_metrics import span
+import config
+
+logger = logging.getLogger(__name__)
+
+class ScanExecutor:
+    """Class to run dorks for several platforms concurrently"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = dict(config.SCAN_MAX_WORKERS)
+        if max_workers:
+            self.max_workers.update(max_workers)
+        self.platforms = []
+        # Serializes completion callbacks so consumers need no locking of their own
+        self.callback_lock = threading.Lock()
+
+    def add_platform(self, platform, dorks, run_dork, on_dork=None, on_error=None):
+        """
+        Register the dorks to run for a platform
+
+        Args:
+            platform (str): 'google' or 'github'
+            dorks (list): Rendered dork dictionaries
+            run_dork (callable): Function executing a single dork and returning its results
+            on_dork (callable): Callback invoked with (dork, results) after each dork completes
+            on_error (callable): Callback invoked with (dork, exception) when a dork raises
+        """
+        self.platforms.append((platform, dorks, run_dork, on_dork, on_error))
+
+    def run(self):
+        """
+        Run every registered platform at the same time and wait for completion
+
+        Each platform gets its own bounded worker pool, so a scan takes as long as
+        its slowest platform. The first exception raised by any dork is re-raised.
+        """
+        if not self.platforms:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(self.platforms), thread_name_prefix='scan') as pool:
+            # Worker threads run in a copy of the caller's context, so they record into its scan profile
+            futures = [pool.submit(copy_context().run, self._run_platform, *platform) for platform in self.platforms]
+            for future in futures:
+                future.result()
+
+    def _run_platform(self, platform, dorks, run_dork, on_dork, on_error):
+        """
+        Run all dorks of a single platform through its worker pool
+
+        Dorks are submitted through a window of SCAN_QUEUED_PER_WORKER per
+        worker, and tasks hand their results to on_dork rather than keeping
+        them in their futures, so memory does not grow with the dork count.
+        """
+        workers = max(1, self.max_workers.get(platform, 1))
+        logger.info(f"Running {len(dorks)} {platform} dorks with {workers} workers")
+
+        def task(dork):
+            # Worker threads need their own application context for database access
+            with app.app_context():
+                try:
+                    with span('dork', platform):
+                        results = run_dork(dork)
+                except Exception as e:
+                    if on_error:
+                        with self.callback_lock:
+                            on_error(dork, e)
+                    raise
+                if on_dork:
+                    with self.callback_lock:
+                        on_dork(dork, results)
+
+        window = workers * config.SCAN_QUEUED_PER_WORKER
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'scan-{platform}')
+        pending = set()
+        try:
+            for dork in dorks:
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    # Stop submitting once a dork failed
+                    _raise_first_error(done)
+                pending.add(pool.submit(copy_context().run, task, dork))
+            done, _ = wait(pending, return_when=FIRST_EXCEPTION)
+            _raise_first_error(done)
+        finally:
+            # Drop queued dorks if a worker failed
+            pool.shutdown(wait=True, cancel_futures=True)
+
+def _raise_first_error(futures):
+    for future in futures:
+        if future.exception():
+            raise future.exception()
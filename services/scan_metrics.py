@@ -0,0 +1,480 @@
+import json
+import time
+import heapq
+import logging
+import datetime
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import config
+
+logger = logging.getLogger(__name__)
+
+# Profile of the scan the current thread or task is working for
+_current = ContextVar('scan_profile', default=None)
+
+class Histogram:
+    """Count, sum, maximum and bucket counts of a stage's durations"""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'sum', 'max')
+
+    def __init__(self, bounds=None):
+        self.bounds = tuple(bounds or config.SCAN_METRICS_BUCKETS)
+        self.buckets = [0] * (len(self.bounds) + 1)  # the last bucket counts values above every bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Record one duration"""
+        self.buckets[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def cumulative(self):
+        """
+        Bucket counts in Prometheus form
+
+        Returns:
+            list: (upper bound, observations at or below it) pairs, ending with (inf, count)
+        """
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.buckets):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, fraction):
+        """
+        Estimate a quantile by interpolating inside its bucket, like Prometheus' histogram_quantile
+
+        Args:
+            fraction (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated duration in seconds, capped at the largest observed
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        lower = 0.0
+        below = 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float('inf'):
+                    return self.max
+                inside = total - below
+                estimate = lower + (bound - lower) * ((rank - below) / inside if inside else 0.0)
+                return min(estimate, self.max)
+            lower, below = bound, total
+        return self.max
+
+    def add(self, other, sign=1):
+        """
+        Add the observations of another histogram with the same bounds, or remove them with sign=-1
+
+        The maximum only ever grows, since a removed maximum cannot be recovered.
+        """
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += sign * count
+        self.count += sign * other.count
+        self.sum += sign * other.sum
+        if other.max > self.max:
+            self.max = other.max
+
+    @classmethod
+    def from_dict(cls, summary):
+        """
+        Rebuild a histogram from its to_dict() summary
+
+        Returns:
+            Histogram: The histogram, or None if it was recorded with bounds other than SCAN_METRICS_BUCKETS
+        """
+        histogram = cls()
+        cumulative = list(summary['buckets'].values())
+        if list(summary['buckets']) != [repr(bound) for bound in histogram.bounds] + ['+Inf']:
+            return None
+        histogram.buckets = [total - previous for total, previous in zip(cumulative, [0] + cumulative[:-1])]
+        histogram.count = summary['count']
+        histogram.sum = summary['total']
+        histogram.max = summary['max']
+        return histogram
+
+    def to_dict(self):
+        """Summary of the histogram, with bucket counts keyed by upper bound"""
+        return {
+            'count': self.count,
+            'total': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'max': round(self.max, 6),
+            'buckets': {('+Inf' if bound == float('inf') else repr(bound)): total
+                        for bound, total in self.cumulative()}
+        }
+
+class ScanProfile:
+    """
+    Per-stage timings of one scan run
+
+    Every span recorded while the profile is active lands in a histogram
+    keyed by stage and platform, and the slowest spans that carry a detail
+    (such as the dork) are kept for each stage. Stages run concurrently in
+    the scan's worker threads, so stage totals are busy time and can add up
+    to more than the scan's wall time.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.started_at = datetime.datetime.utcnow()
+        self.started = time.perf_counter()
+        self.finished = None
+        self.status = None
+        self.stages = {}
+        self.slowest = {}
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+
+    def observe(self, stage, platform, seconds, detail=None):
+        """
+        Record a span of a stage
+
+        Args:
+            stage (str): Stage name, such as 'backend' or 'db_write'
+            platform (str): 'google', 'github', or '' for stages shared by both
+            seconds (float): Duration of the span
+            detail (str): What the span worked on; kept only for the slowest spans
+        """
+        key = (stage, platform)
+        with self.lock:
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram()
+            histogram.observe(seconds)
+            if detail is not None:
+                slowest = self.slowest.setdefault(key, [])
+                if len(slowest) < config.SCAN_METRICS_SLOWEST:
+                    heapq.heappush(slowest, (seconds, detail))
+                elif seconds > slowest[0][0]:
+                    heapq.heapreplace(slowest, (seconds, detail))
+
+    def finish(self, status):
+        """Stop the wall clock and record how the run ended"""
+        self.finished = time.perf_counter()
+        self.status = status
+
+    def flush_due(self):
+        """
+        Check whether a running scan should store its profile again
+
+        Returns:
+            bool: True once SCAN_PROFILE_FLUSH_INTERVAL has elapsed since the last check that returned True
+        """
+        now = time.monotonic()
+        if now - self.last_flush < config.SCAN_PROFILE_FLUSH_INTERVAL:
+            return False
+        self.last_flush = now
+        return True
+
+    def to_dict(self):
+        """
+        Snapshot of the profile
+
+        Returns:
+            dict: Wall time and one entry per stage and platform, busiest first
+        """
+        wall_time = (self.finished or time.perf_counter()) - self.started
+        with self.lock:
+            stages = [dict(histogram.to_dict(), stage=stage, platform=platform,
+                           slowest=[{'seconds': round(seconds, 6), 'detail': detail}
+                                    for seconds, detail in sorted(self.slowest.get((stage, platform), ()), reverse=True)])
+                      for (stage, platform), histogram in self.stages.items()]
+        stages.sort(key=lambda entry: entry['total'], reverse=True)
+        return {
+            'started_at': self.started_at.isoformat(),
+            'wall_time': round(wall_time, 6),
+            'status': self.status or 'running',
+            'stages': stages
+        }
+
+    def to_json(self):
+        """Snapshot of the profile as stored on the scan session"""
+        return json.dumps(self.to_dict())
+
+class MetricsRegistry:
+    """
+    Process-wide stage histograms and scan counters, exported for Prometheus
+
+    Each process counts only the scans it runs itself; per-scan profiles of
+    scans run elsewhere are read from their scan sessions, and /metrics sums
+    those stored profiles (StoredProfiles) instead of using this registry.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.scans = {}
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, platform, seconds):
+        """Record a span of a stage in the process totals"""
+        key = (stage, platform)
+        with self.lock:
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram()
+            histogram.observe(seconds)
+
+    def start(self, profile):
+        """Track a scan run by this process"""
+        with self.lock:
+            self.active[profile.session_id] = profile
+
+    def end(self, profile):
+        """Stop tracking a scan and count it under its final status"""
+        with self.lock:
+            if self.active.get(profile.session_id) is profile:
+                del self.active[profile.session_id]
+            if profile.status:
+                self.scans[profile.status] = self.scans.get(profile.status, 0) + 1
+
+    def profile(self, session_id):
+        """
+        Return the live profile of a scan running in this process
+
+        Returns:
+            ScanProfile: The profile, or None if this process is not running the scan
+        """
+        return self.active.get(session_id)
+
+    def prometheus(self, families=()):
+        """
+        Render the registry, plus extra metric families, in the Prometheus text format
+
+        Args:
+            families (list): (name, type, help, samples) tuples, where samples are (labels dict, value) pairs
+
+        Returns:
+            str: Exposition text, version 0.0.4
+        """
+        with self.lock:
+            stages = [(key, histogram.cumulative(), histogram.sum, histogram.count)
+                      for key, histogram in sorted(self.stages.items())]
+            scans = sorted(self.scans.items())
+            active = len(self.active)
+        return _exposition(stages, [
+            ('dorkrecon_scans_total', 'counter', 'Scans finished by this process, by final status',
+             [({'status': status}, count) for status, count in scans]),
+            ('dorkrecon_scans_running', 'gauge', 'Scans running in this process', [({}, active)])
+        ] + list(families))
+
+class StoredProfiles:
+    """
+    Stage histograms summed over the profiles stored on scan sessions
+
+    Scans run in worker processes, so the web process's registry never sees
+    their spans. Every scan stores its profile on its session while it runs
+    (every SCAN_PROFILE_FLUSH_INTERVAL) and when it ends, and this keeps a
+    running sum of those profiles across every process that runs scans.
+
+    Sessions are tracked by a marker, their (status, completed_at). A refresh
+    reads again only the profiles whose marker changed, plus those of running
+    scans, so its cost follows the number of changed sessions rather than
+    all stored ones. A resumed session counts with its latest run only.
+    """
+
+    def __init__(self):
+        self.sessions = {}  # session_id -> (marker, status, {(stage, platform): Histogram})
+        self.stages = {}
+        self.scans = {}
+        self.running = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, markers, load):
+        """
+        Bring the sums up to date with the stored profiles
+
+        Args:
+            markers (dict): Session ID -> (status, completed_at) of every session with a stored profile
+            load (callable): Takes a list of session IDs and returns {session ID: profile JSON}
+
+        Returns:
+            int: Number of profiles read
+        """
+        with self.lock:
+            self.running = sum(1 for status, _ in markers.values() if status == 'running')
+            for session_id in [session_id for session_id in self.sessions if session_id not in markers]:
+                self._remove(session_id)
+            stale = [session_id for session_id, marker in markers.items()
+                     if marker[0] == 'running' or self.sessions.get(session_id, (None,))[0] != marker]
+            if not stale:
+                return 0
+            for session_id, profile in load(stale).items():
+                self._remove(session_id)
+                try:
+                    profile = json.loads(profile)
+                except (TypeError, ValueError):
+                    continue
+                histograms = {}
+                for entry in profile.get('stages', ()):
+                    histogram = Histogram.from_dict(entry)
+                    if histogram is not None:
+                        histograms[(entry['stage'], entry['platform'])] = histogram
+                status = profile.get('status', 'running')
+                self.sessions[session_id] = (markers[session_id], status, histograms)
+                self._add(status, histograms, 1)
+            return len(stale)
+
+    def _add(self, status, histograms, sign):
+        """Add a session's contribution to the sums, or remove it with sign=-1; called with the lock held"""
+        self.scans[status] = self.scans.get(status, 0) + sign
+        for key, histogram in histograms.items():
+            total = self.stages.get(key)
+            if total is None:
+                total = self.stages[key] = Histogram()
+            total.add(histogram, sign)
+
+    def _remove(self, session_id):
+        """Drop a session's contribution; called with the lock held"""
+        entry = self.sessions.pop(session_id, None)
+        if entry is not None:
+            self._add(entry[1], entry[2], -1)
+
+    def prometheus(self, families=()):
+        """
+        Render the summed histograms, plus extra metric families, in the Prometheus text format
+
+        Args:
+            families (list): (name, type, help, samples) tuples, where samples are (labels dict, value) pairs
+
+        Returns:
+            str: Exposition text, version 0.0.4
+        """
+        with self.lock:
+            stages = [(key, histogram.cumulative(), histogram.sum, histogram.count)
+                      for key, histogram in sorted(self.stages.items()) if histogram.count]
+            scans = sorted((status, count) for status, count in self.scans.items() if count and status != 'running')
+            running = self.running
+        return _exposition(stages, [
+            ('dorkrecon_scans_total', 'counter', 'Finished scans with a stored profile, by the status of their latest run',
+             [({'status': status}, count) for status, count in scans]),
+            ('dorkrecon_scans_running', 'gauge', 'Scans running in any process', [({}, running)])
+        ] + list(families))
+
+def _exposition(stages, families):
+    """
+    Format stage histograms and metric families in the Prometheus text format
+
+    Args:
+        stages (list): ((stage, platform), cumulative buckets, sum, count) tuples
+        families (list): (name, type, help, samples) tuples, where samples are (labels dict, value) pairs
+
+    Returns:
+        str: Exposition text, version 0.0.4
+    """
+    lines = [
+        '# HELP dorkrecon_stage_seconds Time spent in each scan stage',
+        '# TYPE dorkrecon_stage_seconds histogram'
+    ]
+    for (stage, platform), cumulative, total, count in stages:
+        labels = {'stage': stage, 'platform': platform}
+        for bound, observed in cumulative:
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"dorkrecon_stage_seconds_bucket{_labels(dict(labels, le=le))} {observed}")
+        lines.append(f"dorkrecon_stage_seconds_sum{_labels(labels)} {total!r}")
+        lines.append(f"dorkrecon_stage_seconds_count{_labels(labels)} {count}")
+
+    for name, kind, description, samples in families:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels)} {value!r}")
+    return '\n'.join(lines) + '\n'
+
+def _labels(labels):
+    """Format a label set, escaping values as the exposition format requires"""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+registry = MetricsRegistry()
+
+# Stage histograms of every process's scans, summed from their stored profiles for /metrics
+stored_profiles = StoredProfiles()
+
+def observe(stage, seconds, platform='', detail=None):
+    """
+    Record a span in the process totals and in the active scan's profile, if any
+
+    Args:
+        stage (str): Stage name
+        seconds (float): Duration of the span
+        platform (str): 'google', 'github', or '' for stages shared by both
+        detail (str): What the span worked on, kept for the profile's slowest spans
+    """
+    if not config.SCAN_METRICS_ENABLED:
+        return
+    registry.observe(stage, platform, seconds)
+    profile = _current.get()
+    if profile is not None:
+        profile.observe(stage, platform, seconds, detail)
+
+class Span:
+    """Context manager timing one span of a stage"""
+
+    __slots__ = ('stage', 'platform', 'detail', 'started')
+
+    def __init__(self, stage, platform='', detail=None):
+        self.stage = stage
+        self.platform = platform
+        self.detail = detail
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        observe(self.stage, time.perf_counter() - self.started, self.platform, self.detail)
+        return False
+
+def span(stage, platform='', detail=None):
+    """
+    Time the enclosed block as a span of a stage
+
+    Args:
+        stage (str): Stage name
+        platform (str): 'google', 'github', or '' for stages shared by both
+        detail (str): What the span works on, kept for the profile's slowest spans
+
+    Returns:
+        Span: Context manager
+    """
+    return Span(stage, platform, detail)
+
+@contextmanager
+def profiling(session_id):
+    """
+    Collect the spans of a scan run into a new ScanProfile
+
+    Spans recorded by this thread, and by worker threads started from it
+    with a copy of its context, go to the profile until the block exits.
+
+    Args:
+        session_id (int): Scan session being run
+
+    Yields:
+        ScanProfile: The profile
+    """
+    profile = ScanProfile(session_id)
+    registry.start(profile)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        registry.end(profile)
@@ -0,0 +1,135 @@
+import os
+import time
+import socket
+import logging
+import threading
+from app import app, db
+from models import ScanSession
+from services.job_queue import JobQueue
+from services.progress_store import get_progress_store
+from services.query_cache import query_cache
+from services.github_client import token_pool
+import config
+
+logger = logging.getLogger(__name__)
+
+class ScanWorker:
+    """Class running queued scan jobs until asked to stop"""
+
+    def __init__(self, worker_id, stop_event, queue=None):
+        self.worker_id = worker_id
+        self.stop_event = stop_event
+        self.queue = queue or JobQueue()
+        self.last_sweep = 0.0
+
+    def run(self):
+        """Claim and run jobs until the stop event is set; a running scan is always finished first"""
+        logger.info(f"Scan worker {self.worker_id} started")
+        with app.app_context():
+            while not self.stop_event.is_set():
+                try:
+                    self._sweep()
+                    job = self.queue.claim(self.worker_id)
+                except Exception as e:
+                    logger.error(f"Scan worker {self.worker_id} could not claim a job: {str(e)}")
+                    job = None
+                
+                if job is None:
+                    self.stop_event.wait(config.SCAN_JOB_POLL_INTERVAL)
+                    continue
+                self.run_job(job)
+        logger.info(f"Scan worker {self.worker_id} stopped")
+
+    def _sweep(self):
+        """Requeue expired jobs, at most twice per lease period"""
+        now = time.monotonic()
+        if now - self.last_sweep >= config.SCAN_JOB_LEASE / 2:
+            self.last_sweep = now
+            self.queue.requeue_expired()
+
+    def run_job(self, job):
+        """
+        Run one claimed job, renewing its lease until the scan ends
+
+        Args:
+            job (Row): Claimed job (id, scan_session_id, attempts)
+        """
+        # Imported here: routes is loaded by app, after this module's imports
+        from routes import execute_scan
+        
+        session = db.session.get(ScanSession, job.scan_session_id)
+        if session is None:
+            self.queue.finish(job.id, self.worker_id, 'failed', 'Scan session no longer exists')
+            return
+        
+        if job.attempts > 1:
+            # A previous worker died mid-scan; execute_scan resumes from its dork checkpoints
+            logger.warning(f"Resuming scan session {session.id} (attempt {job.attempts})")
+            get_progress_store().update(session.id, status='queued',
+                                        current_step=f'Resuming scan (attempt {job.attempts})...')
+        
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._keep_lease, args=(job.id, finished),
+                                     name=f"lease-{job.id}", daemon=True)
+        heartbeat.start()
+        try:
+            execute_scan(session.id, session.target, session.platforms, session.categories, session.target_type,
+                         bool(session.cache_only), bool(session.delta))
+        finally:
+            finished.set()
+            heartbeat.join()
+            query_cache.flush_stats()
+            token_pool.flush()
+        
+        db.session.refresh(session)
+        if session.status == 'completed':
+            self.queue.finish(job.id, self.worker_id, 'done')
+        else:
+            self.queue.finish(job.id, self.worker_id, 'failed', session.error_message)
+
+    def _keep_lease(self, job_id, finished):
+        """Renew the lease on a running job every third of the lease period"""
+        with app.app_context():
+            while not finished.wait(config.SCAN_JOB_LEASE / 3):
+                try:
+                    if not self.queue.heartbeat(job_id, self.worker_id):
+                        logger.warning(f"Scan worker {self.worker_id} lost the lease on job {job_id}")
+                        return
+                except Exception as e:
+                    logger.error(f"Could not renew lease on job {job_id}: {str(e)}")
+
+def worker_id(suffix=None):
+    """
+    Build an identifier unique to this host and process
+
+    Args:
+        suffix (str): Extra part distinguishing workers inside one process
+
+    Returns:
+        str: Worker identifier
+    """
+    parts = [socket.gethostname(), str(os.getpid())]
+    if suffix is not None:
+        parts.append(str(suffix))
+    return ':'.join(parts)
+
+def start_embedded_workers(count, stop_event=None):
+    """
+    Run scan workers as daemon threads of the current process
+
+    Meant for the single-process development server; deployments run
+    python -m worker alongside the web tier instead.
+
+    Args:
+        count (int): Number of worker threads
+        stop_event (threading.Event): Event stopping the workers. A new one is created if None.
+
+    Returns:
+        threading.Event: Event that stops the workers when set
+    """
+    stop_event = stop_event or threading.Event()
+    for index in range(count):
+        thread = threading.Thread(target=ScanWorker(worker_id(index), stop_event).run,
+                                  name=f"scan-worker-{index}", daemon=True)
+        thread.start()
+    return stop_event
@@ -0,0 +1,292 @@
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import Protocol, runtime_checkable
+from services.github_client import get_github_client, token_pool
+import config
+
+logger = logging.getLogger(__name__)
+
+@runtime_checkable
+class SearchBackend(Protocol):
+    """
+    Source of search results for the dorkers
+
+    A backend returns result dictionaries with at least 'url' and 'snippet';
+    the dorker labels them with the dork and category. `paced` backends are
+    throttled by the platform's RateLimiter, and only `cacheable` backends
+    have their responses stored in the query cache.
+    """
+
+    name: str
+    paced: bool
+    cacheable: bool
+
+    def search(self, platform, dork, target, target_type=None):
+        """
+        Run one rendered dork
+
+        Args:
+            platform (str): 'google' or 'github'
+            dork (RenderedDork): Rendered dork record
+            target (str): Target domain or organization
+            target_type (str): 'domain' or 'organization'
+
+        Returns:
+            list: Result dictionaries
+        """
+        ...
+
+class ExampleBackend:
+    """Backend generating random example results, for demonstrations without search access"""
+
+    name = 'example'
+    paced = True
+    cacheable = True
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def search(self, platform, dork, target, target_type=None):
+        if platform == 'google':
+            return self._google_results(dork, target)
+        return self._github_results(dork, target, target_type or 'organization')
+
+    def _google_results(self, dork, domain):
+        """Generate example Google results"""
+        results = []
+        query = dork.template
+        category = dork.category
+        
+        logger.info(f"Processing Google dork: {query}")
+        
+        # Generate between 0-3 sample results per dork
+        num_results = self.random.randint(0, 3)
+        
+        for i in range(num_results):
+            # Generate simulated results based on category
+            if category == "Secrets":
+                url = f"https://{domain}/config.{self.random.choice(['env', 'json', 'yml'])}"
+                snippet = "DB_PASSWORD=... AWS_SECRET_KEY=... Contains sensitive information."
+            elif category == "Admin Panels":
+                url = f"https://{domain}/{self.random.choice(['admin', 'login', 'dashboard', 'cp'])}"
+                snippet = "Login | Admin Dashboard. Enter your credentials to access the administration panel."
+            elif category == "Dev/Test":
+                url = f"https://{self.random.choice(['dev', 'staging', 'test'])}.{domain}/"
+                snippet = "Development environment. This site is for testing purposes only."
+            elif category == "Index Pages":
+                url = f"https://{domain}/{self.random.choice(['backup', 'files', 'old'])}"
+                snippet = "Index of /backup. Parent Directory. config_old.zip. database.sql."
+            elif category == "Files / Configs":
+                url = f"https://{domain}/wp-content/{self.random.choice(['uploads', 'backup', 'config'])}"
+                snippet = "Contains configuration files and database credentials."
+            else:
+                url = f"https://{domain}/{category.lower().replace(' ', '-')}"
+                snippet = f"Found {category.lower()} content that may contain sensitive information."
+            
+            results.append({
+                'dork': query,
+                'category': category,
+                'url': url,
+                'snippet': snippet
+            })
+        
+        logger.info(f"Generated {len(results)} example results for query: {query}")
+        return results
+
+    def _github_results(self, dork, target, target_type):
+        """Generate example GitHub results"""
+        results = []
+        query = dork.template
+        category = dork.category
+        
+        # Determine repository name format based on target type
+        if target_type == 'organization':
+            repo_format = f"{target}/{self.random.choice(['api', 'web', 'app', 'dashboard', 'backend', 'config', 'utils'])}"
+        else:
+            domain_parts = target.split('.')
+            org_name = domain_parts[0]
+            repo_format = f"{org_name}/{self.random.choice(['api', 'web', 'app', 'backend', 'config'])}"
+        
+        # Generate between 0-2 sample results per dork
+        num_results = self.random.randint(0, 2)
+        
+        for i in range(num_results):
+            # Generate file path and content based on the category
+            if category == "Secrets":
+                file_name = self.random.choice(['config.js', '.env', 'settings.py', 'credentials.json'])
+                file_path = f"src/config/{file_name}"
+                if "API_KEY" in query:
+                    snippet = "API_KEY = '123xyzabc...'\n// TODO: Remove before committing"
+                elif "DB_PASSWORD" in query:
+                    snippet = "DB_PASSWORD = 'dev_password_123'\nDB_USER = 'admin'"
+                else:
+                    snippet = "SECRET_KEY = 'abc123xyz...'\n// Please rotate this key regularly"
+            
+            elif category == "Admin Panels":
+                file_name = self.random.choice(['AdminController.js', 'admin_routes.py', 'AdminPanel.vue'])
+                file_path = f"src/admin/{file_name}"
+                snippet = "// Administrative access management\nconst ADMIN_CREDENTIALS = { user: 'admin', defaultPassword: 'change_me_123' };"
+            
+            elif category == "Dev/Test":
+                file_name = self.random.choice(['test_config.js', 'development.env', 'staging.json'])
+                file_path = f"config/{file_name}"
+                snippet = "// Development environment settings\nMODE = 'development'\nDEBUG = true\nTEST_ACCOUNT = {email: 'test@example.com', password: 'test123'}"
+            
+            elif category == "Files / Configs":
+                file_name = self.random.choice(['database.config.js', 'app.config.json', 'settings.yml'])
+                file_path = f"config/{file_name}"
+                snippet = "{\n  \"database\": {\n    \"host\": \"localhost\",\n    \"username\": \"dbuser\",\n    \"password\": \"dbp@ss123\"\n  }\n}"
+            
+            elif category == "Index Pages":
+                file_name = "index.html"
+                file_path = f"public/{file_name}"
+                snippet = "<!DOCTYPE html>\n<html>\n<head>\n  <title>Project Index</title>\n</head>\n<body>\n  <h1>Project Files</h1>\n  <ul>\n    <li><a href=\"configs/\">Configuration Files</a></li>\n  </ul>\n</body>\n</html>"
+            
+            else:
+                file_name = self.random.choice(['README.md', 'docs.md', 'CONTRIBUTING.md'])
+                file_path = file_name
+                snippet = f"# {repo_format}\nInternal project documentation.\nPlease see the [configuration guide](docs/config.md) for setup instructions."
+            
+            # Create GitHub-style result
+            repo_name = f"{repo_format}-{self.random.randint(1, 100)}" if i > 0 else repo_format
+            html_url = f"https://github.com/{repo_name}/blob/main/{file_path}"
+            
+            results.append({
+                'dork': query,
+                'category': category,
+                'url': html_url,
+                'snippet': snippet
+            })
+        
+        return results
+
+class GithubApiBackend:
+    """Backend running GitHub code searches through the process-wide client"""
+
+    name = 'github'
+    paced = False  # the token pool spaces searches per token
+    cacheable = True
+
+    def search(self, platform, dork, target, target_type=None):
+        results = get_github_client().search_code(dork.template)
+        token_pool.flush_due()
+        return results
+
+class FixtureBackend:
+    """
+    Deterministic local backend for load tests and reproducible runs
+
+    Queries found in the recordings are answered with the recorded results.
+    Any other query gets between min_results and max_results generated
+    results, derived from a hash of the seed, platform and query, so every
+    run of the same scan sees the same findings. Each search sleeps for
+    `latency` seconds to stand in for the network. The backend counts its
+    searches and the time spent in them, so load tests can tell backend time
+    from pipeline time.
+    """
+
+    name = 'fixture'
+    paced = False
+    cacheable = False  # fixture responses must never be served to real scans
+
+    # Generated snippets cycle through these, so severity rules see a realistic mix
+    SNIPPETS = (
+        "DB_PASSWORD=hunter2 DB_USER=admin",
+        "Index of /backup. Parent Directory. dump.sql",
+        "Login | Admin Dashboard. Enter your credentials.",
+        "API_KEY = '0123456789abcdef'",
+        "Development environment. This site is for testing purposes only.",
+        "Internal project documentation.",
+    )
+
+    def __init__(self, recordings=None, latency=None, min_results=None, max_results=None, seed=None):
+        self.recordings = recordings or {}  # platform -> {query: [result, ...]}
+        self.latency = config.SEARCH_FIXTURE_LATENCY if latency is None else latency
+        default_min, default_max = config.SEARCH_FIXTURE_RESULTS
+        self.min_results = default_min if min_results is None else min_results
+        self.max_results = default_max if max_results is None else max_results
+        self.seed = config.SEARCH_FIXTURE_SEED if seed is None else seed
+        self.lock = threading.Lock()
+        self.searches = 0
+        self.search_time = 0.0
+
+    @classmethod
+    def load(cls, path, **options):
+        """
+        Create a fixture backend serving the recordings in a JSON file
+
+        Args:
+            path (str): File mapping platform to {query: [result, ...]}
+            **options: Other FixtureBackend arguments
+
+        Returns:
+            FixtureBackend: The backend
+        """
+        with open(path, encoding='utf-8') as f:
+            recordings = json.load(f)
+        logger.info(f"Loaded fixture recordings for {sum(len(queries) for queries in recordings.values())} queries")
+        return cls(recordings, **options)
+
+    def search(self, platform, dork, target, target_type=None):
+        started = time.perf_counter()
+        results = self._respond(platform, dork, target)
+        with self.lock:
+            self.searches += 1
+            self.search_time += time.perf_counter() - started
+        return results
+
+    def _respond(self, platform, dork, target):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        recorded = self.recordings.get(platform, {}).get(dork.template)
+        if recorded is not None:
+            return [dict(result) for result in recorded]
+
+        digest = hashlib.sha1(f"{self.seed}:{platform}:{dork.template}".encode('utf-8')).hexdigest()
+        count = self.min_results + int(digest[:8], 16) % (self.max_results - self.min_results + 1)
+        if platform == 'google':
+            base = f"https://{target}/fixture/{digest[:12]}"
+        else:
+            base = f"https://github.com/{target.split('.')[0]}/fixture/blob/main/{digest[:12]}"
+        return [{
+            'url': f"{base}/{i}",
+            'snippet': self.SNIPPETS[int(digest[8 + i % 32], 16) % len(self.SNIPPETS)]
+        } for i in range(count)]
+
+_fixture_backend = None
+
+def get_search_backend(platform, name=None):
+    """
+    Choose the search backend for a platform
+
+    Args:
+        platform (str): 'google' or 'github'
+        name (str): 'auto', 'example' or 'fixture'; defaults to SEARCH_BACKEND
+
+    Returns:
+        SearchBackend: The backend. 'auto' searches GitHub when tokens are
+            configured and generates example results otherwise.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    global _fixture_backend
+    name = name or config.SEARCH_BACKEND
+    if name == 'fixture':
+        # Shared, so recordings are read once per process
+        if _fixture_backend is None:
+            _fixture_backend = FixtureBackend.load(config.SEARCH_FIXTURE_PATH) if config.SEARCH_FIXTURE_PATH \
+                else FixtureBackend()
+        return _fixture_backend
+    if name == 'example':
+        return ExampleBackend()
+    if name == 'auto':
+        if platform == 'github' and len(token_pool.load()) > 0:
+            return GithubApiBackend()
+        return ExampleBackend()
+    raise ValueError(f"Unknown search backend: {name}")
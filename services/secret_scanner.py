@@ -0,0 +1,233 @@
+import re
+import math
+import json
+import logging
+import threading
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from services.severity import SEVERITY_RANK
+from services.scan_metrics import span
+import config
+
+logger = logging.getLogger(__name__)
+
+DIGITS = frozenset('0123456789')
+LOWERCASE = frozenset('abcdefghijklmnopqrstuvwxyz')
+UPPERCASE = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+def shannon_entropy(text):
+    """Shannon entropy of a string in bits per character"""
+    length = len(text)
+    return -sum(count / length * math.log2(count / length) for count in Counter(text).values())
+
+class SecretScanner:
+    """
+    Detects secrets in result snippets with a compiled rule set
+
+    Every pattern rule becomes a named group of one combined regex, so a
+    snippet is scanned in a single pass. Tokens that no rule claimed are
+    then checked for Shannon entropy: long base64-like strings mixing
+    digits and both letter cases, and long hex strings, are reported under
+    the entropy rule's ID.
+    """
+
+    def __init__(self, rules):
+        self.severities = {}
+        # Regex group name -> rule ID; rule IDs need not be valid group names
+        self.group_ids = {}
+        groups = []
+        for index, rule in enumerate(rules.get('rules', [])):
+            group = f"r{index}"
+            self.group_ids[group] = rule['id']
+            self.severities[rule['id']] = rule['severity']
+            groups.append(f"(?P<{group}>{rule['pattern']})")
+        self.pattern = re.compile('|'.join(groups)) if groups else None
+
+        entropy = rules.get('entropy')
+        self.entropy = entropy
+        if entropy:
+            self.severities[entropy['id']] = entropy['severity']
+            self.candidates = re.compile(f"[A-Za-z0-9+/_-]{{{entropy['min_length']},}}")
+
+    @classmethod
+    def from_file(cls, path=None):
+        """
+        Build a scanner from a rules file
+
+        Args:
+            path (str): JSON rules file; defaults to SECRET_RULES_PATH
+
+        Returns:
+            SecretScanner: The scanner
+        """
+        path = path or config.SECRET_RULES_PATH
+        with open(path, 'r') as f:
+            rules = json.load(f)
+        logger.info(f"Loaded {len(rules.get('rules', []))} secret rules from {path}")
+        return cls(rules)
+
+    def scan(self, snippet):
+        """
+        Find the secret rules a snippet matches
+
+        Args:
+            snippet (str): Result snippet
+
+        Returns:
+            list: Sorted IDs of the matching rules, empty if none
+        """
+        if not snippet:
+            return []
+
+        found = set()
+        spans = []
+        if self.pattern is not None:
+            group_ids = self.group_ids
+            for match in self.pattern.finditer(snippet):
+                found.add(group_ids[match.lastgroup])
+                spans.append(match.span())
+
+        if self.entropy and self.entropy['id'] not in found:
+            for match in self.candidates.finditer(snippet):
+                start, end = match.span()
+                # Tokens a pattern rule already reported are not counted twice
+                if any(start >= span_start and end <= span_end for span_start, span_end in spans):
+                    continue
+                if self._high_entropy(match.group()):
+                    found.add(self.entropy['id'])
+                    break
+
+        return sorted(found)
+
+    def _high_entropy(self, token):
+        entropy = self.entropy
+        characters = set(token)
+        if characters <= HEX_DIGITS:
+            return len(token) >= entropy['hex_min_length'] and shannon_entropy(token) >= entropy['hex_threshold']
+        if not (characters & DIGITS and characters & LOWERCASE and characters & UPPERCASE):
+            return False
+        return shannon_entropy(token) >= entropy['base64_threshold']
+
+    def scan_batch(self, snippets):
+        """
+        Scan many snippets
+
+        Args:
+            snippets (list): Result snippets
+
+        Returns:
+            list: Matching rule IDs of each snippet, in order
+        """
+        scan = self.scan
+        return [scan(snippet) for snippet in snippets]
+
+    def escalate(self, severity, rule_ids):
+        """
+        Raise a severity to the highest severity of the matched rules
+
+        Args:
+            severity (str): Severity assigned by the classifier
+            rule_ids (list): IDs returned by scan()
+
+        Returns:
+            str: The resulting severity
+        """
+        for rule_id in rule_ids or ():
+            rule_severity = self.severities.get(rule_id, severity)
+            if SEVERITY_RANK[rule_severity] > SEVERITY_RANK[severity]:
+                severity = rule_severity
+        return severity
+
+_scanner = None
+_scanner_lock = threading.Lock()
+
+def get_scanner():
+    """
+    Process-wide scanner, built from the rules file on first use
+
+    Returns:
+        SecretScanner: The scanner
+    """
+    global _scanner
+    if _scanner is None:
+        with _scanner_lock:
+            if _scanner is None:
+                _scanner = SecretScanner.from_file()
+    return _scanner
+
+def _scan_in_worker(snippets):
+    """Task run by SnippetScanPool processes"""
+    return get_scanner().scan_batch(snippets)
+
+class SnippetScanPool:
+    """
+    Scans snippets in separate processes
+
+    Regex matching holds the GIL, so the scan executor's threads cannot
+    scan in parallel. Each pool process builds its own scanner from the
+    rules file once.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or config.SECRET_SCAN_PROCESSES or multiprocessing.cpu_count()
+        # Spawned, so the workers start without the parent's threads and database connections
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'))
+
+    def scan(self, snippets):
+        """Scan one batch in a pool process and wait for it"""
+        return self.executor.submit(_scan_in_worker, snippets).result()
+
+    def scan_many(self, snippets, chunk_size=None):
+        """
+        Scan a large number of snippets spread over every pool process
+
+        Args:
+            snippets (list): Result snippets
+            chunk_size (int): Snippets per task; defaults to SECRET_SCAN_CHUNK_SIZE
+
+        Returns:
+            list: Matching rule IDs of each snippet, in order
+        """
+        chunk_size = chunk_size or config.SECRET_SCAN_CHUNK_SIZE
+        chunks = [snippets[i:i + chunk_size] for i in range(0, len(snippets), chunk_size)]
+        return [rule_ids for chunk in self.executor.map(_scan_in_worker, chunks) for rule_ids in chunk]
+
+    def close(self):
+        """Stop the pool processes"""
+        self.executor.shutdown()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def scan_results(results):
+    """
+    Annotate each result with the secret rules its snippet matches
+
+    Runs in the worker thread of the dork that produced the results. With
+    SECRET_SCAN_PROCESSES set, the batch is scanned in a process-wide
+    SnippetScanPool instead. The results may be shared with the query
+    cache, so they are copied rather than modified.
+
+    Args:
+        results (list): Result dictionaries
+
+    Returns:
+        list: Copies of the results with their rule IDs under 'secret_rules'
+    """
+    global _pool
+    if not config.SECRET_SCAN_ENABLED or not results:
+        return results
+
+    with span('secret_scan'):
+        snippets = [result.get('snippet') for result in results]
+        if config.SECRET_SCAN_PROCESSES > 0:
+            with _pool_lock:
+                if _pool is None:
+                    _pool = SnippetScanPool()
+            matches = _pool.scan(snippets)
+        else:
+            matches = get_scanner().scan_batch(snippets)
+
+    return [dict(result, secret_rules=rule_ids) for result, rule_ids in zip(results, matches)]
@@ -0,0 +1,174 @@
+import re
+import json
+import logging
+import threading
+from operator import itemgetter
+from services.scan_metrics import span
+import config
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ('low', 'medium', 'high')
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITIES)}
+
+class RuleError(Exception):
+    """Raised when a severity rules file is malformed"""
+
+class PlatformRules:
+    """Compiled severity rules of one platform"""
+
+    def __init__(self, rules, default):
+        self.default = default
+        # Lowercased category -> severity
+        self.categories = {}
+        for severity, categories in rules.get('categories', {}).items():
+            if severity not in SEVERITY_RANK:
+                raise RuleError(f"Unknown severity {severity!r}")
+            for category in categories:
+                self.categories[category.lower()] = severity
+        # Raw category -> severity, so each category is lowercased once
+        self.category_cache = {}
+
+        # Result field -> one regex with a named group per severity, highest severity first
+        patterns = {}
+        for rule in rules.get('keywords', []):
+            severity = rule['severity']
+            if severity not in SEVERITY_RANK:
+                raise RuleError(f"Unknown severity {severity!r}")
+            for field in rule.get('fields', ['dork']):
+                patterns.setdefault(field, {}).setdefault(severity, []).extend(rule['patterns'])
+        self.matchers = []
+        for field, by_severity in patterns.items():
+            groups = []
+            for severity in sorted(by_severity, key=SEVERITY_RANK.get, reverse=True):
+                # Longest keywords first, so overlapping alternatives match consistently
+                keywords = sorted(set(by_severity[severity]), key=len, reverse=True)
+                groups.append(f"(?P<{severity}>{'|'.join(re.escape(keyword) for keyword in keywords)})")
+            # With a single severity the first match decides, so search() is enough
+            self.matchers.append((field, re.compile('|'.join(groups), re.IGNORECASE), len(groups) == 1))
+        # Fields a severity depends on; results agreeing on them share a severity
+        self.key = itemgetter('category', *(field for field, _, _ in self.matchers))
+
+    def category_severity(self, category):
+        """Severity of a category from the lookup table"""
+        severity = self.category_cache.get(category)
+        if severity is None:
+            severity = self.category_cache[category] = self.categories.get(category.lower(), self.default)
+        return severity
+
+    def classify(self, result):
+        severity = self.category_cache.get(result['category']) or self.category_severity(result['category'])
+        if severity == 'high' or not self.matchers:
+            return severity
+
+        # Keyword rules can only raise the severity
+        rank = SEVERITY_RANK[severity]
+        for field, matcher, single in self.matchers:
+            text = result.get(field)
+            if not text:
+                continue
+            if single:
+                match = matcher.search(text)
+                if match is not None and SEVERITY_RANK[match.lastgroup] > rank:
+                    rank = SEVERITY_RANK[match.lastgroup]
+                continue
+            for match in matcher.finditer(text):
+                matched = SEVERITY_RANK[match.lastgroup]
+                if matched > rank:
+                    rank = matched
+                    if rank == SEVERITY_RANK['high']:
+                        return 'high'
+        return SEVERITIES[rank]
+
+    def classify_batch(self, results):
+        # Results of one dork share their dork and category, so most are classified once
+        key = self.key
+        classify = self.classify
+        seen = {}
+        severities = []
+        for result in results:
+            severity = seen.get(key(result))
+            if severity is None:
+                severity = seen[key(result)] = classify(result)
+            severities.append(severity)
+        return severities
+
+class SeverityClassifier:
+    """
+    Assigns a severity to each finding from a table of rules
+
+    A finding starts at the severity its category maps to, or the default.
+    Keyword rules then match the dork or snippet with one precompiled regex
+    per field and can raise the severity. Rules are read from a JSON file
+    once, so classifying a result costs a dictionary lookup and at most one
+    regex scan per field.
+    """
+
+    def __init__(self, rules):
+        self.default = rules.get('default', 'medium')
+        if self.default not in SEVERITY_RANK:
+            raise RuleError(f"Unknown default severity {self.default!r}")
+        self.platforms = {platform: PlatformRules(platform_rules, self.default)
+                          for platform, platform_rules in rules.get('platforms', {}).items()}
+        self.fallback = PlatformRules({}, self.default)
+
+    @classmethod
+    def from_file(cls, path=None):
+        """
+        Build a classifier from a rules file
+
+        Args:
+            path (str): JSON rules file; defaults to SEVERITY_RULES_PATH
+
+        Returns:
+            SeverityClassifier: The classifier
+        """
+        path = path or config.SEVERITY_RULES_PATH
+        with open(path, 'r') as f:
+            rules = json.load(f)
+        logger.info(f"Loaded severity rules for {', '.join(rules.get('platforms', {}))} from {path}")
+        return cls(rules)
+
+    def classify(self, platform, result):
+        """
+        Classify a single finding
+
+        Args:
+            platform (str): 'google' or 'github'
+            result (dict): Result dictionary with 'category', 'dork' and 'snippet'
+
+        Returns:
+            str: 'high', 'medium' or 'low'
+        """
+        return self.platforms.get(platform, self.fallback).classify(result)
+
+    def classify_batch(self, platform, results):
+        """
+        Classify every finding of one platform
+
+        Args:
+            platform (str): 'google' or 'github'
+            results (list): Result dictionaries
+
+        Returns:
+            list: Severity of each result, in order
+        """
+        with span('classify', platform):
+            return self.platforms.get(platform, self.fallback).classify_batch(results)
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    """
+    Process-wide classifier, built from the rules file on first use
+
+    Returns:
+        SeverityClassifier: The classifier
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = SeverityClassifier.from_file()
+    return _classifier
@@ -0,0 +1,55 @@
+import logging
+from sqlalchemy import event
+import config
+
+logger = logging.getLogger(__name__)
+
+def is_sqlite_file(url):
+    """
+    Check whether a database URL names a SQLite file, as opposed to a server or an in-memory database
+
+    Args:
+        url (URL): SQLAlchemy database URL
+
+    Returns:
+        bool: True for a SQLite file
+    """
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def apply_pragmas(dbapi_connection, pragmas=None):
+    """
+    Set pragmas on a new SQLite connection
+
+    Args:
+        dbapi_connection: sqlite3 connection
+        pragmas (dict): Pragma name -> value; defaults to SQLITE_PRAGMAS
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in (pragmas if pragmas is not None else config.SQLITE_PRAGMAS).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def configure_engine(engine):
+    """
+    Apply the SQLite profile selected by SQLITE_PROFILE to every connection an engine opens
+
+    WAL journaling is a property of the database file, but the other pragmas
+    only last for a connection, so they are set whenever the pool connects.
+
+    Args:
+        engine (Engine): SQLAlchemy engine
+
+    Returns:
+        bool: False if the engine is not a SQLite file or the profile is "default"
+    """
+    if config.SQLITE_PROFILE != 'production' or not is_sqlite_file(engine.url):
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection)
+
+    logger.info(f"Applied SQLite production profile to {engine.url.database}")
+    return True
@@ -0,0 +1,224 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from sqlalchemy import create_engine, event
+from app import db
+from services.sqlite_profile import configure_engine, is_sqlite_file
+import config
+
+logger = logging.getLogger(__name__)
+
+class DirectWrites:
+    """Runs each write in its own transaction on a pooled connection; used for database servers"""
+
+    @property
+    def engine(self):
+        """Engine the writes run on"""
+        return db.engine
+
+    def run(self, write):
+        """
+        Run a write and commit it
+
+        Args:
+            write (callable): Function taking a Connection and issuing the write's statements
+
+        Returns:
+            The value returned by write
+        """
+        with self.engine.begin() as connection:
+            return write(connection)
+
+    def submit(self, write):
+        """
+        Run a write whose caller does not wait for it; errors are logged rather than raised
+
+        Args:
+            write (callable): Function taking a Connection and issuing the write's statements
+        """
+        try:
+            self.run(write)
+        except Exception as e:
+            logger.warning(f"Database write failed: {str(e)}")
+
+    def stats(self):
+        """Counters of the write path"""
+        return {'mode': 'direct'}
+
+    def close(self):
+        """Nothing to stop"""
+
+class SqliteWriteQueue:
+    """
+    Funnels writes through one dedicated SQLite connection
+
+    SQLite lets one connection write at a time, and threads contending for
+    the lock fail with "database is locked" once busy_timeout runs out.
+    Instead, writers hand their statements to a single thread that owns the
+    only writing connection of this process, and wait for the commit.
+    Writes that queue up while a transaction runs are committed together in
+    the next one, each inside a savepoint so a failing write is rolled back
+    alone. Transactions start with BEGIN IMMEDIATE, so writers in other
+    processes wait for the lock up front rather than failing mid-transaction.
+    Readers keep using the regular pool and, in WAL mode, never wait.
+    """
+
+    def __init__(self, url, batch_size=None):
+        self.batch_size = batch_size or config.SQLITE_WRITE_BATCH
+        self.engine = create_engine(url, pool_size=1, max_overflow=0)
+        configure_engine(self.engine)
+
+        @event.listens_for(self.engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            # Transactions are begun below, not by the driver
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(self.engine, 'begin')
+        def on_begin(connection):
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+        self.jobs = queue.Queue()
+        self.writes = 0
+        self.failed = 0
+        self.transactions = 0
+        self.transaction_time = 0.0
+        self.connection = None
+        self.thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self.thread.start()
+
+    def run(self, write):
+        """
+        Queue a write and wait until it is committed
+
+        Args:
+            write (callable): Function taking a Connection and issuing the write's statements
+
+        Returns:
+            The value returned by write
+
+        Raises:
+            Exception: Whatever write raised, or the error that aborted its transaction
+        """
+        if threading.current_thread() is self.thread:
+            # A write issuing another write joins the running transaction
+            return write(self.connection)
+        future = Future()
+        self.jobs.put((write, future))
+        return future.result()
+
+    def submit(self, write):
+        """
+        Queue a write without waiting for it; errors are logged rather than raised
+
+        Writes commit in queue order, so a later run() sees every write submitted before it.
+
+        Args:
+            write (callable): Function taking a Connection and issuing the write's statements
+        """
+        future = Future()
+        future.add_done_callback(_log_failure)
+        self.jobs.put((write, future))
+
+    def _run(self):
+        with self.engine.connect() as connection:
+            self.connection = connection
+            while True:
+                jobs = [self.jobs.get()]
+                while len(jobs) < self.batch_size:
+                    try:
+                        jobs.append(self.jobs.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in jobs
+                jobs = [job for job in jobs if job is not None]
+                if jobs:
+                    self._commit(connection, jobs)
+                if stop:
+                    return
+
+    def _commit(self, connection, jobs):
+        """Run queued writes in one transaction and resolve their futures"""
+        outcomes = []
+        started = time.perf_counter()
+        try:
+            with connection.begin():
+                if len(jobs) == 1:
+                    # A lone write needs no savepoint; if it fails the transaction rolls back
+                    write, future = jobs[0]
+                    outcomes.append((future, write(connection), None))
+                else:
+                    for write, future in jobs:
+                        try:
+                            with connection.begin_nested():
+                                outcomes.append((future, write(connection), None))
+                        except Exception as e:
+                            outcomes.append((future, None, e))
+        except Exception as e:
+            logger.error(f"SQLite write transaction of {len(jobs)} writes failed: {str(e)}")
+            self.failed += len(jobs)
+            for _, future in jobs:
+                future.set_exception(e)
+            return
+        self.transactions += 1
+        self.transaction_time += time.perf_counter() - started
+        for future, result, error in outcomes:
+            self.writes += 1
+            if error is not None:
+                self.failed += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        """
+        Counters of the write queue
+
+        Returns:
+            dict: Writes, transactions, writes per transaction, failures and current queue depth
+        """
+        return {
+            'mode': 'queue',
+            'writes': self.writes,
+            'failed': self.failed,
+            'transactions': self.transactions,
+            'writes_per_transaction': round(self.writes / self.transactions, 2) if self.transactions else 0.0,
+            'transaction_time': round(self.transaction_time, 3),
+            'queued': self.jobs.qsize()
+        }
+
+    def close(self):
+        """Commit the writes already queued and stop the writer thread"""
+        self.jobs.put(None)
+        self.thread.join()
+        self.engine.dispose()
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.warning(f"Queued database write failed: {str(future.exception())}")
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """
+    Return the process-wide write path for scan writes
+
+    A SQLite file gets a SqliteWriteQueue unless SQLITE_SINGLE_WRITER is off;
+    other databases handle concurrent writers themselves and get DirectWrites.
+
+    Returns:
+        SqliteWriteQueue or DirectWrites: The write path
+    """
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                url = db.engine.url
+                if config.SQLITE_SINGLE_WRITER and is_sqlite_file(url):
+                    _write_queue = SqliteWriteQueue(url)
+                else:
+                    _write_queue = DirectWrites()
+                logger.info(f"Using {type(_write_queue).__name__} for scan writes")
+    return _write_queue
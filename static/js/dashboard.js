@@ -6,6 +6,10 @@
 let currentSessionId = null;
 let resultsTable = null;
 let allResults = [];
+let currentSession = null;
+let nextResultsCursor = null;
+let sessionsTable = null;
+let nextSessionsCursor = null;
 let activeFilters = {
     platform: 'all',
     category: 'all',
@@ -22,6 +26,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize the sessions table
     initializeSessionsTable();
     
+    // Show query cache effectiveness
+    loadCacheStats();
+    
     // If a session ID is provided, load that session
     if (sessionId) {
         loadSession(sessionId);
@@ -45,8 +52,10 @@ function initializeSessionsTable() {
     fetch('/api/sessions')
         .then(response => response.json())
         .then(data => {
+            nextSessionsCursor = data.next_cursor;
+            
             // Create sessions table
-            const sessionsTable = new DataTable('#sessions-table', {
+            sessionsTable = new DataTable('#sessions-table', {
                 data: data.sessions,
                 columns: [
                     { 
@@ -125,6 +134,11 @@ function initializeSessionsTable() {
                 const sessionId = $(this).data('session-id');
                 loadSession(sessionId);
             });
+            
+            // Older scans are fetched a page at a time
+            const button = document.getElementById('load-more-sessions-btn');
+            button.classList.toggle('d-none', !nextSessionsCursor);
+            button.addEventListener('click', loadMoreSessions);
         })
         .catch(error => {
             console.error('Error loading sessions:', error);
@@ -136,6 +150,55 @@ function initializeSessionsTable() {
         });
 }
 
+/**
+ * Fetch the next page of scan sessions and append it to the sessions table
+ */
+function loadMoreSessions() {
+    if (!sessionsTable || !nextSessionsCursor) return;
+    
+    const button = document.getElementById('load-more-sessions-btn');
+    button.disabled = true;
+    
+    fetch(`/api/sessions?cursor=${encodeURIComponent(nextSessionsCursor)}`)
+        .then(response => response.json())
+        .then(data => {
+            nextSessionsCursor = data.next_cursor;
+            sessionsTable.rows.add(data.sessions).draw(false);
+            
+            button.disabled = false;
+            button.classList.toggle('d-none', !nextSessionsCursor);
+        })
+        .catch(error => {
+            console.error('Error loading more sessions:', error);
+            button.disabled = false;
+        });
+}
+
+/**
+ * Load query cache hit/miss counters into the cache card
+ */
+function loadCacheStats() {
+    const container = document.getElementById('cache-stats');
+    if (!container) return;
+    
+    fetch('/api/cache/stats')
+        .then(response => response.json())
+        .then(stats => {
+            if (!stats.enabled) {
+                container.innerHTML = '<div class="col text-muted">Query cache is disabled</div>';
+                return;
+            }
+            document.getElementById('cache-hits').textContent = stats.memory_hits + stats.disk_hits;
+            document.getElementById('cache-misses').textContent = stats.misses;
+            document.getElementById('cache-hit-rate').textContent = `${(stats.hit_rate * 100).toFixed(1)}%`;
+            document.getElementById('cache-entries').textContent = stats.entries;
+            document.getElementById('cache-size').textContent = `${(stats.size_bytes / 1024).toFixed(1)} KB`;
+        })
+        .catch(error => {
+            console.error('Error loading cache stats:', error);
+        });
+}
+
 /**
  * Load session data
  * @param {number} sessionId - The session ID to load
@@ -164,12 +227,14 @@ function loadSession(sessionId) {
         behavior: 'smooth'
     });
     
-    // Fetch session data
-    fetch(`/api/session/${sessionId}`)
+    // Fetch session data and the first page of results
+    fetch(`/api/session/${sessionId}?include_snippet=1`)
         .then(response => response.json())
         .then(data => {
-            // Store all results globally
+            // Store loaded results globally
             allResults = data.results;
+            currentSession = data.session;
+            nextResultsCursor = data.next_cursor;
             
             // Update session info
             updateSessionInfo(data.session);
@@ -235,11 +300,11 @@ function updateSessionInfo(session) {
     }
     
     // Update container
-    // Calculate severity counts
-    const highCount = allResults.filter(r => r.severity === 'high' && !r.is_false_positive).length;
-    const mediumCount = allResults.filter(r => r.severity === 'medium' && !r.is_false_positive).length;
-    const lowCount = allResults.filter(r => r.severity === 'low' && !r.is_false_positive).length;
-    const falsePositiveCount = allResults.filter(r => r.is_false_positive).length;
+    // Severity counts cover the whole session, not just the loaded pages
+    const highCount = session.severity_counts.high;
+    const mediumCount = session.severity_counts.medium;
+    const lowCount = session.severity_counts.low;
+    const falsePositiveCount = session.severity_counts.false_positive;
     
     sessionInfoContainer.innerHTML = `
         <div class="card">
@@ -434,10 +499,44 @@ function applyFilters() {
     const resultsCountElem = document.getElementById('filtered-results-count');
     if (resultsCountElem) {
         resultsCountElem.textContent = filteredData.length;
-        document.getElementById('total-results-count').textContent = allResults.length;
+        document.getElementById('loaded-results-count').textContent = allResults.length;
     }
 }
 
+/**
+ * Fetch the next page of results for the current session and append it
+ */
+function loadMoreResults() {
+    if (!currentSessionId || !nextResultsCursor) return;
+    
+    const button = document.getElementById('load-more-results-btn');
+    if (button) {
+        button.disabled = true;
+    }
+    
+    fetch(`/api/session/${currentSessionId}?include_snippet=1&cursor=${encodeURIComponent(nextResultsCursor)}`)
+        .then(response => response.json())
+        .then(data => {
+            allResults = allResults.concat(data.results);
+            nextResultsCursor = data.next_cursor;
+            
+            // Re-apply filters to include the new rows
+            applyFilters();
+            populateCategoryFilter(allResults);
+            
+            if (button) {
+                button.disabled = false;
+                button.classList.toggle('d-none', !nextResultsCursor);
+            }
+        })
+        .catch(error => {
+            console.error('Error loading more results:', error);
+            if (button) {
+                button.disabled = false;
+            }
+        });
+}
+
 /**
  * Update active filter tags display
  */
@@ -551,12 +650,12 @@ function updateResultsTable(results) {
         return;
     }
     
-    // Create severity summary
+    // Create severity summary for the whole session
     const severityCounts = {
-        high: results.filter(r => r.severity === 'high' && !r.is_false_positive).length,
-        medium: results.filter(r => r.severity === 'medium' && !r.is_false_positive).length,
-        low: results.filter(r => r.severity === 'low' && !r.is_false_positive).length,
-        falsePositive: results.filter(r => r.is_false_positive).length
+        high: currentSession.severity_counts.high,
+        medium: currentSession.severity_counts.medium,
+        low: currentSession.severity_counts.low,
+        falsePositive: currentSession.severity_counts.false_positive
     };
     
     // Create table element
@@ -580,7 +679,7 @@ function updateResultsTable(results) {
             </div>
         </div>
         <div class="mb-3">
-            <span class="text-muted">Showing <span id="filtered-results-count">${results.length}</span> of <span id="total-results-count">${results.length}</span> results</span>
+            <span class="text-muted">Showing <span id="filtered-results-count">${results.length}</span> of <span id="loaded-results-count">${results.length}</span> loaded results (<span id="total-results-count">${currentSession.results_count}</span> total)</span>
         </div>
         <div class="table-responsive">
             <table id="results-table" class="table table-striped table-hover" style="width:100%">
@@ -599,8 +698,15 @@ function updateResultsTable(results) {
                 </tbody>
             </table>
         </div>
+        <div class="text-center mt-3">
+            <button type="button" class="btn btn-outline-primary ${nextResultsCursor ? '' : 'd-none'}" id="load-more-results-btn">
+                <i class="fas fa-chevron-down me-2"></i> Load more results
+            </button>
+        </div>
     `;
     
+    document.getElementById('load-more-results-btn').addEventListener('click', loadMoreResults);
+    
     // Show filter controls
     document.getElementById('filter-controls').classList.remove('d-none');
     
@@ -645,14 +751,29 @@ function updateResultsTable(results) {
             { 
                 data: 'dork',
                 title: 'Dork',
-                width: '20%'
+                width: '20%',
+                render: function(data, type, row) {
+                    // The same URL found by other dorks of the scan is merged into this row
+                    const others = (row.dorks || []).filter(dork => dork !== data);
+                    if (!others.length) {
+                        return escapeHtml(data);
+                    }
+                    return `${escapeHtml(data)} <span class="badge bg-secondary" title="${escapeHtml(others.join('\n'))}">+${others.length}</span>`;
+                }
             },
             { 
                 data: 'result_url',
                 title: 'Result',
                 width: '20%',
-                render: function(data) {
-                    return `<a href="${data}" target="_blank" rel="noopener noreferrer">${truncateString(data, 40)}</a>`;
+                render: function(data, type, row) {
+                    // Flag findings a delta-aware scan has not seen before, or saw with another snippet
+                    let deltaBadge = '';
+                    if (row.delta_status === 'new') {
+                        deltaBadge = ' <span class="badge bg-info">New</span>';
+                    } else if (row.delta_status === 'changed') {
+                        deltaBadge = ' <span class="badge bg-warning text-dark">Changed</span>';
+                    }
+                    return `<a href="${data}" target="_blank" rel="noopener noreferrer">${truncateString(data, 40)}</a>${deltaBadge}`;
                 }
             },
             { 
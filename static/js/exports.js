@@ -30,6 +30,20 @@ function exportJson(sessionId) {
     window.location.href = `/api/export/session/${sessionId}/json`;
 }
 
+/**
+ * Export session results as newline-delimited JSON
+ * @param {number} sessionId - The session ID to export
+ */
+function exportNdjson(sessionId) {
+    if (!sessionId) {
+        console.error('No session ID provided for NDJSON export');
+        return;
+    }
+    
+    // Download NDJSON file
+    window.location.href = `/api/export/session/${sessionId}/ndjson`;
+}
+
 /**
  * Generate a sanitized filename for exports
  * @param {string} prefix - The prefix for the filename
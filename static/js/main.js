@@ -76,10 +76,12 @@ function initializeScanForm() {
         }
         
         // Prepare data for API request
+        const deltaSwitch = document.getElementById('delta-scan');
         const requestData = {
             target: target,
             platforms: platforms,
-            categories: categories
+            categories: categories,
+            delta: deltaSwitch ? deltaSwitch.checked : false
         };
         
         // Make API request to start scan
@@ -97,7 +99,7 @@ function initializeScanForm() {
             return response.json();
         })
         .then(data => {
-            console.log('Scan started successfully:', data);
+            console.log('Scan queued successfully:', data);
             
             // Show progress modal
             showProgressModal(data.session_id, (sessionId) => {
@@ -113,7 +115,7 @@ function initializeScanForm() {
             if (scanStatusContainer) {
                 scanStatusContainer.innerHTML = `
                     <div class="alert alert-success">
-                        <strong>Success:</strong> Scan started! Track progress in the modal.
+                        <strong>Success:</strong> Scan queued! Track progress in the modal.
                     </div>
                 `;
             }
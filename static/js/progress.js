@@ -3,7 +3,10 @@
  */
 
 /**
- * Start progress polling for a scan session
+ * Start tracking progress for a scan session
+ *
+ * Uses a Server-Sent Events stream when the browser supports it and falls
+ * back to long-polling the progress endpoint otherwise.
  * @param {number} sessionId - The session ID to track
  * @param {function} onProgress - Callback function for progress updates
  * @param {function} onComplete - Callback function when scan completes
@@ -12,18 +15,44 @@
  */
 function trackScanProgress(sessionId, onProgress, onComplete, onError) {
     let isRunning = true;
-    let pollCount = 0;
-    const maxPolls = 600; // 10 minutes at 1 second intervals
+    let eventSource = null;
+    let version = 0;
     
-    // Poll the progress endpoint
+    // Handle a progress payload; returns true once the scan has finished
+    const handleProgress = (data) => {
+        if (data.version !== undefined) {
+            version = data.version;
+        }
+        
+        // Call the progress callback
+        if (onProgress) {
+            onProgress(data);
+        }
+        
+        // Check if scan is complete or failed
+        if (data.status === 'completed') {
+            isRunning = false;
+            if (onComplete) {
+                onComplete(sessionId);
+            }
+            return true;
+        } else if (data.status === 'failed') {
+            isRunning = false;
+            if (onError) {
+                onError(new Error(data.current_step));
+            }
+            return true;
+        }
+        return false;
+    };
+    
+    // Long-poll the progress endpoint, returning as soon as a newer update exists
     const poll = () => {
-        if (!isRunning || pollCount >= maxPolls) {
+        if (!isRunning) {
             return;
         }
         
-        pollCount++;
-        
-        fetch(`/api/scan/progress/${sessionId}`)
+        fetch(`/api/scan/progress/${sessionId}?since=${version}&wait=25`)
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`HTTP error! Status: ${response.status}`);
@@ -31,27 +60,9 @@ function trackScanProgress(sessionId, onProgress, onComplete, onError) {
                 return response.json();
             })
             .then(data => {
-                console.log('Progress update:', data);
-                
-                // Call the progress callback
-                if (onProgress) {
-                    onProgress(data);
-                }
-                
-                // Check if scan is complete or failed
-                if (data.status === 'completed') {
-                    isRunning = false;
-                    if (onComplete) {
-                        onComplete(sessionId);
-                    }
-                } else if (data.status === 'failed') {
-                    isRunning = false;
-                    if (onError) {
-                        onError(new Error(data.current_step));
-                    }
-                } else {
-                    // Continue polling after 1 second
-                    setTimeout(poll, 1000);
+                if (!handleProgress(data)) {
+                    // Sessions no longer tracked answer at once without a version, so back off
+                    setTimeout(poll, data.version === undefined ? 1000 : 0);
                 }
             })
             .catch(error => {
@@ -68,13 +79,31 @@ function trackScanProgress(sessionId, onProgress, onComplete, onError) {
             });
     };
     
-    // Start polling
-    poll();
+    if (window.EventSource) {
+        eventSource = new EventSource(`/api/scan/progress/${sessionId}/stream`);
+        
+        eventSource.onmessage = (event) => {
+            if (handleProgress(JSON.parse(event.data))) {
+                eventSource.close();
+            }
+        };
+        
+        eventSource.onerror = () => {
+            // Streaming is unavailable (e.g. a buffering proxy); switch to long-polling
+            eventSource.close();
+            poll();
+        };
+    } else {
+        poll();
+    }
     
     // Return controller object with stop method
     return {
         stop: () => {
             isRunning = false;
+            if (eventSource) {
+                eventSource.close();
+            }
         }
     };
 }
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the DorkRecon tests
+
+app.py reads DATABASE_URL when it is first imported, so the whole run uses
+one SQLite file in a temporary directory, set up here before the app is
+imported. Importing the app first also lets tests import the services,
+which import it, directly.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_DIR = tempfile.mkdtemp(prefix='dorkrecon-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DATA_DIR, 'dorkrecon.db')
+
+from app import app as flask_app
+
+def pytest_unconfigure(config):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+@pytest.fixture(scope='session')
+def app():
+    """The Flask app, with its schema migrated"""
+    return flask_app
+
+@pytest.fixture
+def app_context(app):
+    """Run the test inside an application context"""
+    with app.app_context():
+        yield app
+
+@pytest.fixture
+def client(app):
+    """Test client for the dashboard and API"""
+    return app.test_client()
@@ -0,0 +1,105 @@
+"""
+GitHub code search scheduling against the local mock server
+
+The code search limit is 10 requests per 60 seconds per token; these tests
+keep the limit and shrink the window to one second so they finish quickly.
+The schedule scales with window / limit, so the same spacing holds at 60s.
+"""
+import time
+import asyncio
+import datetime
+import pytest
+from sqlalchemy import delete, event
+from app import db
+from benchmarks.mock_github import MockGithubServer
+from models import GithubToken
+from services.github_client import GithubSearchClient, TokenBudget, TokenPool
+from services.write_queue import get_write_queue
+
+LIMIT = 10
+WINDOW = 1.0
+
+@pytest.fixture(autouse=True)
+def no_default_token(monkeypatch):
+    monkeypatch.setattr('config.GITHUB_DEFAULT_TOKEN', '')
+
+def search(server, pool, queries):
+    async def search_all():
+        async with GithubSearchClient(pool, base_url=server.url) as client:
+            return await asyncio.gather(*(client.search_code(query) for query in queries))
+    return asyncio.run(search_all())
+
+def test_tokens_stay_within_their_budget():
+    names = ['token-a', 'token-b', 'token-c']
+    pool = TokenPool([TokenBudget(name, limit=LIMIT, window=WINDOW) for name in names])
+    with MockGithubServer(names, limit=LIMIT, window=WINDOW) as server:
+        started = time.monotonic()
+        results = search(server, pool, [f'org:example secret{i}' for i in range(45)])
+        elapsed = time.monotonic() - started
+
+    assert all(len(result) == server.results_per_query for result in results)
+    assert sum(server.violations.values()) == 0
+    # Searches are spread evenly, and no token sends more than its limit in any window
+    windows = int(elapsed // WINDOW) + 1
+    for name in names:
+        assert server.requests[name] == 15
+        assert server.requests[name] <= LIMIT * windows
+
+def test_rate_limit_headers_correct_the_budget():
+    pool = TokenPool([TokenBudget('token-a', limit=LIMIT, window=60)])
+    with MockGithubServer(['token-a'], limit=LIMIT, window=60) as server:
+        # Another process already spent 7 requests of this window
+        window_end = time.time() + 60
+        server.windows['token-a'] = [window_end, 7]
+        search(server, pool, ['org:example password'])
+
+    budget = pool.budgets['token-a']
+    assert budget.remaining == LIMIT - 8
+    assert budget.reset_at == int(window_end) + 1
+    assert budget.in_flight == 0
+
+def test_lower_server_limit_slows_the_token():
+    pool = TokenPool([TokenBudget('token-a', limit=LIMIT, window=WINDOW)])
+    with MockGithubServer(['token-a'], limit=5, window=WINDOW) as server:
+        search(server, pool, ['org:example password'])
+        budget = pool.budgets['token-a']
+        assert (budget.limit, budget.interval) == (5, WINDOW / 5)
+
+        search(server, pool, [f'org:example key{i}' for i in range(8)])
+    assert sum(server.violations.values()) == 0
+
+def test_budgets_are_written_back_in_one_update(app_context):
+    rows = [GithubToken(token=f'token-{name}', owner=name, is_active=True) for name in ('a', 'b')]
+    db.session.add_all(rows)
+    db.session.commit()
+    try:
+        pool = TokenPool().load()
+        names = [row.token for row in rows]
+        assert sorted(pool.budgets) == names
+
+        with MockGithubServer(names, limit=LIMIT, window=60) as server:
+            search(server, pool, ['org:example token', 'org:example secret'])
+
+        updates = []
+        engine = get_write_queue().engine
+        listener = lambda conn, cursor, statement, *args: updates.append(statement) \
+            if statement.startswith('UPDATE github_token') else None
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            assert pool.flush() == 2
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        assert len(updates) == 1
+        assert pool.flush() == 0
+
+        db.session.expire_all()
+        for row in rows:
+            budget = pool.budgets[row.token]
+            stored = db.session.get(GithubToken, row.id)
+            assert stored.rate_limit_remaining == budget.remaining == LIMIT - server.requests[row.token]
+            assert stored.rate_limit_reset == datetime.datetime.fromtimestamp(budget.reset_at, datetime.timezone.utc).replace(tzinfo=None)
+            assert stored.last_used is not None
+            assert server.requests[row.token] == 1
+    finally:
+        db.session.execute(delete(GithubToken).where(GithubToken.id.in_([row.id for row in rows])))
+        db.session.commit()
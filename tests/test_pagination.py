@@ -0,0 +1,58 @@
+"""
+Keyset cursors of the scans and results APIs
+"""
+import datetime
+import pytest
+from sqlalchemy import delete, insert
+from app import db
+from models import Result, ScanSession
+from services.pagination import encode_cursor
+
+@pytest.fixture
+def sessions(app):
+    with app.app_context():
+        now = datetime.datetime(2025, 6, 1)
+        ids = [db.session.execute(insert(ScanSession).values(
+            target=f'page{index}.example.com', target_type='domain', status='completed',
+            platforms='google', created_at=now - datetime.timedelta(minutes=index)
+        )).inserted_primary_key[0] for index in range(5)]
+        db.session.commit()
+    yield ids
+    with app.app_context():
+        db.session.execute(delete(Result).where(Result.scan_session_id.in_(ids)))
+        db.session.execute(delete(ScanSession).where(ScanSession.id.in_(ids)))
+        db.session.commit()
+
+@pytest.mark.parametrize('path, key', [('/api/sessions', 'sessions'), ('/api/v1/scans', 'scans')])
+def test_scans_pages_follow_the_cursor(client, sessions, path, key):
+    seen = []
+    cursor = None
+    while True:
+        response = client.get(path, query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.get_json()
+        seen.extend(scan['id'] for scan in body[key] if scan['id'] in sessions)
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert seen == sessions
+
+@pytest.mark.parametrize('path', ['/api/sessions', '/api/v1/scans'])
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    encode_cursor('2025-06-01T00:00:00'),
+    encode_cursor('yesterday', 3),
+    encode_cursor(None, 3),
+    encode_cursor('2025-06-01T00:00:00', '3'),
+    encode_cursor('2025-06-01T00:00:00', None),
+    encode_cursor('2025-06-01T00:00:00', [3]),
+])
+def test_scans_reject_malformed_cursor(client, path, cursor):
+    response = client.get(path, query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid cursor')
+
+def test_results_reject_non_integer_cursor(client, sessions):
+    response = client.get(f'/api/v1/scan/{sessions[0]}/results', query_string={'cursor': encode_cursor('7')})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid cursor')
@@ -0,0 +1,122 @@
+"""
+Progress channels fed from the progress store for scans in other processes
+"""
+import time
+import threading
+import pytest
+from services.progress_bus import ProgressBus
+
+class FakeStore:
+    """Progress of one session as another process would write it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = {'status': 'running', 'progress': 0, 'version': 1}
+        self.reads = 0
+
+    def update(self, **fields):
+        with self.lock:
+            self.snapshot = dict(self.snapshot, **fields, version=self.snapshot['version'] + 1)
+
+    def fetch(self):
+        with self.lock:
+            self.reads += 1
+            if self.snapshot is None:
+                return None
+            return dict(self.snapshot), self.snapshot['status'] in ('completed', 'failed')
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr('config.PROGRESS_MIN_INTERVAL', 0.02)
+    monkeypatch.setattr('config.PROGRESS_FEED_IDLE', 0.1)
+
+def test_watchers_share_one_poller():
+    bus = ProgressBus()
+    store = FakeStore()
+    watchers = 50
+    seen = [[] for _ in range(watchers)]
+
+    def watcher(index):
+        since = 0
+        while True:
+            channel = bus.follow(7, store.fetch)
+            version, snapshot, closed = channel.wait(since, 2)
+            if snapshot is not None:
+                since = version
+                seen[index].append(snapshot['progress'])
+            if closed:
+                return
+
+    threads = [threading.Thread(target=watcher, args=(index,)) for index in range(watchers)]
+    for thread in threads:
+        thread.start()
+    started = time.monotonic()
+    for progress in range(10, 100, 10):
+        store.update(progress=progress)
+        time.sleep(0.03)
+    store.update(progress=100, status='completed')
+    for thread in threads:
+        thread.join(5)
+    elapsed = time.monotonic() - started
+
+    assert all(progresses[-1] == 100 for progresses in seen)
+    # About one read per poll interval for the whole session, not per watcher
+    assert store.reads <= elapsed / 0.02 + 5
+    assert bus.get(7).poller is None and bus.get(7).closed
+
+def test_simultaneous_first_watchers_read_the_store_once():
+    bus = ProgressBus()
+    store = FakeStore()
+    ready = threading.Barrier(50)
+    snapshots = []
+
+    def watcher():
+        ready.wait()
+        channel = bus.follow(12, store.fetch)
+        version, snapshot, closed = channel.wait(0, 2)
+        snapshots.append(snapshot)
+
+    threads = [threading.Thread(target=watcher) for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(snapshots) == 50 and all(snapshot['version'] == 1 for snapshot in snapshots)
+    assert store.reads <= 2
+
+def test_poller_stops_when_nobody_follows():
+    bus = ProgressBus()
+    store = FakeStore()
+    channel = bus.follow(8, store.fetch)
+    assert channel.poller is not None
+    time.sleep(0.3)
+    assert channel.poller is None
+    reads = store.reads
+    time.sleep(0.1)
+    assert store.reads == reads
+
+    # The next watcher restarts it and sees what changed meanwhile
+    store.update(progress=50)
+    assert bus.follow(8, store.fetch) is channel
+    assert channel.poller is not None and channel.snapshot['progress'] == 50
+
+def test_untracked_session_has_no_channel():
+    bus = ProgressBus()
+    assert bus.follow(9, lambda: None) is None
+    assert bus.get(9) is None
+
+def test_session_dropped_from_store_closes_channel():
+    bus = ProgressBus()
+    store = FakeStore()
+    channel = bus.follow(10, store.fetch)
+    with store.lock:
+        store.snapshot = None
+    version, snapshot, closed = channel.wait(channel.version, 2)
+    assert closed and snapshot is None
+
+def test_local_channel_is_not_polled():
+    bus = ProgressBus()
+    bus.publish(11, {'status': 'running', 'version': 3}, version=3)
+    store = FakeStore()
+    assert bus.follow(11, store.fetch) is bus.get(11)
+    assert store.reads == 0 and bus.get(11).poller is None
@@ -0,0 +1,48 @@
+"""
+Two-tier query cache
+"""
+import sqlite3
+from services.query_cache import QueryCache
+
+def test_hit_from_memory_then_disk(tmp_path):
+    path = str(tmp_path / 'query_cache.db')
+    QueryCache(path=path, enabled=True).put('google', 'site:example.com', [{'url': 'https://example.com/'}])
+
+    cache = QueryCache(path=path, enabled=True)
+    assert cache.get('google', 'site:example.com') == [{'url': 'https://example.com/'}]
+    assert cache.get('google', 'site:example.com') == [{'url': 'https://example.com/'}]
+    assert cache.get('github', 'site:example.com') is None
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+
+def test_key_is_platform_and_query(tmp_path):
+    path = str(tmp_path / 'query_cache.db')
+    cache = QueryCache(path=path, enabled=True)
+    cache.put('github', 'org:example password', [])
+    columns = [row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(query_cache)")]
+    assert 'page' not in columns
+    assert list(cache.memory) == [('github', 'org:example password')]
+
+def test_file_keyed_by_page_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'query_cache.db')
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE query_cache (platform TEXT NOT NULL, query TEXT NOT NULL, page INTEGER NOT NULL, "
+                       "results TEXT NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                       "PRIMARY KEY (platform, query, page))")
+    connection.execute("INSERT INTO query_cache VALUES ('google', 'q', 1, '[]', 2, 1e12, 1e12)")
+    connection.commit()
+    connection.close()
+
+    cache = QueryCache(path=path, enabled=True)
+    assert cache.get('google', 'q') is None
+    cache.put('google', 'q', [{'url': 'https://example.com/'}])
+    assert QueryCache(path=path, enabled=True).get('google', 'q') == [{'url': 'https://example.com/'}]
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = QueryCache(path=str(tmp_path / 'query_cache.db'), max_bytes=300, enabled=True)
+    for index in range(20):
+        cache.put('google', f'q{index}', [{'url': 'x' * 10}])
+    stats = cache.stats()
+    assert stats['size_bytes'] <= 300
+    assert stats['evictions'] > 0
+    assert QueryCache(path=cache.path, enabled=True).get('google', 'q19') is not None
@@ -0,0 +1,49 @@
+"""
+Hot queries must be served by indexes
+
+Seeds a few sessions of results, runs ANALYZE so SQLite plans with
+statistics as it would in production, and checks the EXPLAIN QUERY PLAN of
+every query in migrations.hot_queries().
+"""
+import datetime
+import pytest
+from sqlalchemy import insert
+from app import db
+from migrations import check_query_plans, hot_queries
+from models import Result, ScanSession
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    with app.app_context():
+        now = datetime.datetime.utcnow()
+        session_ids = [db.session.execute(insert(ScanSession).values(
+            target=f'plans{index}.example.com', target_type='domain', status='completed',
+            platforms='both', created_at=now - datetime.timedelta(minutes=index)
+        )).inserted_primary_key[0] for index in range(5)]
+        db.session.execute(insert(Result), [{
+            'scan_session_id': session_id,
+            'dork': f'site:plans{index % 7}.example.com',
+            'platform': ('google', 'github')[index % 2],
+            'category': 'Secrets',
+            'result_url': f'https://plans.example.com/{session_id}/{index}',
+            'url_hash': f'{session_id:08x}{index:032x}',
+            'severity': ('high', 'medium', 'low')[index % 3],
+            'is_false_positive': index % 10 == 0
+        } for session_id in session_ids for index in range(400)])
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    return session_ids
+
+def plan(statement):
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    with db.engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+@pytest.mark.parametrize('description', sorted(hot_queries()))
+def test_hot_query_does_not_scan_result(seeded, app_context, description):
+    steps = plan(hot_queries()[description])
+    assert not [step for step in steps if step.startswith('SCAN result')], steps
+
+def test_check_query_plans_passes(seeded, app_context):
+    assert check_query_plans() == []
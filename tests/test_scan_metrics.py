@@ -0,0 +1,85 @@
+"""
+Stage histograms summed from stored scan profiles for /metrics
+"""
+import datetime
+import pytest
+from sqlalchemy import delete
+from app import db
+from models import ScanSession
+from services.scan_metrics import Histogram, ScanProfile, StoredProfiles
+
+def make_profile(session_id, durations, status='completed'):
+    profile = ScanProfile(session_id)
+    for seconds in durations:
+        profile.observe('backend', 'google', seconds)
+    profile.finish(status)
+    return profile.to_json()
+
+def test_histogram_round_trips_through_its_summary():
+    histogram = Histogram()
+    for seconds in (0.0005, 0.003, 0.2, 0.2, 45.0):
+        histogram.observe(seconds)
+    rebuilt = Histogram.from_dict(histogram.to_dict())
+    assert (rebuilt.buckets, rebuilt.count, rebuilt.max) == (histogram.buckets, histogram.count, histogram.max)
+
+def test_histogram_with_other_bounds_is_skipped():
+    summary = Histogram(bounds=(1.0, 2.0)).to_dict()
+    assert Histogram.from_dict(summary) is None
+
+def test_stored_profiles_follow_changes():
+    profiles = {1: make_profile(1, [0.01, 0.02]), 2: make_profile(2, [0.5], status='failed')}
+    reads = []
+
+    def load(session_ids):
+        reads.append(sorted(session_ids))
+        return {session_id: profiles[session_id] for session_id in session_ids}
+
+    stored = StoredProfiles()
+    markers = {1: ('completed', 'a'), 2: ('failed', 'b')}
+    assert stored.refresh(markers, load) == 2
+    assert stored.stages[('backend', 'google')].count == 3
+    assert stored.scans == {'completed': 1, 'failed': 1}
+
+    # Nothing changed: nothing is read
+    assert stored.refresh(markers, load) == 0
+
+    # Session 2 was resumed and finished again: its latest run replaces the old one
+    profiles[2] = make_profile(2, [0.1, 0.1, 0.1])
+    markers[2] = ('completed', 'c')
+    assert stored.refresh(markers, load) == 1
+    assert stored.stages[('backend', 'google')].count == 5
+    assert stored.scans == {'completed': 2, 'failed': 0}
+
+    # A deleted session leaves the sums
+    del markers[1]
+    stored.refresh(markers, load)
+    assert stored.stages[('backend', 'google')].count == 3
+    assert reads == [[1, 2], [2]]
+
+def test_running_scans_are_read_on_every_refresh():
+    stored = StoredProfiles()
+    load = lambda session_ids: {3: make_profile(3, [0.01], status='running')}
+    assert stored.refresh({3: ('running', None)}, load) == 1
+    assert stored.refresh({3: ('running', None)}, load) == 1
+    assert stored.running == 1
+    assert 'dorkrecon_scans_running 1' in stored.prometheus()
+
+@pytest.fixture
+def profiled_session(app):
+    with app.app_context():
+        session = ScanSession(target='metrics.example.com', target_type='domain', status='completed',
+                              platforms='google', completed_at=datetime.datetime.utcnow(),
+                              profile=make_profile(0, [0.003, 0.003, 0.3]))
+        db.session.add(session)
+        db.session.commit()
+        session_id = session.id
+    yield session_id
+    with app.app_context():
+        db.session.execute(delete(ScanSession).where(ScanSession.id == session_id))
+        db.session.commit()
+
+def test_metrics_endpoint_reports_stored_profiles(client, profiled_session):
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'dorkrecon_stage_seconds_count{stage="backend",platform="google"} 3' in text
+    assert 'dorkrecon_stage_seconds_bucket{stage="backend",platform="google",le="0.005"} 2' in text
+    assert 'dorkrecon_scans_total{status="completed"} 1' in text
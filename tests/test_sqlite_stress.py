@@ -0,0 +1,27 @@
+"""
+Concurrent scans on SQLite through the single writer queue
+
+Eight scans write through SqliteWriteQueue while reader threads poll the
+dashboard and API endpoints. The case runs in a fresh interpreter on a
+fresh database file, with the production SQLite profile, as the stress
+benchmark does.
+"""
+from benchmarks.sqlite_stress_bench import run_in_process
+
+SCANS = 8
+DORKS = 40
+RESULTS_PER_DORK = 5
+
+def test_concurrent_scans_and_dashboard_reads():
+    stats = run_in_process('production', {'scans': SCANS, 'dorks': DORKS, 'results_per_dork': RESULTS_PER_DORK,
+                                          'latency': 0.002, 'readers': 4})
+
+    assert stats['writes']['mode'] == 'queue'
+    assert stats['scan_errors'] == [] and stats['failed_scans'] == 0
+    assert stats['completed_scans'] == SCANS
+    # Any OperationalError in a reader ("database is locked" or otherwise) is counted here
+    assert stats['reads'] > 0
+    assert stats['read_errors'] == 0, stats['read_error_samples']
+    assert stats['writes']['failed'] == 0
+    # Every fixture result of every dork was stored, once
+    assert stats['results'] == SCANS * DORKS * RESULTS_PER_DORK
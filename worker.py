@@ -0,0 +1,73 @@
+"""
+Scan worker for DorkRecon
+
+Runs the scans queued by the web tier. Each worker process claims one job at
+a time from the scan_job table and renews its lease while the scan runs. Jobs
+held by a worker that died are requeued once their lease expires.
+
+SIGINT or SIGTERM stops claiming new jobs and waits for running scans to
+finish; a second signal stops the workers immediately.
+
+Workers serve no metrics of their own. Each scan stores its stage profile
+on its session, and the web tier's /metrics sums the stored profiles.
+
+Usage:
+    python -m worker                  # config.SCAN_WORKER_PROCESSES processes
+    python -m worker --processes 4
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import sys
+import config
+
+logger = logging.getLogger(__name__)
+
+def run_process(index, stop_event):
+    """Entry point of one worker process"""
+    # The parent coordinates shutdown through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    
+    from app import app
+    from services.scan_worker import ScanWorker, worker_id
+    ScanWorker(worker_id(), stop_event).run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued DorkRecon scans")
+    parser.add_argument('--processes', type=int, default=config.SCAN_WORKER_PROCESSES,
+                        help="number of worker processes")
+    args = parser.parse_args()
+    
+    # Migrate the schema here, before the children start, so they find nothing to do
+    import app
+    
+    context = multiprocessing.get_context('spawn')
+    stop_event = context.Event()
+    processes = [context.Process(target=run_process, args=(index, stop_event), name=f"scan-worker-{index}")
+                 for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} scan worker processes "
+                f"(global concurrency {config.SCAN_JOB_CONCURRENCY})")
+    
+    def shutdown(signum, frame):
+        if stop_event.is_set():
+            logger.warning("Stopping scan workers immediately; their jobs are requeued when the lease expires")
+            # SIGKILL: a child's SIGTERM handler only sets stop_event, which is already set
+            for process in processes:
+                process.kill()
+        else:
+            logger.info("Finishing running scans before exiting (signal again to stop now)")
+            stop_event.set()
+    
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    
+    for process in processes:
+        process.join()
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())